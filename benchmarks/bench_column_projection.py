@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+基准测试：单列工具的列裁剪读取
+
+在宽表（默认 320 列）上比较：
+1. 全量解析 CSV vs 只解析 1 列（usecols）
+2. 全量读取 Parquet 旁路文件 vs 只读取 1 列
+
+用法：
+  python benchmarks/bench_column_projection.py --rows 50000 --columns 320
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.tools.columnar_store import PYARROW_AVAILABLE, find_sidecar
+from src.tools.data_loader import _parse_dataset, convert_to_columnar
+
+
+def make_wide_csv(path: Path, rows: int, columns: int) -> None:
+    """生成宽表：数值列和字符串列各半"""
+    rng = np.random.default_rng(42)
+    data = {}
+    for i in range(columns):
+        if i % 2 == 0:
+            data[f"num_{i}"] = rng.normal(100, 15, rows).round(3)
+        else:
+            data[f"cat_{i}"] = rng.choice(["alpha", "beta", "gamma", "delta"], rows)
+    pd.DataFrame(data).to_csv(path, index=False)
+
+
+def best_of(func, repeat: int) -> float:
+    """多次运行取最短耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列裁剪读取基准测试")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--columns", type=int, default=320)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "wide.csv"
+        make_wide_csv(csv_path, args.rows, args.columns)
+        size_mb = csv_path.stat().st_size / 1024 / 1024
+        print(f"📊 宽表：{args.rows:,} 行 × {args.columns} 列，CSV {size_mb:.1f} MB\n")
+
+        target = ["num_0"]
+        results = [
+            ("CSV 全量解析", best_of(lambda: _parse_dataset(str(csv_path), "csv"), args.repeat)),
+            ("CSV usecols 单列", best_of(lambda: _parse_dataset(str(csv_path), "csv", target), args.repeat)),
+        ]
+
+        if PYARROW_AVAILABLE and convert_to_columnar(str(csv_path)):
+            assert find_sidecar(str(csv_path)) is not None
+            results += [
+                ("Parquet 全量读取", best_of(lambda: _parse_dataset(str(csv_path), "csv"), args.repeat)),
+                ("Parquet 单列读取", best_of(lambda: _parse_dataset(str(csv_path), "csv", target), args.repeat)),
+            ]
+
+        baseline = results[0][1]
+        print("\n" + "=" * 60)
+        for name, seconds in results:
+            print(f"{name:20s} {seconds * 1000:10.1f} ms   {baseline / seconds:6.1f}x")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+基准测试：大型 CSV 单进程解析 vs 多进程并行解析
+
+用法：
+  python benchmarks/bench_parallel_csv.py --rows 2000000 --workers 8
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.tools.columnar_store import PYARROW_AVAILABLE
+from src.tools.parallel_csv import parallel_read_csv
+
+
+def make_csv(path: Path, rows: int) -> None:
+    rng = np.random.default_rng(42)
+    pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.normal(100, 15, rows).round(3),
+        "quantity": rng.integers(1, 100, rows),
+        "region": rng.choice(["east", "west", "north", "south"], rows),
+        "product": rng.choice([f"P{i:03d}" for i in range(200)], rows),
+    }).to_csv(path, index=False)
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行 CSV 解析基准测试")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=0, help="进程数（0 表示 CPU 核数）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "large.csv"
+        make_csv(csv_path, args.rows)
+        size_mb = csv_path.stat().st_size / 1024 / 1024
+        print(f"文件：{args.rows} 行，{size_mb:.1f} MB")
+
+        serial = timed(lambda: pd.read_csv(csv_path))
+        print(f"单进程 pd.read_csv：{serial:.2f}s")
+
+        parallel = timed(lambda: parallel_read_csv(str(csv_path), workers=args.workers, engine="pandas"))
+        print(f"多进程解析：{parallel:.2f}s（{serial / parallel:.1f}x）")
+
+        if PYARROW_AVAILABLE:
+            arrow = timed(lambda: parallel_read_csv(str(csv_path), engine="pyarrow"))
+            print(f"pyarrow 引擎：{arrow:.2f}s（{serial / arrow:.1f}x）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+基准测试：CLI 和 Web 服务的启动时间
+
+每个场景在新的解释器进程中运行，测量总耗时（含解释器启动），
+并检查 crewai / langchain / pandasai 是否被加载（按需创建 Agent 后这些场景都不应加载）。
+
+用法：
+  python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+HEAVY_MODULES = ["crewai", "langchain_openai", "langchain_core", "pandasai"]
+
+# 在子进程中运行场景，结束后输出已加载的重依赖
+_RUNNER = """
+import json, runpy, sys
+sys.path.insert(0, {root!r})
+sys.argv = {argv!r}
+try:
+    {body}
+except SystemExit:
+    pass
+print("__HEAVY__" + json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+
+def scenarios(dataset: str) -> dict:
+    main = str(PROJECT_ROOT / "main_v2.py")
+    run_main = f"runpy.run_path({main!r}, run_name='__main__')"
+    return {
+        "python -c pass": (["python"], "pass"),
+        "main_v2.py --help": ([main, "--help"], run_main),
+        "main_v2.py --check-env": ([main, "--check-env"], run_main),
+        "main_v2.py --dry-run": ([main, "--goal", "测试", "--dataset", dataset, "--dry-run"], run_main),
+        "import web.backend.app": (["app"], "import web.backend.app")
+    }
+
+
+def run_once(argv: list, body: str) -> tuple:
+    code = _RUNNER.format(root=str(PROJECT_ROOT), argv=argv, body=body, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    marker = [line for line in proc.stdout.splitlines() if line.startswith("__HEAVY__")]
+    if proc.returncode != 0 or not marker:
+        error = (proc.stderr.strip().splitlines() or ["未知错误"])[-1]
+        return elapsed, None, error
+    return elapsed, json.loads(marker[-1][len("__HEAVY__"):]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动时间基准测试")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = os.path.join(tmp, "sample.csv")
+        Path(dataset).write_text("date,sales\n2024-01-01,100\n2024-01-02,120\n", encoding="utf-8")
+
+        print(f"{'场景':<28}{'中位数':>10}{'最小值':>10}  已加载的重依赖")
+        for name, (argv, body) in scenarios(dataset).items():
+            timings, heavy, error = [], [], None
+            for _ in range(args.repeat):
+                elapsed, heavy, error = run_once(argv, body)
+                timings.append(elapsed)
+            if error:
+                print(f"{name:<28}{'-':>10}{'-':>10}  运行失败：{error}")
+                continue
+            print(f"{name:<28}{statistics.median(timings):>9.3f}s{min(timings):>9.3f}s  {', '.join(heavy) or '无'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+基准测试：趋势/异常检测的逐行循环 vs 向量化统计内核
+
+比较 analyst_v2 原先的 Python 循环实现与 src/tools/stats_kernels 的 NumPy 实现。
+
+用法：
+  python benchmarks/bench_stats_kernels.py --rows 10000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.tools.stats_kernels import growth_rates, zscore_outliers
+
+
+def loop_growth(values):
+    rates = []
+    for i in range(1, len(values)):
+        if values[i-1] != 0:
+            rates.append((values[i] - values[i-1]) / values[i-1] * 100)
+    return np.mean(rates) if rates else 0
+
+
+def loop_anomalies(series, threshold):
+    mean, std = series.mean(), series.std()
+    anomalies = []
+    for idx, value in series.items():
+        z_score = (value - mean) / std if std > 0 else 0
+        if abs(z_score) > threshold:
+            anomalies.append({"index": int(idx), "value": float(value), "z_score": round(z_score, 2)})
+    return anomalies
+
+
+def kernel_anomalies(series, threshold):
+    values = series.to_numpy(dtype="float64")
+    positions, z = zscore_outliers(values, threshold)
+    return [
+        {"index": int(idx), "value": float(value), "z_score": round(float(z_score), 2)}
+        for idx, value, z_score in zip(series.index[positions], values[positions], z[positions])
+    ]
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计内核基准测试")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--threshold", type=float, default=3.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    series = pd.Series(rng.normal(1000, 50, args.rows))
+    values = series.to_numpy()
+    print(f"数据：{args.rows:,} 行")
+
+    loop = timed(lambda: loop_growth(values))
+    kernel = timed(lambda: growth_rates(values).mean())
+    print(f"增长率：循环 {loop:.2f}s，内核 {kernel:.3f}s（{loop / kernel:.0f}x）")
+
+    loop = timed(lambda: loop_anomalies(series, args.threshold))
+    kernel = timed(lambda: kernel_anomalies(series, args.threshold))
+    print(f"异常检测：循环 {loop:.2f}s，内核 {kernel:.3f}s（{loop / kernel:.0f}x）")
+
+
+if __name__ == "__main__":
+    main()
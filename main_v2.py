@@ -6,6 +6,7 @@ DataInsight Pro v2.0 - AI 大数据自动化分析 Agent
 import os
 import sys
 import argparse
+import importlib.util
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -86,6 +87,13 @@ def parse_args():
         help='分析深度：quick（快速）、standard（标准）、deep（深入）'
     )
 
+    parser.add_argument(
+        '--execution',
+        choices=['concurrent', 'sequential'],
+        default=None,
+        help='执行方式：concurrent（独立阶段并发执行）、sequential（逐个执行），默认取 settings.yaml'
+    )
+
     parser.add_argument(
         '--interactive',
         action='store_true',
@@ -156,11 +164,11 @@ def check_environment():
         ("langchain_openai", "LLM 集成"),
     ]
 
+    # 只查找包是否安装，不实际导入（crewai / pandasai 导入耗时数秒）
     for package, description in dependencies:
-        try:
-            __import__(package)
+        if importlib.util.find_spec(package) is not None:
             print(f"✅ {package:20s} - {description}")
-        except ImportError:
+        else:
             print(f"❌ {package:20s} - {description} (未安装)")
 
     print()
@@ -269,6 +277,9 @@ def main():
         print(f"🎯 分析深度：{args.depth}")
         print(f"📤 输出文件：{args.output}")
         print(f"📄 输出格式：{args.format}")
+        print(f"⚙️  执行方式：{args.execution or '默认（settings.yaml）'}")
+        from src.execution_plan import compile_plan, describe_plan
+        print(describe_plan(compile_plan(args.depth)))
         print("\n✅ 配置检查完成，未发现错误\n")
         return 0
 
@@ -278,7 +289,8 @@ def main():
         dataset_path=args.dataset,
         depth=args.depth,
         output_path=args.output,
-        output_format=args.format
+        output_format=args.format,
+        execution_mode=args.execution
     )
 
     return 0 if result else 1
@@ -7,10 +7,21 @@ import pandas as pd
 import numpy as np
 from crewai import Agent
 from crewai.tools import tool
-from src.crew_config import create_llm
+from src.crew_config import create_agent_llm
+from src.tools.data_loader import load_dataset, get_dataset_columns
+from src.tools.dataset_profile import to_jsonable
+from src.tools.forecasting import forecast_dataset
+from src.tools.result_cache import memoize_result
+from src.tools.anomaly_detection import detect_anomalies_batch
+from src.tools.correlation_engine import STRONG_CORRELATION_THRESHOLD, correlation_matrix, correlation_pairs
+from src.tools.segment_analysis import analyze_segments as segment_analysis
+from src.tools.statistical_analyzer import MATRIX_MAX_COLUMNS, basic_statistics_from_profile, calculate_all_statistics
+from src.tools.stats_kernels import growth_rates, zscore_outliers
+from src.tools.trend_engine import RESAMPLE_FREQUENCIES, analyze_trends as trend_analysis, get_date_order, resample_sorted
 
 
 @tool
+@memoize_result("calculate_basic_stats")
 def calculate_basic_stats(file_path: str, column: str) -> dict:
     """
     计算基本统计量：均值、中位数、标准差、最小值、最大值
@@ -23,11 +34,20 @@ def calculate_basic_stats(file_path: str, column: str) -> dict:
         统计结果字典
     """
     try:
-        df = pd.read_csv(file_path)
-
-        if column not in df.columns:
+        if column not in get_dataset_columns(file_path):
             return {"error": f"列 '{column}' 不存在"}
 
+        # 优先使用数据集概要中的聚合量（追加写入后增量更新）
+        stats = basic_statistics_from_profile(file_path, column)
+        if stats is not None:
+            return {
+                "column": column,
+                "count": stats["non_null_count"],
+                **{key: stats[key] for key in ["mean", "median", "std", "min", "max", "q25", "q75"]}
+            }
+
+        # 只解析需要的列
+        df = load_dataset(file_path, columns=[column])
         series = df[column].dropna()
 
         return {
@@ -46,36 +66,97 @@ def calculate_basic_stats(file_path: str, column: str) -> dict:
 
 
 @tool
-def analyze_trend(file_path: str, column: str, date_column: str = None) -> dict:
+@memoize_result("calculate_all_stats")
+def calculate_all_stats(file_path: str, columns: list = None) -> dict:
     """
-    分析时间序列趋势
+    一次计算所有数值列的基本统计量：均值、中位数、标准差、最小值、最大值、分位数、偏度、峰度
+
+    多列数据应优先使用本工具，而不是逐列调用 calculate_basic_stats。
+    超大文件会自动逐块近似计算，此时结果带有 approximate 和 error_bounds，报告中应注明为近似值。
 
     Args:
         file_path: CSV 文件路径
-        column: 数值列名
+        columns: 要分析的列名列表（可选，默认全部数值列）
+
+    Returns:
+        {"statistics": {列名: 统计结果}, "skipped": 非数值列}
+    """
+    return to_jsonable(calculate_all_statistics(file_path, columns))
+
+
+@tool
+@memoize_result("analyze_segments")
+def analyze_segments(file_path: str, value_column: str, group_by: list, date_column: str = None) -> dict:
+    """
+    按维度分组分析指标（如按品类、地区、SKU）：每组的数量、合计、均值、标准差、最值、占比、
+    组内异常值个数，提供日期列时还包括每组的趋势
+
+    需要对比各分组时应使用本工具一次得到全部分组，而不是逐个分组筛选后调用其他工具。
+    只返回合计最高的 20 个分组，其余汇总在 others 中。
+
+    Args:
+        file_path: CSV 文件路径
+        value_column: 数值列名
+        group_by: 分组列名列表（一列或多列）
         date_column: 日期列名（可选）
 
     Returns:
-        趋势分析结果
+        分组分析结果
     """
     try:
-        df = pd.read_csv(file_path)
+        columns = get_dataset_columns(file_path)
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        for column in group_by + [value_column] + ([date_column] if date_column else []):
+            if column not in columns:
+                return {"error": f"列 '{column}' 不存在"}
+
+        return to_jsonable(segment_analysis(file_path, value_column, group_by, date_column=date_column))
+    except Exception as e:
+        return {"error": str(e)}
+
 
-        if column not in df.columns:
+@tool
+@memoize_result("analyze_trend")
+def analyze_trend(file_path: str, column: str, date_column: str = None, freq: str = None) -> dict:
+    """
+    分析时间序列趋势
+
+    Args:
+        file_path: CSV 文件路径
+        column: 数值列名
+        date_column: 日期列名（可选，提供时按日期排序后逐行分析）
+        freq: 重采样频率 D / W / M（可选，与 date_column 一起提供时按周期取均值后再分析）
+
+    Returns:
+        {"column", "trend", "average_growth_rate", "min_growth", "max_growth"}
+    """
+    try:
+        if column not in get_dataset_columns(file_path):
             return {"error": f"列 '{column}' 不存在"}
+        if freq and freq not in RESAMPLE_FREQUENCIES:
+            return {"error": f"不支持的重采样频率：{freq}"}
+
+        if date_column:
+            if date_column not in get_dataset_columns(file_path):
+                return {"error": f"日期列 '{date_column}' 不存在"}
+            # 有日期列时按日期排序（返回结构不变；多列、按周/月的趋势见 analyze_trends）
+            df = load_dataset(file_path, columns=[date_column, column])
+            order, dates = get_date_order(file_path, df, date_column)
+            values = df[column].to_numpy(dtype="float64", na_value=np.nan)[order]
+            if freq:
+                _, resampled = resample_sorted(dates, values[:, None], freq=freq, agg="mean")
+                values = resampled[:, 0][~np.isnan(resampled[:, 0])]
+        else:
+            # 只解析需要的列
+            df = load_dataset(file_path, columns=[column])
+            values = df[column].values
 
         # 计算增长率
-        values = df[column].values
         if len(values) < 2:
             return {"error": "数据不足，无法分析趋势"}
 
-        growth_rates = []
-        for i in range(1, len(values)):
-            if values[i-1] != 0:
-                rate = (values[i] - values[i-1]) / values[i-1] * 100
-                growth_rates.append(rate)
-
-        avg_growth = np.mean(growth_rates) if growth_rates else 0
+        rates = growth_rates(values)
+        avg_growth = rates.mean() if len(rates) else 0
 
         # 判断趋势
         if avg_growth > 1:
@@ -89,14 +170,80 @@ def analyze_trend(file_path: str, column: str, date_column: str = None) -> dict:
             "column": column,
             "trend": trend,
             "average_growth_rate": round(avg_growth, 2),
-            "min_growth": round(min(growth_rates), 2) if growth_rates else 0,
-            "max_growth": round(max(growth_rates), 2) if growth_rates else 0
+            "min_growth": round(rates.min(), 2) if len(rates) else 0,
+            "max_growth": round(rates.max(), 2) if len(rates) else 0
         }
     except Exception as e:
         return {"error": str(e)}
 
 
 @tool
+@memoize_result("analyze_trends")
+def analyze_trends(file_path: str, columns: list, date_column: str, freq: str = "D") -> dict:
+    """
+    按日期重采样后一次分析多个数值列的趋势：平均环比增长率、首尾总增长、移动平均、
+    最近 7 个周期与之前 7 个周期的对比，数据超过一年时还包括同比增长
+
+    多列趋势应优先使用本工具，而不是逐列调用 analyze_trend。
+
+    Args:
+        file_path: CSV 文件路径
+        columns: 数值列名列表
+        date_column: 日期列名
+        freq: 重采样频率：D（日）、W（周）、M（月）
+
+    Returns:
+        {"periods", "analysis_period", "trends": {列名: 趋势结果}}
+    """
+    try:
+        available = get_dataset_columns(file_path)
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        for column in columns + [date_column]:
+            if column not in available:
+                return {"error": f"列 '{column}' 不存在"}
+
+        return to_jsonable(trend_analysis(file_path, columns, date_column, freq=freq))
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@tool
+@memoize_result("forecast_series")
+def forecast_series(file_path: str, columns: list, date_column: str, horizon: int = 3, freq: str = "D",
+                    group_by: list = None) -> dict:
+    """
+    本地数值预测：按日期重采样后用 Holt-Winters / Holt 指数平滑（数据不足时直线外推）预测未来若干周期，
+    给出 95% 预测区间。结果确定、可复现，不需要调用 PandaAI。
+
+    提供 group_by 时每个分组单独预测（一次最多 500 条序列，按合计保留最大的分组）。
+
+    Args:
+        file_path: CSV 文件路径
+        columns: 要预测的数值列名列表
+        date_column: 日期列名
+        horizon: 预测周期数
+        freq: 重采样频率：D（日）、W（周）、M（月）
+        group_by: 分组列名列表（可选）
+
+    Returns:
+        {"method", "forecast_periods", "series": [{"column", "last_value", "forecast", "lower", "upper"}, ...]}
+    """
+    try:
+        available = get_dataset_columns(file_path)
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        for column in columns + [date_column] + group_by:
+            if column not in available:
+                return {"error": f"列 '{column}' 不存在"}
+
+        return to_jsonable(forecast_dataset(file_path, columns, date_column, horizon=horizon, freq=freq,
+                                            group_by=group_by or None))
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@tool
+@memoize_result("calculate_correlation")
 def calculate_correlation(file_path: str, columns: list) -> dict:
     """
     计算列之间的相关性
@@ -109,7 +256,13 @@ def calculate_correlation(file_path: str, columns: list) -> dict:
         相关性矩阵
     """
     try:
-        df = pd.read_csv(file_path)
+        available = set(get_dataset_columns(file_path))
+        missing_cols = [col for col in columns if col not in available]
+        if missing_cols:
+            return {"error": f"列 {missing_cols} 不存在"}
+
+        # 只解析需要的列
+        df = load_dataset(file_path, columns=columns)
 
         # 筛选数值列
         numeric_cols = df[columns].select_dtypes(include=[np.number]).columns.tolist()
@@ -117,33 +270,27 @@ def calculate_correlation(file_path: str, columns: list) -> dict:
         if len(numeric_cols) < 2:
             return {"error": "需要至少 2 个数值列"}
 
-        corr_matrix = df[numeric_cols].corr()
+        # 分块计算，只提取强相关列对（|r| >= 阈值，与 total_strong_correlations 同一判定），列数较少时才返回完整矩阵
+        screened = correlation_pairs(df[numeric_cols], threshold=STRONG_CORRELATION_THRESHOLD, top_k=50)
+        strong_correlations = [
+            {"col1": col1, "col2": col2, "correlation": round(corr_val, 3)}
+            for col1, col2, corr_val in screened["pairs"]
+        ]
 
-        # 找出强相关关系
-        strong_correlations = []
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i+1, len(corr_matrix.columns)):
-                col1 = corr_matrix.columns[i]
-                col2 = corr_matrix.columns[j]
-                corr_val = corr_matrix.iloc[i, j]
-
-                if abs(corr_val) > 0.7:  # 强相关阈值
-                    strong_correlations.append({
-                        "col1": col1,
-                        "col2": col2,
-                        "correlation": round(corr_val, 3)
-                    })
-
-        return {
+        result = {
             "columns": numeric_cols,
-            "correlation_matrix": corr_matrix.to_dict(),
-            "strong_correlations": strong_correlations
+            "strong_correlations": strong_correlations,
+            "total_strong_correlations": screened["total_pairs"]
         }
+        if len(numeric_cols) <= MATRIX_MAX_COLUMNS:
+            result["correlation_matrix"] = correlation_matrix(df[numeric_cols]).to_dict()
+        return result
     except Exception as e:
         return {"error": str(e)}
 
 
 @tool
+@memoize_result("detect_anomalies")
 def detect_anomalies(file_path: str, column: str, threshold: float = 2.0) -> list:
     """
     检测异常值（使用标准差法）
@@ -157,30 +304,54 @@ def detect_anomalies(file_path: str, column: str, threshold: float = 2.0) -> lis
         异常值列表
     """
     try:
-        df = pd.read_csv(file_path)
-
-        if column not in df.columns:
+        if column not in get_dataset_columns(file_path):
             return [{"error": f"列 '{column}' 不存在"}]
 
+        # 只解析需要的列
+        df = load_dataset(file_path, columns=[column])
+
         series = df[column].dropna()
-        mean = series.mean()
-        std = series.std()
-
-        anomalies = []
-        for idx, value in series.items():
-            z_score = (value - mean) / std if std > 0 else 0
-            if abs(z_score) > threshold:
-                anomalies.append({
-                    "index": int(idx),
-                    "value": float(value),
-                    "z_score": round(z_score, 2)
-                })
-
-        return anomalies
+        values = series.to_numpy(dtype="float64")
+        positions, z = zscore_outliers(values, threshold)
+
+        return [
+            {"index": int(idx), "value": float(value), "z_score": round(float(z_score), 2)}
+            for idx, value, z_score in zip(series.index[positions], values[positions], z[positions])
+        ]
     except Exception as e:
         return [{"error": str(e)}]
 
 
+@tool
+@memoize_result("scan_anomalies")
+def scan_anomalies(file_path: str, columns: list = None, method: str = "mad", threshold: float = None) -> dict:
+    """
+    一次检测多个数值列的异常值，返回紧凑的异常值表（按异常分数降序，最多 50 行）
+
+    多列检测应优先使用本工具，而不是逐列调用 detect_anomalies。
+    方法：
+    - mad（默认）：基于中位数绝对偏差，对极端值稳健，阈值 3.5
+    - zscore：标准差法，阈值 3.0
+    - iqr：四分位距法，阈值为 IQR 倍数 1.5
+    - rolling_zscore：相对前 30 个值的 z 分数，适用于有趋势的时间序列，阈值 3.0
+    - mahalanobis：多列联合的马氏距离，发现单列看不出的异常组合
+    - isolation_forest：孤立森林，多列联合，分数 0~1，阈值 0.6
+
+    Args:
+        file_path: CSV 文件路径
+        columns: 要检测的列名列表（可选，默认全部数值列）
+        method: 检测方法
+        threshold: 分数阈值（可选，默认按方法选择）
+
+    Returns:
+        {"total_anomalies", "anomaly_rate", "per_column", "table": {"columns", "rows"}, ...}
+    """
+    try:
+        return to_jsonable(detect_anomalies_batch(file_path, columns, method=method, threshold=threshold))
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @tool
 def generate_chart_config(chart_type: str, x_column: str, y_column: str) -> dict:
     """
@@ -210,29 +381,43 @@ def generate_chart_config(chart_type: str, x_column: str, y_column: str) -> dict
     }
 
 
-# Analyst Agent（支持自定义 LLM）
-analyst = Agent(
-    role="数据分析专家",
-    goal="对数据集进行深入的统计分析，计算关键指标，识别趋势和模式",
-    backstory="""你是一位专业的数据科学家，擅长使用 Python 进行数据分析。
-    你能够：
-    - 计算各种统计量（均值、中位数、标准差、分位数等）
-    - 分析时间序列数据的趋势和周期性
-    - 检测异常值和离群点
-    - 计算变量之间的相关性
-    - 生成清晰的统计报告
-    - 创建数据可视化图表
-
-    你总是基于数据和统计事实得出结论，而不是凭空猜测。
-    你能够清楚地解释分析结果的业务含义。""",
-    verbose=True,
-    allow_delegation=False,
-    llm=create_llm(),  # 使用可配置的 LLM
-    tools=[
-        calculate_basic_stats,
-        analyze_trend,
-        calculate_correlation,
-        detect_anomalies,
-        generate_chart_config
-    ]
-)
+def create_analyst() -> Agent:
+    """创建统计分析 Agent（支持自定义 LLM）"""
+    return Agent(
+        role="数据分析专家",
+        goal="对数据集进行深入的统计分析，计算关键指标，识别趋势和模式",
+        backstory="""你是一位专业的数据科学家，擅长使用 Python 进行数据分析。
+        你能够：
+        - 计算各种统计量（均值、中位数、标准差、分位数等）
+        - 分析时间序列数据的趋势和周期性
+        - 检测异常值和离群点
+        - 计算变量之间的相关性
+        - 生成清晰的统计报告
+        - 创建数据可视化图表
+
+        你总是基于数据和统计事实得出结论，而不是凭空猜测。
+        你能够清楚地解释分析结果的业务含义。""",
+        verbose=True,
+        allow_delegation=False,
+        llm=create_agent_llm(),  # 使用可配置的 LLM（带响应缓存）
+        tools=[
+            calculate_all_stats,
+            calculate_basic_stats,
+            analyze_segments,
+            analyze_trends,
+            analyze_trend,
+            forecast_series,
+            calculate_correlation,
+            scan_anomalies,
+            detect_anomalies,
+            generate_chart_config
+        ]
+    )
+
+
+def __getattr__(name: str):
+    # 兼容 from src.agents.analyst_v2 import analyst：第一次访问时通过注册表创建
+    if name == "analyst":
+        from src.agents.registry import get_agent
+        return get_agent("analyst")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
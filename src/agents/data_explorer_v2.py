@@ -7,7 +7,10 @@ import pandas as pd
 import numpy as np
 from crewai import Agent
 from crewai.tools import tool
-from src.crew_config import create_llm
+from src.crew_config import create_agent_llm
+from src.tools.dataset_profile import get_profile, quality_score
+from src.tools.duplicates import count_duplicates
+from src.tools.row_index import get_row_index, read_rows
 
 
 @tool
@@ -22,22 +25,25 @@ def read_csv_dataset(file_path: str) -> dict:
         包含数据信息的字典（不包含全量数据，避免 Prompt 超长）
     """
     try:
-        df = pd.read_csv(file_path)
+        # 从数据集概要读取（每个数据集版本只扫描一次）
+        profile = get_profile(file_path)
+        rows = profile["shape"][0]
+        missing = profile["null_counts"]
 
         # 只返回统计信息和预览，不返回全量数据
         return {
             "success": True,
             "file_path": file_path,
-            "shape": df.shape,
-            "columns": list(df.columns),
-            "dtypes": df.dtypes.to_dict(),
-            "memory_usage_mb": df.memory_usage(deep=True).sum() / 1024 / 1024,
-            "preview": df.head(10).to_dict(orient='records'),  # 只返回前 10 行
-            "missing_values": df.isnull().sum().to_dict(),
-            "missing_percentage": (df.isnull().sum() / len(df) * 100).to_dict(),
-            "sample_size": min(10, len(df)),
+            "shape": tuple(profile["shape"]),
+            "columns": profile["columns"],
+            "dtypes": profile["dtypes"],
+            "memory_usage_mb": profile["memory_mb"],
+            "preview": profile["preview"][:10],  # 只返回前 10 行
+            "missing_values": missing,
+            "missing_percentage": {col: (count / rows * 100 if rows else 0.0) for col, count in missing.items()},
+            "sample_size": min(10, rows),
             # 只返回数值列的统计信息，不返回原始数据
-            "numeric_stats": df.describe().to_dict() if len(df.select_dtypes(include=[np.number]).columns) > 0 else {}
+            "numeric_stats": profile["describe"]
         }
     except Exception as e:
         return {
@@ -47,44 +53,52 @@ def read_csv_dataset(file_path: str) -> dict:
 
 
 @tool
-def check_data_quality(file_path: str) -> dict:
+def check_data_quality(file_path: str, key_columns: list = None) -> dict:
     """
     检查数据质量
 
     Args:
         file_path: CSV 文件路径
+        key_columns: 判断重复记录时使用的关键列（可选，默认整行相同才算重复）
 
     Returns:
         数据质量报告
     """
     try:
-        df = pd.read_csv(file_path)
+        profile = get_profile(file_path)
+        rows, cols = profile["shape"]
 
-        # 计算重复行
-        duplicate_count = df.duplicated().sum()
+        duplicate_count = int(profile["duplicates"])
+        if key_columns:
+            missing_cols = [col for col in key_columns if col not in profile["columns"]]
+            if missing_cols:
+                return {"success": False, "error": f"列 {missing_cols} 不存在"}
+            # 按关键列逐块统计，只解析关键列
+            duplicate_count = count_duplicates(file_path, subset=list(key_columns))["duplicates"]
 
         # 计算缺失值
-        missing_values = df.isnull().sum().to_dict()
-        missing_percentage = (df.isnull().sum() / len(df) * 100).to_dict()
+        missing_values = profile["null_counts"]
+        missing_percentage = {col: (count / rows * 100 if rows else 0.0) for col, count in missing_values.items()}
 
         # 计算质量评分
-        total_cells = df.shape[0] * df.shape[1]
-        missing_cells = df.isnull().sum().sum()
-        quality_score = "A" if missing_cells / total_cells < 0.01 else "B" if missing_cells / total_cells < 0.05 else "C"
+        total_cells = rows * cols
+        missing_cells = sum(missing_values.values())
 
         return {
             "success": True,
             "file_path": file_path,
-            "total_records": len(df),
-            "total_columns": len(df.columns),
+            "total_records": rows,
+            "total_columns": cols,
             "missing_values": missing_values,
             "missing_percentage": missing_percentage,
-            "duplicate_count": int(duplicate_count),
-            "data_types": df.dtypes.to_dict(),
-            "quality_score": quality_score,
+            "duplicate_count": duplicate_count,
+            "duplicate_key_columns": key_columns,
+            "data_types": profile["dtypes"],
+            "quality_score": quality_score(profile),
             "total_cells": total_cells,
             "missing_cells": int(missing_cells),
-            "completeness": f"{(1 - missing_cells / total_cells) * 100:.2f}%"
+            # 空数据集没有缺失单元格，完整度记为 100%
+            "completeness": f"{(1 - missing_cells / total_cells) * 100 if total_cells else 100.0:.2f}%"
         }
     except Exception as e:
         return {
@@ -105,19 +119,19 @@ def generate_data_summary(file_path: str) -> str:
         Markdown 格式的数据概览
     """
     try:
-        df = pd.read_csv(file_path)
+        profile = get_profile(file_path)
 
-        rows, cols = df.shape
-        columns = list(df.columns)
-        dtypes = df.dtypes.to_dict()
-        missing = df.isnull().sum().to_dict()
+        rows, cols = profile["shape"]
+        columns = profile["columns"]
+        dtypes = profile["dtypes"]
+        missing = profile["null_counts"]
 
         summary = f"""# 📊 数据集概览
 
 ## 基本信息
 - **文件路径**: {file_path}
 - **数据规模**: {rows:,} 行 × {cols} 列
-- **内存占用**: {df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB
+- **内存占用**: {profile["memory_mb"]:.2f} MB
 
 ## 字段列表
 """
@@ -131,17 +145,20 @@ def generate_data_summary(file_path: str) -> str:
                 summary += f" (缺失: {miss:,} ({miss/rows*100:.1f}%))"
             summary += "\n"
 
-        # 添加预览
-        preview_rows = min(5, len(df))
+        # 添加预览（文本数据集通过行索引直接读取前几行）
+        preview = profile["preview"]
+        if get_row_index(file_path) is not None:
+            preview = read_rows(file_path, 0, 5).to_dict(orient='records')
+        preview_rows = min(5, len(preview))
         summary += f"\n## 📋 数据预览（前 {preview_rows} 行）\n\n"
 
         for i in range(preview_rows):
-            row = df.iloc[i]
+            row = preview[i]
             summary += f"**行 {i+1}:**\n"
             for col in columns[:5]:  # 只显示前 5 列
-                val = row[col]
+                val = row.get(str(col))
                 # 处理 NaN 和长字符串
-                if pd.isna(val):
+                if val is None or pd.isna(val):
                     val = "NaN"
                 elif isinstance(val, str) and len(val) > 50:
                     val = val[:47] + "..."
@@ -154,19 +171,28 @@ def generate_data_summary(file_path: str) -> str:
         return f"❌ 数据读取失败，无法生成概览: {str(e)}"
 
 
-# Data Explorer Agent（支持自定义 LLM）
-data_explorer = Agent(
-    role="数据探索专家",
-    goal="探索和理解数据集结构，检查数据质量，生成概览报告",
-    backstory="""你是一位经验丰富的数据分析师，擅长快速理解数据集的结构和特征。
-    你能够：
-    - 读取各种格式的数据集（CSV、JSON、Excel）
-    - 分析数据类型和结构
-    - 检测数据质量问题（缺失值、异常值、重复值）
-    - 生成清晰的数据概览报告
-    - 为后续分析提供必要的数据洞察""",
-    verbose=True,
-    allow_delegation=False,
-    llm=create_llm(),  # 使用可配置的 LLM
-    tools=[read_csv_dataset, check_data_quality, generate_data_summary]
-)
+def create_data_explorer() -> Agent:
+    """创建数据探索 Agent（支持自定义 LLM）"""
+    return Agent(
+        role="数据探索专家",
+        goal="探索和理解数据集结构，检查数据质量，生成概览报告",
+        backstory="""你是一位经验丰富的数据分析师，擅长快速理解数据集的结构和特征。
+        你能够：
+        - 读取各种格式的数据集（CSV、JSON、Excel）
+        - 分析数据类型和结构
+        - 检测数据质量问题（缺失值、异常值、重复值）
+        - 生成清晰的数据概览报告
+        - 为后续分析提供必要的数据洞察""",
+        verbose=True,
+        allow_delegation=False,
+        llm=create_agent_llm(),  # 使用可配置的 LLM（带响应缓存）
+        tools=[read_csv_dataset, check_data_quality, generate_data_summary]
+    )
+
+
+def __getattr__(name: str):
+    # 兼容 from src.agents.data_explorer_v2 import data_explorer：第一次访问时通过注册表创建
+    if name == "data_explorer":
+        from src.agents.registry import get_agent
+        return get_agent("data_explorer")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,10 +4,14 @@ PandaAI Agent - 真正集成 pandasai 库
 """
 import os
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from crewai import Agent
 from crewai.tools import tool
 from dotenv import load_dotenv
+from src.settings import get_setting
+from src.tools.data_loader import load_bounded_dataset
+from src.tools.dataset_profile import get_profile
+from src.tools.forecasting import detect_date_column, forecast_dataset, parse_forecast_question
 
 load_dotenv()
 
@@ -35,10 +39,23 @@ except ImportError:
 class RealPandaAI:
     """真正的 PandaAI 集成 (支持 pandasai 2.x)"""
 
-    def __init__(self):
+    def __init__(self, sample_threshold: Optional[int] = None, sample_size: Optional[int] = None):
         if not PANDAAI_AVAILABLE:
             raise ImportError("pandasai 未安装, 请运行: pip install pandasai")
 
+        # 超过 sample_threshold 行的数据集只把 sample_size 行的随机样本交给 PandaAI,
+        # 保证 LLM 生成的代码始终在有界的数据上运行
+        self.sample_threshold = int(
+            sample_threshold
+            or os.getenv("PANDAAI_SAMPLE_THRESHOLD")
+            or get_setting("data.max_rows", 100000)
+        )
+        self.sample_size = int(
+            sample_size
+            or os.getenv("PANDAAI_SAMPLE_SIZE")
+            or get_setting("data.sample_size", 1000)
+        )
+
         # 初始化 LLM 配置
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
@@ -68,6 +85,39 @@ class RealPandaAI:
             print(f"⚠️  PandaAI LLM 创建失败: {e}, 将使用环境变量")
             self.llm = None
 
+    def load_dataframe(self, file_path: str) -> Tuple[pd.DataFrame, int]:
+        """
+        读取数据文件, 超过阈值时单次流式采样得到有界样本
+
+        Args:
+            file_path: 数据文件路径
+
+        Returns:
+            (交给 PandaAI 的 DataFrame 副本, 数据集总行数)
+        """
+        df, total_rows = load_bounded_dataset(
+            file_path,
+            max_rows=self.sample_threshold,
+            sample_size=self.sample_size
+        )
+        # PandaAI 执行 LLM 生成的代码, 可能原地修改数据, 因此使用副本
+        return df.copy(), total_rows
+
+    def _bound(self, df: pd.DataFrame) -> pd.DataFrame:
+        """内存中的 DataFrame 超过阈值时随机采样"""
+        if len(df) <= self.sample_threshold:
+            return df
+        return df.sample(n=min(self.sample_size, len(df)), random_state=42).sort_index()
+
+    def _smart_dataframe(self, df: pd.DataFrame) -> "SmartDataframe":
+        """创建 SmartDataframe (自动限制数据规模)"""
+        df = self._bound(df)
+        if self.llm:
+            from pandasai.schemas.df_config import Config
+            return SmartDataframe(df, config=Config(llm=self.llm))
+        # 使用环境变量配置
+        return SmartDataframe(df)
+
     def chat(self, df: pd.DataFrame, question: str) -> str:
         """
         使用 PandaAI 进行智能问答
@@ -81,13 +131,7 @@ class RealPandaAI:
         """
         try:
             # 使用 SmartDataframe (pandasai 2.x)
-            if self.llm:
-                from pandasai.schemas.df_config import Config
-                config = Config(llm=self.llm)
-                sdf = SmartDataframe(df, config=config)
-            else:
-                # 使用环境变量配置
-                sdf = SmartDataframe(df)
+            sdf = self._smart_dataframe(df)
             result = sdf.chat(question)
             return str(result)
         except Exception as e:
@@ -116,7 +160,7 @@ class RealPandaAI:
 
         try:
             # 使用 SmartDataframe 生成图表
-            sdf = SmartDataframe(df)
+            sdf = self._smart_dataframe(df)
             result = sdf.chat(prompt)
             return {
                 "type": chart_type,
@@ -148,7 +192,7 @@ class RealPandaAI:
 
             # 使用 PandaAI 清洗数据
             prompt = "请清洗这个数据集:处理缺失值、去除重复值、纠正异常值"
-            sdf = SmartDataframe(df)
+            sdf = self._smart_dataframe(df)
             result = sdf.chat(prompt)
 
             # 如果返回的是 DataFrame
@@ -190,7 +234,7 @@ class RealPandaAI:
 
         try:
             # 创建 SmartDataframe
-            sdf = SmartDataframe(df)
+            sdf = self._smart_dataframe(df)
 
             # 1. 数据概览洞察
             prompt = "分析这个数据集的整体特征, 包括: 数据分布、异常值、相关性"
@@ -231,7 +275,7 @@ class RealPandaAI:
         """
         try:
             prompt = f"基于这个数据集的历史数据,预测未来 {periods} 个周期的趋势,包括预测值和置信区间"
-            sdf = SmartDataframe(df)
+            sdf = self._smart_dataframe(df)
             result = sdf.chat(prompt)
 
             return {
@@ -258,7 +302,7 @@ class RealPandaAI:
         """
         try:
             prompt = "请生成这个数据集的详细摘要,包括:统计特征、数据类型、质量评估"
-            sdf = SmartDataframe(df)
+            sdf = self._smart_dataframe(df)
             result = sdf.chat(prompt)
 
             return {
@@ -288,6 +332,46 @@ def get_pandaai() -> RealPandaAI:
     return _pandaai_instance
 
 
+def _sample_note(df: pd.DataFrame, total_rows: int) -> str:
+    """数据被采样时, 在结果前注明样本规模"""
+    if len(df) >= total_rows:
+        return ""
+    return f"ℹ️  数据集共 {total_rows:,} 行, PandaAI 基于 {len(df):,} 行随机样本分析\n\n"
+
+
+def local_forecast(file_path: str, periods: int = 3, freq: Optional[str] = None) -> Optional[str]:
+    """
+    本地数值预测 (不经过 LLM, 结果可复现)
+
+    自动识别日期列, 对所有数值列按日期重采样后预测.
+
+    Returns:
+        格式化的预测结果; 找不到日期列或数值列时返回 None (由调用方回退到 PandaAI)
+    """
+    date_column = detect_date_column(file_path)
+    value_columns = [col for col in get_profile(file_path)["numeric_columns"] if col != date_column]
+    if date_column is None or not value_columns:
+        return None
+
+    result = forecast_dataset(file_path, value_columns, date_column, horizon=periods, freq=freq)
+    if "error" in result:
+        return None
+
+    lines = [
+        f"📈 趋势预测 (本地 {result['method']} 模型, {int(result['level'] * 100)}% 预测区间)",
+        f"日期列:{date_column}, 重采样频率:{result['freq']}, 历史周期数:{result['history_periods']}",
+        f"预测周期:{', '.join(result['forecast_periods'])}"
+    ]
+    for series in result["series"]:
+        points = ", ".join(
+            f"{value:.2f}" + (f" [{low:.2f}, {high:.2f}]" if low is not None and high is not None else "")
+            for value, low, high in zip(series["forecast"], series["lower"], series["upper"])
+            if value is not None
+        )
+        lines.append(f"- {series['column']}(最近值 {series['last_value']}):{points}")
+    return "\n".join(lines)
+
+
 # ========================================
 # CrewAI Tools (使用真实的 PandaAI)
 # ========================================
@@ -304,19 +388,29 @@ def pandaai_chat(question: str, file_path: str) -> str:
     Returns:
         PandaAI 的回答
     """
+    # 单纯的预测问题使用本地数值预测, 不经过 LLM
+    forecast_question = parse_forecast_question(question)
+    if forecast_question is not None:
+        try:
+            report = local_forecast(file_path, forecast_question["horizon"], forecast_question["freq"])
+            if report is not None:
+                return report
+        except Exception as e:
+            print(f"⚠️  本地预测失败, 改用 PandaAI: {e}")
+
     if not PANDAAI_AVAILABLE:
         return "⚠️  pandasai 未安装, 无法使用此功能. 请运行: pip install pandasai"
 
     try:
         # 直接从文件读取数据,避免将全量数据放入 prompt
-        df = pd.read_csv(file_path)
+        pandaai = get_pandaai()
+        df, total_rows = pandaai.load_dataframe(file_path)
 
         if df.empty:
             return "❌ 数据为空"
 
-        pandaai = get_pandaai()
         result = pandaai.chat(df, question)
-        return result
+        return _sample_note(df, total_rows) + result
 
     except Exception as e:
         return f"❌ PandaAI 问答失败: {str(e)}"
@@ -337,11 +431,11 @@ def pandaai_clean_data(file_path: str) -> str:
         return "⚠️  pandasai 未安装"
 
     try:
-        df = pd.read_csv(file_path)
         pandaai = get_pandaai()
+        df, total_rows = pandaai.load_dataframe(file_path)
         result = pandaai.clean_data(df)
 
-        return f"""✅ 数据清洗完成
+        return _sample_note(df, total_rows) + f"""✅ 数据清洗完成
 - 原始行数:{result.get('original_rows', 0)}
 - 清洗后行数:{result.get('cleaned_rows', 0)}
 - 删除重复行:{result.get('removed_rows', 0)}
@@ -366,11 +460,11 @@ def pandaai_analyze_patterns(file_path: str) -> str:
         return "⚠️  pandasai 未安装"
 
     try:
-        df = pd.read_csv(file_path)
         pandaai = get_pandaai()
+        df, total_rows = pandaai.load_dataframe(file_path)
         insights = pandaai.analyze_patterns(df)
 
-        return "\n\n".join(insights)
+        return _sample_note(df, total_rows) + "\n\n".join(insights)
     except Exception as e:
         return f"❌ 模式分析失败: {str(e)}"
 
@@ -378,7 +472,10 @@ def pandaai_analyze_patterns(file_path: str) -> str:
 @tool
 def pandaai_predict_trend(file_path: str, periods: int = 3) -> str:
     """
-    使用 PandaAI 预测未来趋势
+    预测未来趋势
+
+    数据集有日期列时使用本地 Holt-Winters / Holt 模型预测 (确定、可复现, 带预测区间),
+    否则使用 PandaAI.
 
     Args:
         file_path: 数据文件路径
@@ -387,16 +484,23 @@ def pandaai_predict_trend(file_path: str, periods: int = 3) -> str:
     Returns:
         趋势预测结果
     """
+    try:
+        report = local_forecast(file_path, periods)
+        if report is not None:
+            return report
+    except Exception as e:
+        print(f"⚠️  本地预测失败, 改用 PandaAI: {e}")
+
     if not PANDAAI_AVAILABLE:
         return "⚠️  pandasai 未安装"
 
     try:
-        df = pd.read_csv(file_path)
         pandaai = get_pandaai()
+        df, total_rows = pandaai.load_dataframe(file_path)
         prediction = pandaai.predict_future(df, periods)
 
         if prediction.get('success'):
-            return f"""📈 PandaAI 趋势预测
+            return _sample_note(df, total_rows) + f"""📈 PandaAI 趋势预测
 预测周期:{periods}
 预测结果:
 {prediction.get('prediction', 'N/A')[:500]}..."""
@@ -422,12 +526,12 @@ def pandaai_generate_chart(file_path: str, chart_type: str = "line") -> str:
         return "⚠️  pandasai 未安装"
 
     try:
-        df = pd.read_csv(file_path)
         pandaai = get_pandaai()
+        df, total_rows = pandaai.load_dataframe(file_path)
         chart = pandaai.generate_chart(df, chart_type)
 
         if chart.get('success'):
-            return f"""📊 图表生成成功
+            return _sample_note(df, total_rows) + f"""📊 图表生成成功
 类型:{chart_type}
 结果:{chart.get('result', 'N/A')[:500]}..."""
         else:
@@ -451,12 +555,12 @@ def pandaai_data_summary(file_path: str) -> str:
         return "⚠️  pandasai 未安装"
 
     try:
-        df = pd.read_csv(file_path)
         pandaai = get_pandaai()
+        df, total_rows = pandaai.load_dataframe(file_path)
         summary = pandaai.get_data_summary(df)
 
-        return f"""📊 PandaAI 数据摘要
-数据规模: {summary.get('shape', 'Unknown')}
+        return _sample_note(df, total_rows) + f"""📊 PandaAI 数据摘要
+数据规模: ({total_rows}, {len(df.columns)})
 字段列表: {', '.join(summary.get('columns', []))}
 摘要信息:
 {summary.get('summary', 'N/A')[:500]}..."""
@@ -470,30 +574,10 @@ def pandaai_data_summary(file_path: str) -> str:
 
 def create_pandaai_agent():
     """创建 PandaAI Agent (支持自定义 LLM 配置)"""
-    # 获取 LLM 配置
-    from langchain_openai import ChatOpenAI
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    base_url = os.getenv("OPENAI_BASE_URL")
-    model = os.getenv("OPENAI_MODEL", "gpt-4")
+    # 与其他 Agent 使用同一个 LLM 工厂 (自定义 base_url、响应缓存)
+    from src.crew_config import create_agent_llm
 
-    if not api_key:
-        raise ValueError("需要设置 OPENAI_API_KEY 环境变量")
-
-    # 创建 LLM(支持自定义 base_url)
-    llm_kwargs = {
-        "model": model,
-        "temperature": 0.7,
-        "max_tokens": 4096
-    }
-
-    if base_url:
-        llm_kwargs["base_url"] = base_url
-
-    llm = ChatOpenAI(
-        api_key=api_key,
-        **llm_kwargs
-    )
+    llm = create_agent_llm()
 
     # 创建 Agent
     pandaai_agent = Agent(
@@ -527,5 +611,9 @@ def create_pandaai_agent():
     return pandaai_agent
 
 
-# 导出 Agent
-pandaai_agent = create_pandaai_agent()
+def __getattr__(name: str):
+    # 兼容 from src.agents.pandaai_real import pandaai_agent：第一次访问时通过注册表创建
+    if name == "pandaai_agent":
+        from src.agents.registry import get_agent
+        return get_agent("pandaai_agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
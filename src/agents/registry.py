@@ -0,0 +1,61 @@
+"""
+Agent 注册表 - 第一次使用时才创建 Agent
+
+Agent 模块导入时会加载 crewai / langchain / pandasai，创建 Agent 时还需要 API Key。
+注册表只记录 Agent 名称对应的模块和工厂函数，get_agent() 第一次调用时才导入模块、
+创建 Agent，之后在进程内复用同一个实例。
+
+因此 main_v2.py --help / --check-env / --dry-run 和 Web 服务启动都不会加载这些依赖。
+"""
+import importlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Agent 名称 -> (模块, 工厂函数)
+AGENT_FACTORIES: Dict[str, Tuple[str, str]] = {
+    "data_explorer": ("src.agents.data_explorer_v2", "create_data_explorer"),
+    "analyst": ("src.agents.analyst_v2", "create_analyst"),
+    "pandaai_agent": ("src.agents.pandaai_real", "create_pandaai_agent"),
+    "reporter": ("src.agents.reporter_v2", "create_reporter")
+}
+
+_agents: Dict[str, Any] = {}
+_agents_lock = threading.RLock()
+
+
+def get_agent(name: str) -> Any:
+    """
+    获取 Agent（第一次调用时导入模块并创建）
+
+    Args:
+        name: Agent 名称（见 AGENT_FACTORIES）
+
+    Returns:
+        crewai Agent 实例
+    """
+    if name not in AGENT_FACTORIES:
+        raise KeyError(f"未知的 Agent：{name}（可选：{list(AGENT_FACTORIES)}）")
+    with _agents_lock:
+        if name not in _agents:
+            module_name, factory_name = AGENT_FACTORIES[name]
+            factory = getattr(importlib.import_module(module_name), factory_name)
+            _agents[name] = factory()
+        return _agents[name]
+
+
+def get_agents(names: Optional[List[str]] = None) -> List[Any]:
+    """按顺序获取多个 Agent（默认全部）"""
+    return [get_agent(name) for name in (names or list(AGENT_FACTORIES))]
+
+
+def loaded_agents() -> List[str]:
+    """已经创建的 Agent 名称"""
+    with _agents_lock:
+        return list(_agents)
+
+
+def reset_agents() -> None:
+    """丢弃已创建的 Agent（如修改了 LLM 配置），下次使用时重新创建"""
+    with _agents_lock:
+        _agents.clear()
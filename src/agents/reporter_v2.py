@@ -7,7 +7,7 @@ from datetime import datetime
 from pathlib import Path
 from crewai import Agent
 from crewai.tools import tool
-from src.crew_config import create_llm
+from src.crew_config import create_agent_llm
 
 
 @tool
@@ -213,28 +213,37 @@ def generate_executable_summary(analysis_goal: str = "", key_findings: list = No
     return summary
 
 
-# Reporter Agent（支持自定义 LLM）
-reporter = Agent(
-    role="报告生成专家",
-    goal="整合所有分析结果，生成清晰、结构化的专业报告",
-    backstory="""你是一位专业的商业分析师和报告撰写专家。
-    你能够：
-    - 整合多个来源的分析结果
-    - 提取关键信息和洞察
-    - 生成结构化、易读的报告
-    - 创建可执行的建议和行动计划
-    - 适应不同受众的需求（执行层、管理层、战略层）
-
-    你总是能够将复杂的数据分析转化为清晰的业务语言，
-    并提供可行动的建议。你的报告既有数据支撑，又有战略眼光。""",
-    verbose=True,
-    allow_delegation=False,
-    llm=create_llm(),  # 使用可配置的 LLM
-    tools=[
-        compile_summary,
-        format_report_markdown,
-        format_report_json,
-        save_report,
-        generate_executable_summary
-    ]
-)
+def create_reporter() -> Agent:
+    """创建报告生成 Agent（支持自定义 LLM）"""
+    return Agent(
+        role="报告生成专家",
+        goal="整合所有分析结果，生成清晰、结构化的专业报告",
+        backstory="""你是一位专业的商业分析师和报告撰写专家。
+        你能够：
+        - 整合多个来源的分析结果
+        - 提取关键信息和洞察
+        - 生成结构化、易读的报告
+        - 创建可执行的建议和行动计划
+        - 适应不同受众的需求（执行层、管理层、战略层）
+
+        你总是能够将复杂的数据分析转化为清晰的业务语言，
+        并提供可行动的建议。你的报告既有数据支撑，又有战略眼光。""",
+        verbose=True,
+        allow_delegation=False,
+        llm=create_agent_llm(),  # 使用可配置的 LLM（带响应缓存）
+        tools=[
+            compile_summary,
+            format_report_markdown,
+            format_report_json,
+            save_report,
+            generate_executable_summary
+        ]
+    )
+
+
+def __getattr__(name: str):
+    # 兼容 from src.agents.reporter_v2 import reporter：第一次访问时通过注册表创建
+    if name == "reporter":
+        from src.agents.registry import get_agent
+        return get_agent("reporter")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,28 +2,24 @@
 LLM 配置工厂 - 支持自定义 base_url 和模型
 """
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai import LLM
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
+from src.http_client import get_http_client
+from src.llm_cache import LLMResponseCache, cached_completion
+
 load_dotenv()
 
 
-def create_llm(
-    model: Optional[str] = None,
-    temperature: float = 0.7,
-    max_tokens: int = 4096
-) -> ChatOpenAI:
+def _llm_config(model: Optional[str] = None) -> Tuple[str, Optional[str], str]:
     """
-    创建 LLM 实例（从环境变量读取配置）
-
-    Args:
-        model: 模型名称（默认从环境变量读取）
-        temperature: 温度参数
-        max_tokens: 最大 token 数
+    从环境变量读取 LLM 配置
 
     Returns:
-        ChatOpenAI 实例
+        (api_key, base_url, model)
     """
     api_key = os.getenv("OPENAI_API_KEY")
     base_url = os.getenv("OPENAI_BASE_URL")
@@ -38,22 +34,130 @@ def create_llm(
             "  OPENAI_MODEL=gpt-4  # 可选"
         )
 
-    # 构建 LLM 参数
+    if base_url:
+        print(f"ℹ️  使用自定义 API 端点：{base_url}")
+        print(f"ℹ️  使用模型：{model}")
+    return api_key, base_url, model
+
+
+def create_llm(
+    model: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 4096,
+    cache: bool = True
+) -> ChatOpenAI:
+    """
+    创建 LLM 实例（从环境变量读取配置），用于在 Crew 之外直接调用 LLM
+
+    crewai Agent 请使用 create_agent_llm()：crewai 会把 ChatOpenAI 重新构建为自己的 LLM，
+    这里设置的缓存和 http_client 对 Agent 不生效。
+
+    Args:
+        model: 模型名称（默认从环境变量读取）
+        temperature: 温度参数
+        max_tokens: 最大 token 数
+        cache: 是否使用 LLM 响应缓存（见 src/llm_cache.py）
+
+    Returns:
+        ChatOpenAI 实例
+    """
+    api_key, base_url, model = _llm_config(model)
+
+    # 构建 LLM 参数（所有 LLM 实例共用同一个 keep-alive 连接池）
     llm_kwargs = {
         "model": model,
         "temperature": temperature,
-        "max_tokens": max_tokens
+        "max_tokens": max_tokens,
+        "http_client": get_http_client()
     }
 
     # 如果设置了自定义 base_url，添加到参数中
     if base_url:
         llm_kwargs["base_url"] = base_url
-        print(f"ℹ️  使用自定义 API 端点：{base_url}")
-        print(f"ℹ️  使用模型：{model}")
+
+    # 相同端点、相同调用参数和消息的响应直接从缓存返回
+    if cache:
+        llm_kwargs["cache"] = LLMResponseCache(namespace=base_url or "")
 
     return ChatOpenAI(api_key=api_key, **llm_kwargs)
 
 
+def _tool_schemas(tools: Optional[List[Any]]) -> Optional[List[Any]]:
+    """工具定义（参与缓存键）"""
+    if not tools:
+        return None
+    return [tool if isinstance(tool, dict) else repr(tool) for tool in tools]
+
+
+class CachedLLM(LLM):
+    """
+    带响应缓存的 crewai LLM
+
+    在 crewai 实际调用的 LLM.call 这一层读写 src/llm_cache.py 的缓存。
+    由 LLM 直接执行工具（传入 available_functions）的调用有副作用，不缓存。
+    """
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        def compute():
+            return super(CachedLLM, self).call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs
+            )
+
+        if tools and available_functions:
+            return compute()
+
+        params: Dict[str, Any] = {
+            "model": self.model,
+            "temperature": getattr(self, "temperature", None),
+            "max_tokens": getattr(self, "max_tokens", None),
+            "stop": getattr(self, "stop", None),
+            "tools": _tool_schemas(tools)
+        }
+        namespace = getattr(self, "base_url", None) or getattr(self, "api_base", None) or ""
+        return cached_completion(namespace, params, messages, compute)
+
+
+def create_agent_llm(
+    model: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 4096,
+    cache: bool = True
+) -> LLM:
+    """
+    创建 crewai Agent 使用的 LLM（从环境变量读取配置）
+
+    crewai 通过 LiteLLM 发起请求：
+    - 响应缓存接在 crewai 实际调用的 LLM.call 上（CachedLLM）
+    - LiteLLM 创建 OpenAI 客户端时使用 litellm.client_session，这里设置为进程级共享 HTTP 客户端，
+      所有 Agent 与 create_llm() 共用同一个 keep-alive 连接池
+
+    Args:
+        model: 模型名称（默认从环境变量读取）
+        temperature: 温度参数
+        max_tokens: 最大 token 数
+        cache: 是否使用 LLM 响应缓存（见 src/llm_cache.py）
+
+    Returns:
+        crewai LLM 实例
+    """
+    import litellm
+
+    api_key, base_url, model = _llm_config(model)
+    litellm.client_session = get_http_client()
+
+    llm_kwargs = {
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "api_key": api_key
+    }
+    if base_url:
+        llm_kwargs["base_url"] = base_url
+
+    llm_class = CachedLLM if cache else LLM
+    return llm_class(**llm_kwargs)
+
+
 # 全局 LLM 实例（单例模式）
 _global_llm: Optional[ChatOpenAI] = None
 
@@ -7,26 +7,127 @@ CrewAI 编排 v2.0_fixed - 修复数据传递问题（保持向后兼容）
 3. CrewAI 会从 kickoff(inputs={}) 中自动替换这些占位符
 4. 移除不必要的 context 依赖，让每个 Agent 直接读取数据
 5. 改用 sequential process（更高效、更稳定）
+6. 三个独立阶段并发执行（异步任务），Reporter 在它们全部完成后执行，并记录各阶段耗时
 """
 import os
 import sys
+import time
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from crewai import Crew, Task, Process
-from src.crew_config import create_llm
-from src.agents.data_explorer_v2 import data_explorer
-from src.agents.analyst_v2 import analyst
-from src.agents.pandaai_real import pandaai_agent
-from src.agents.reporter_v2 import reporter
+from src.agents.registry import get_agent
+from src.execution_plan import budget_agent, compile_plan, describe_plan, prepare_plan_dataset, select_stages, stage_steps
+from src.settings import get_setting
 
 load_dotenv()
 
 
-def create_crew():
+# 执行方式：concurrent（三个独立阶段并发执行，全部完成后再生成报告）/ sequential（逐个执行）
+EXECUTION_MODES = ("concurrent", "sequential")
+
+# 各任务对应的阶段名（前三个互相独立，最后一个汇总报告）
+STAGE_NAMES = ["data_exploration", "statistical_analysis", "pandaai_analysis", "report"]
+
+
+class StageTimer:
+    """
+    记录每个阶段的耗时
+
+    并发执行时独立阶段都从 kickoff 开始计时，汇总阶段从最后一个独立阶段完成开始计时；
+    顺序执行时每个阶段从上一个阶段完成开始计时。
+
+    Args:
+        stage_names: 阶段名（与任务顺序一致，最后一个为汇总阶段）
+        concurrent: 前面的阶段是否并发执行
+    """
+
+    def __init__(self, stage_names: List[str], concurrent: bool):
+        self.stage_names = stage_names
+        self.concurrent = concurrent
+        self.started: Optional[float] = None
+        self.finished: Dict[str, float] = {}
+
+    def watch(self, task, name: str) -> None:
+        """任务完成时记录时间（保留任务原有的回调）"""
+        previous = task.callback
+
+        def callback(output):
+            self.finished[name] = time.perf_counter()
+            if previous:
+                previous(output)
+
+        task.callback = callback
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self.finished.clear()
+
+    def timings(self) -> Dict[str, float]:
+        """{阶段名: 耗时（秒）, "total": 总耗时}，未完成的阶段省略"""
+        if self.started is None:
+            return {}
+        *stages, final = self.stage_names
+        timings = {}
+        previous = self.started
+        for name in stages:
+            if name in self.finished:
+                timings[name] = round(self.finished[name] - (self.started if self.concurrent else previous), 2)
+                previous = self.finished[name]
+        if final in self.finished:
+            begin = max([self.finished[name] for name in stages if name in self.finished], default=self.started)
+            timings[final] = round(self.finished[final] - begin, 2)
+        timings["total"] = round(max(self.finished.values(), default=time.perf_counter()) - self.started, 2)
+        return timings
+
+
+def assemble_crew(tasks: list, stage_names: List[str], execution_mode: Optional[str] = None, verbose: bool = True) -> Tuple["Crew", StageTimer]:
+    """
+    组装 Crew：前面的任务互相独立，最后一个任务汇总它们的结果
+
+    Args:
+        tasks: Task 列表（最后一个为汇总任务）
+        stage_names: 与 tasks 对应的阶段名
+        execution_mode: concurrent / sequential（默认取 settings.yaml 的 crewai.execution_mode）
+        verbose: 是否输出详细日志
+
+    Returns:
+        (Crew, StageTimer)；kickoff 前调用 timer.start()，完成后 timer.timings() 即为各阶段耗时
+    """
+    from crewai import Crew, Process
+
+    execution_mode = execution_mode or get_setting("crewai.execution_mode", "concurrent")
+    if execution_mode not in EXECUTION_MODES:
+        raise ValueError(f"不支持的执行方式：{execution_mode}（可选：{list(EXECUTION_MODES)}）")
+
+    *stages, final = tasks
+    concurrent = execution_mode == "concurrent" and len(stages) > 1
+    for task in stages:
+        # crewai 在线程中执行连续的异步任务，遇到下一个同步任务时等待它们全部完成
+        task.async_execution = concurrent
+    if concurrent:
+        # 汇总任务显式依赖所有独立阶段，读取它们的输出
+        final.context = list(stages)
+
+    timer = StageTimer(stage_names, concurrent)
+    for task, name in zip(tasks, stage_names):
+        timer.watch(task, name)
+
+    agents = list({id(task.agent): task.agent for task in tasks}.values())
+    crew = Crew(
+        agents=agents,
+        tasks=list(tasks),
+        verbose=verbose,
+        process=Process.sequential,  # ✅ 不需要 manager；并发由异步任务实现
+        share_crew=False
+    )
+    return crew, timer
+
+
+def create_crew(execution_mode: Optional[str] = None, depth: str = "deep"):
     """
     创建 DataAnalysisCrew（修复数据传递问题，保持完全向后兼容）
 
@@ -35,10 +136,27 @@ def create_crew():
     2. CrewAI 会从 kickoff(inputs={}) 中自动替换
     3. 每个 Agent 直接读取数据文件，不依赖 context 传递 DataFrame
     4. 使用 sequential process（不需要 manager LLM）
+    5. crewai 和各 Agent 在这里才加载 / 创建，导入本模块不需要 API Key
+    6. 默认并发执行三个独立阶段，全部完成后再生成报告（execution_mode="sequential" 逐个执行）
+    7. depth 决定执行哪些阶段、Agent 可用的工具和迭代次数（见 src/execution_plan.py，默认完整 Crew）
     """
+    plan = compile_plan(depth)
+    if plan["mode"] != "crew":
+        raise ValueError(f"分析深度 {depth} 不使用 Crew（见 src/quick_analysis.py）")
+    return _build_crew(execution_mode, plan)[0]
+
+
+def _build_crew(execution_mode: Optional[str] = None, plan: Optional[dict] = None) -> Tuple["Crew", StageTimer]:
+    """创建 DataAnalysisCrew 及其阶段计时器（按执行计划裁剪阶段、限制 Agent）"""
+    from crewai import Task
+
+    plan = plan or compile_plan("deep")
+    data_explorer, analyst, pandaai_agent, reporter = (
+        budget_agent(get_agent(name), plan, stage) if stage in plan["stages"] else None
+        for name, stage in zip(["data_explorer", "analyst", "pandaai_agent", "reporter"], STAGE_NAMES)
+    )
 
     # ⚠️ 不再需要 manager LLM，改用 sequential
-    # llm = create_llm()  # 保留但不再使用
 
     # 定义任务
     # ✅ 使用占位符 {dataset_path}，会从 inputs 中替换
@@ -61,15 +179,9 @@ def create_crew():
     task_statistical_analysis = Task(
         description="""对数据集 {dataset_path} 进行深入的统计分析：
 
-1. 使用 read_csv_dataset 读取数据集 {dataset_path}
-2. 使用 calculate_basic_stats 计算基本统计量（均值、中位数、标准差等）
-3. 使用 analyze_trend 分析时间序列趋势
-4. 使用 calculate_correlation 分析变量相关性
-5. 使用 detect_anomalies 检测异常值
-6. 使用 generate_chart_config 生成图表配置
-7. 生成完整的统计分析报告
+""" + stage_steps(plan, "statistical_analysis", final_step="生成完整的统计分析报告") + """
 
-重要：直接读取原始数据文件 {dataset_path}，执行真正的数值计算。
+重要：所有工具都直接读取原始数据文件（file_path="{dataset_path}"），执行真正的数值计算。
 """,
         expected_output="统计分析报告，包含：关键指标、趋势分析、相关性矩阵、异常值列表、图表配置",
         agent=analyst,
@@ -141,26 +253,31 @@ def create_crew():
     # 优点：
     # 1. 不需要 manager_llm（节省成本）
     # 2. 每个 Agent 独立读取数据（真正执行分析）
-    # 3. 流程清晰，易于调试
-    data_analysis_crew = Crew(
-        agents=[data_explorer, analyst, pandaai_agent, reporter],
-        tasks=[
-            task_data_exploration,
-            task_statistical_analysis,
-            task_pandaai_analysis,
-            task_final_report
-        ],
-        verbose=True,
-        process=Process.sequential,  # ✅ 顺序执行，不需要 manager
-        # manager_llm 不需要（sequential 不使用）
-        share_crew=False
+    # 3. 前三个任务互相独立，并发执行；Reporter 等待它们全部完成
+    stage_names, tasks = select_stages(
+        plan,
+        STAGE_NAMES,
+        [task_data_exploration, task_statistical_analysis, task_pandaai_analysis, task_final_report]
     )
+    return assemble_crew(tasks, stage_names, execution_mode=execution_mode)
 
-    return data_analysis_crew
+
+def format_timings(timings: Dict[str, float]) -> str:
+    """阶段耗时的文本摘要"""
+    lines = ["⏱️  阶段耗时："]
+    lines += [f"  - {name}: {seconds:.1f}s" for name, seconds in timings.items()]
+    return "\n".join(lines)
 
 
 # 便捷函数
-def run_analysis(goal: str, dataset_path: str, depth: str = "standard", output_path: str = "report.md", output_format: str = "markdown"):
+def run_analysis(
+    goal: str,
+    dataset_path: str,
+    depth: str = "standard",
+    output_path: str = "report.md",
+    output_format: str = "markdown",
+    execution_mode: Optional[str] = None
+):
     """
     运行完整的数据分析流程（v2.0_fixed - 修复数据传递，保持兼容）
 
@@ -170,6 +287,7 @@ def run_analysis(goal: str, dataset_path: str, depth: str = "standard", output_p
         depth: 分析深度（quick/standard/deep）
         output_path: 输出文件路径
         output_format: 输出格式（markdown/json）
+        execution_mode: concurrent / sequential（默认取 settings.yaml 的 crewai.execution_mode）
 
     Returns:
         分析结果
@@ -186,6 +304,18 @@ def run_analysis(goal: str, dataset_path: str, depth: str = "standard", output_p
         print(f"当前工作目录：{Path.cwd()}")
         return None
 
+    plan = compile_plan(depth)
+    print(describe_plan(plan))
+
+    # quick：确定性工具 + 一次 LLM 摘要，不启动 Crew
+    if plan["mode"] == "local":
+        from src.quick_analysis import run_quick_analysis
+        result = run_quick_analysis(plan, goal, dataset_path, output_path, output_format)
+        print(f"\n✅ 分析完成！")
+        print(f"📄 最终报告：{output_path}")
+        print(format_timings(result["timings"]))
+        return result
+
     # 检查 API Key
     if not os.getenv("OPENAI_API_KEY"):
         print("\n❌ 错误：未设置 OPENAI_API_KEY 环境变量")
@@ -195,22 +325,29 @@ def run_analysis(goal: str, dataset_path: str, depth: str = "standard", output_p
         print("  OPENAI_MODEL=gpt-4  # 可选")
         return None
 
-    # 检查 PandaAI 是否安装
-    try:
-        import pandasai
-        print(f"✅ PandaAI 已安装：{pandasai.__version__}")
-    except ImportError:
-        print("\n⚠️  警告：pandasai 未安装")
-        print("请运行: pip install pandasai>=2.0.0")
-        print("将无法使用 PandaAI 功能，但其他 Agent 可以正常工作")
+    # 检查 PandaAI 是否安装（只有包含 PandaAI 阶段的计划需要）
+    if "pandaai_analysis" in plan["stages"]:
+        try:
+            import pandasai
+            print(f"✅ PandaAI 已安装：{pandasai.__version__}")
+        except ImportError:
+            print("\n⚠️  警告：pandasai 未安装")
+            print("请运行: pip install pandasai>=2.0.0")
+            print("将无法使用 PandaAI 功能，但其他 Agent 可以正常工作")
 
     # 执行 Crew
     try:
-        crew = create_crew()
+        # 超过计划样本行数的数据集先抽样，Agent 读取样本文件
+        analysis_path, total_rows = prepare_plan_dataset(plan, dataset_path)
+        if analysis_path != dataset_path:
+            print(f"🎲 数据集共 {total_rows:,} 行，分析随机样本 {plan['sample_rows']:,} 行：{analysis_path}")
+
+        crew, timer = _build_crew(execution_mode, plan)
+        timer.start()
         result = crew.kickoff(
             inputs={
                 'goal': goal,
-                'dataset_path': dataset_path,
+                'dataset_path': analysis_path,
                 'analysis_depth': depth,
                 'depth': depth,  # 添加 depth 占位符
                 'output_path': output_path,
@@ -220,6 +357,7 @@ def run_analysis(goal: str, dataset_path: str, depth: str = "standard", output_p
 
         print(f"\n✅ 分析完成！")
         print(f"📄 最终报告：{output_path}")
+        print(format_timings(timer.timings()))
 
         return result
 
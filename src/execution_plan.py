@@ -0,0 +1,207 @@
+"""
+分析深度 -> 执行计划
+
+--depth quick|standard|deep（Web 端为 /analyze 的 depth 字段）决定实际执行的内容，
+而不只是写进报告 Prompt：
+
+- quick：不启动 Crew，在样本上直接运行确定性的统计工具，只调用一次 LLM 生成摘要
+- standard：数据探索 + 统计分析 + 报告三个阶段，超大数据集先抽样，统计工具只保留批量版本，
+  每个 Agent 的迭代次数（即 LLM 调用次数）受限
+- deep：完整 Crew（含 PandaAI），全量数据，迭代次数取 settings.yaml 的 crewai.max_iter
+"""
+import copy
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.settings import get_setting
+
+
+ANALYSIS_DEPTHS = ("quick", "standard", "deep")
+
+# 各阶段可用的工具（crewai 工具名与函数名一致）
+STAGE_TOOLS: Dict[str, List[str]] = {
+    "data_exploration": ["read_csv_dataset", "check_data_quality", "generate_data_summary"],
+    "statistical_analysis": [
+        "calculate_all_stats", "calculate_basic_stats", "analyze_segments", "analyze_trends", "analyze_trend",
+        "forecast_series", "calculate_correlation", "scan_anomalies", "detect_anomalies", "generate_chart_config"
+    ],
+    "pandaai_analysis": [
+        "pandaai_chat", "pandaai_clean_data", "pandaai_analyze_patterns",
+        "pandaai_predict_trend", "pandaai_generate_chart", "pandaai_data_summary"
+    ],
+    "report": [
+        "compile_summary", "format_report_markdown", "format_report_json", "save_report", "generate_executable_summary"
+    ]
+}
+
+# 任务描述中各工具的使用说明（按计划中该阶段可用的工具生成，不提及 Agent 没有的工具）
+STAGE_TOOL_STEPS: Dict[str, List[Tuple[str, str]]] = {
+    "statistical_analysis": [
+        ("calculate_all_stats", "使用 calculate_all_stats 一次计算所有数值列的基本统计量（均值、中位数、标准差、分位数等）"),
+        ("calculate_basic_stats", "需要单列统计明细时使用 calculate_basic_stats"),
+        ("analyze_trends", "使用 analyze_trends 按日期一次分析所有数值列的趋势"),
+        ("analyze_trend", "需要单列趋势时使用 analyze_trend"),
+        ("analyze_segments", "存在品类、地区等维度列时使用 analyze_segments 一次对比所有分组"),
+        ("forecast_series", "需要预测未来数值时使用 forecast_series"),
+        ("calculate_correlation", "使用 calculate_correlation 分析变量相关性"),
+        ("scan_anomalies", "使用 scan_anomalies 批量检测所有数值列的异常值"),
+        ("detect_anomalies", "需要单列异常值明细时使用 detect_anomalies"),
+        ("generate_chart_config", "使用 generate_chart_config 生成图表配置")
+    ]
+}
+
+# quick 模式在本地依次执行的步骤（最后一步为唯一的 LLM 调用）
+LOCAL_STAGES = ["statistics", "trends", "anomalies", "correlation", "summary"]
+
+# 各深度的执行计划模板
+#   mode: local（本地确定性工具）/ crew（CrewAI）
+#   sample_rows: 数据集超过该行数时先抽样（None 表示使用全量数据）
+#   agent_max_iter: 每个 Agent 的最大迭代次数（None 表示取 settings.yaml 的 crewai.max_iter）
+#   max_llm_calls: local 模式的 LLM 调用次数上限
+DEPTH_PLANS: Dict[str, Dict[str, Any]] = {
+    "quick": {
+        "mode": "local",
+        "stages": LOCAL_STAGES,
+        "sample_rows": 50_000,
+        "max_llm_calls": 1
+    },
+    "standard": {
+        "mode": "crew",
+        "stages": ["data_exploration", "statistical_analysis", "report"],
+        "tools": {
+            # 只保留一次覆盖所有列的批量工具
+            "statistical_analysis": [
+                "calculate_all_stats", "analyze_segments", "analyze_trends",
+                "calculate_correlation", "scan_anomalies", "generate_chart_config"
+            ]
+        },
+        "sample_rows": 500_000,
+        "agent_max_iter": 5
+    },
+    "deep": {
+        "mode": "crew",
+        "stages": ["data_exploration", "statistical_analysis", "pandaai_analysis", "report"],
+        "sample_rows": None,
+        "agent_max_iter": None
+    }
+}
+
+
+def compile_plan(depth: str) -> Dict[str, Any]:
+    """
+    将分析深度编译为具体的执行计划
+
+    Args:
+        depth: quick / standard / deep
+
+    Returns:
+        {"depth", "mode", "stages", "tools": {阶段: 工具名列表}, "sample_rows",
+         "agent_max_iter", "max_llm_calls"}
+    """
+    if depth not in DEPTH_PLANS:
+        raise ValueError(f"不支持的分析深度：{depth}（可选：{list(ANALYSIS_DEPTHS)}）")
+    template = copy.deepcopy(DEPTH_PLANS[depth])
+    plan = {"depth": depth, **template}
+
+    if plan["mode"] == "local":
+        plan["tools"] = {}
+        plan["agent_max_iter"] = None
+        return plan
+
+    max_iter = plan.get("agent_max_iter") or int(get_setting("crewai.max_iter", 10))
+    plan["agent_max_iter"] = max_iter
+    plan["tools"] = {stage: template.get("tools", {}).get(stage, STAGE_TOOLS[stage]) for stage in plan["stages"]}
+    # 每个 Agent 每次迭代最多一次 LLM 调用
+    plan["max_llm_calls"] = max_iter * len(plan["stages"])
+    return plan
+
+
+def describe_plan(plan: Dict[str, Any]) -> str:
+    """执行计划的文本摘要"""
+    lines = [f"🗺️  执行计划（{plan['depth']}）："]
+    if plan["mode"] == "local":
+        lines.append(f"  - 本地确定性工具：{' → '.join(plan['stages'])}")
+    else:
+        lines.append(f"  - Crew 阶段：{' → '.join(plan['stages'])}")
+        lines.append(f"  - 每个 Agent 最多 {plan['agent_max_iter']} 次迭代")
+    sample = f"超过 {plan['sample_rows']:,} 行时抽样" if plan["sample_rows"] else "全量数据"
+    lines.append(f"  - 数据：{sample}")
+    lines.append(f"  - LLM 调用上限：{plan['max_llm_calls']} 次")
+    return "\n".join(lines)
+
+
+def prepare_plan_dataset(plan: Dict[str, Any], dataset_path: str) -> Tuple[str, int]:
+    """
+    按计划准备 Crew 使用的数据文件：超过 sample_rows 时抽样写入旁路 CSV
+
+    样本文件按数据集内容哈希命名，同一版本的数据集只抽样一次。
+
+    Args:
+        plan: compile_plan 的结果
+        dataset_path: 原始数据集路径
+
+    Returns:
+        (Agent 读取的数据文件路径, 原始数据集总行数；不抽样时为 -1 表示未统计)
+    """
+    sample_rows = plan.get("sample_rows")
+    if not sample_rows:
+        return dataset_path, -1
+
+    from src.tools.columnar_store import sidecar_path
+    from src.tools.data_loader import load_bounded_dataset
+    from src.tools.dataset_cache import file_content_hash
+
+    sample_path = sidecar_path(dataset_path, f".sample-{sample_rows}-{file_content_hash(dataset_path)[:12]}.csv")
+    df, total_rows = load_bounded_dataset(dataset_path, max_rows=sample_rows, sample_size=sample_rows)
+    if total_rows <= sample_rows:
+        return dataset_path, total_rows
+
+    if not sample_path.exists():
+        tmp_path = sample_path.with_name(sample_path.name + f".{os.getpid()}.tmp")
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, sample_path)
+    return str(sample_path), total_rows
+
+
+def budget_agent(agent: Any, plan: Dict[str, Any], stage: str) -> Any:
+    """
+    按计划限制 Agent 的迭代次数和工具（复制后修改，不影响注册表中共享的实例）
+
+    Args:
+        agent: crewai Agent
+        plan: compile_plan 的结果
+        stage: 阶段名
+
+    Returns:
+        受限的 Agent 副本
+    """
+    budgeted = agent.copy()
+    budgeted.max_iter = plan["agent_max_iter"]
+    allowed = set(plan["tools"].get(stage, []))
+    budgeted.tools = [tool for tool in agent.tools if tool.name in allowed]
+    return budgeted
+
+
+def stage_steps(plan: Dict[str, Any], stage: str, final_step: Optional[str] = None) -> str:
+    """
+    按计划中该阶段可用的工具生成任务描述中的编号步骤
+
+    Args:
+        plan: compile_plan 的结果
+        stage: 阶段名（见 STAGE_TOOL_STEPS）
+        final_step: 追加在最后的步骤（如"生成完整的统计分析报告"）
+
+    Returns:
+        编号步骤文本
+    """
+    allowed = set(plan["tools"].get(stage, STAGE_TOOLS[stage]))
+    lines = [text for tool, text in STAGE_TOOL_STEPS[stage] if tool in allowed]
+    if final_step:
+        lines.append(final_step)
+    return "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+
+
+def select_stages(plan: Dict[str, Any], stage_names: List[str], items: List[Any]) -> Tuple[List[str], List[Any]]:
+    """按计划保留阶段（保持原有顺序）"""
+    selected = [(name, item) for name, item in zip(stage_names, items) if name in plan["stages"]]
+    return [name for name, _ in selected], [item for _, item in selected]
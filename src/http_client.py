@@ -0,0 +1,194 @@
+"""
+进程级共享 HTTP 客户端
+
+所有 LLM 实例共用同一个 keep-alive 连接池，避免每个 Agent 各自建立连接、重复 TLS 握手：
+- create_llm 创建的 ChatOpenAI：通过 http_client 参数传入
+- crewai Agent 的 LLM（create_agent_llm，经由 LiteLLM 请求）：设置为 litellm.client_session
+
+- 连接池上限、keep-alive 连接数和过期时间来自 settings.yaml 的 http 配置
+- 每个主机的并发请求数单独限制（超出时排队等待），避免单个端点占满连接池
+- 安装了 h2 时启用 HTTP/2（通过 ALPN 协商，端点不支持时自动回退到 HTTP/1.1）
+- get_http_pool_stats() 返回请求数、排队等待时间和连接池状态
+"""
+import importlib.util
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.settings import get_setting
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """响应流关闭时执行回调"""
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._on_close()
+
+
+class HostLimitedTransport(httpx.BaseTransport):
+    """
+    按主机限制并发请求数的传输层
+
+    Args:
+        transport: 实际发送请求的传输层
+        per_host_limit: 每个主机同时进行的最大请求数（0 表示不限制）
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, per_host_limit: int = 0):
+        self.transport = transport
+        self.per_host_limit = per_host_limit
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._requests: Dict[str, int] = defaultdict(int)
+        self._active: Dict[str, int] = defaultdict(int)
+        self._wait_seconds: Dict[str, float] = defaultdict(float)
+
+    def _semaphore(self, host: str) -> Optional[threading.BoundedSemaphore]:
+        if self.per_host_limit <= 0:
+            return None
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._semaphores[host]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphore(host)
+        start = time.perf_counter()
+        if semaphore is not None:
+            semaphore.acquire()
+        with self._lock:
+            self._requests[host] += 1
+            self._active[host] += 1
+            self._wait_seconds[host] += time.perf_counter() - start
+
+        released = threading.Event()
+
+        def release() -> None:
+            if not released.is_set():
+                released.set()
+                with self._lock:
+                    self._active[host] -= 1
+                if semaphore is not None:
+                    semaphore.release()
+
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+        # 响应体读完（流关闭）后才释放名额，流式响应同样适用
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """按主机统计的请求数、进行中的请求数和累计排队时间"""
+        with self._lock:
+            return {
+                host: {
+                    "requests": self._requests[host],
+                    "active": self._active[host],
+                    "wait_seconds": round(self._wait_seconds[host], 4)
+                }
+                for host in self._requests
+            }
+
+
+def http2_available() -> bool:
+    """HTTP/2 需要 h2 包"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+    per_host_limit: Optional[int] = None,
+    http2: Optional[bool] = None,
+    timeout: Optional[float] = None,
+    transport: Optional[httpx.BaseTransport] = None
+) -> httpx.Client:
+    """
+    创建带连接池的 HTTP 客户端（参数默认来自 settings.yaml 的 http 配置）
+
+    Args:
+        max_connections: 连接池最大连接数
+        max_keepalive_connections: 最多保持的空闲连接数
+        keepalive_expiry: 空闲连接保持时间（秒）
+        per_host_limit: 每个主机的最大并发请求数（0 表示不限制）
+        http2: 是否启用 HTTP/2（未安装 h2 时忽略）
+        timeout: 请求超时（秒）
+        transport: 底层传输层（默认为带连接池的 httpx.HTTPTransport）
+
+    Returns:
+        httpx.Client
+    """
+    limits = httpx.Limits(
+        max_connections=int(max_connections or get_setting("http.max_connections", 32)),
+        max_keepalive_connections=int(max_keepalive_connections or get_setting("http.max_keepalive_connections", 16)),
+        keepalive_expiry=float(keepalive_expiry or get_setting("http.keepalive_expiry", 60))
+    )
+    if http2 is None:
+        http2 = bool(get_setting("http.http2", True))
+    if per_host_limit is None:
+        per_host_limit = int(get_setting("http.per_host_limit", 8))
+    if transport is None:
+        transport = httpx.HTTPTransport(limits=limits, http2=http2 and http2_available())
+
+    return httpx.Client(
+        transport=HostLimitedTransport(transport, per_host_limit),
+        timeout=httpx.Timeout(float(timeout or get_setting("http.timeout", 120)), connect=10.0)
+    )
+
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """获取进程级共享 HTTP 客户端"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = create_http_client()
+        return _http_client
+
+
+def get_http_pool_stats(client: Optional[httpx.Client] = None) -> Dict[str, Any]:
+    """
+    连接池统计
+
+    Args:
+        client: create_http_client 创建的客户端（默认为共享客户端）
+
+    Returns:
+        {"hosts": 按主机的请求统计, "connections": 连接数, "idle_connections": 空闲连接数, "http2_connections": HTTP/2 连接数}
+    """
+    client = client or get_http_client()
+    transport = client._transport
+    stats: Dict[str, Any] = {"hosts": transport.stats() if isinstance(transport, HostLimitedTransport) else {}}
+
+    # 连接信息来自 httpcore 连接池（自定义传输层没有连接池时省略）
+    pool = getattr(getattr(transport, "transport", transport), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    if pool is not None:
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+        stats["http2_connections"] = sum(1 for conn in connections if "HTTP/2" in conn.info())
+    return stats
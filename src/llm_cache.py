@@ -0,0 +1,178 @@
+"""
+LLM 响应缓存
+
+同一目标、同一数据集重复分析时，Agent 每一步发给 LLM 的消息完全相同，
+缓存命中后直接返回上次的响应，不再发起网络请求。
+
+缓存接在两层上：
+- crewai Agent：crewai 会把 Agent(llm=...) 重新构建为自己的 LLM（通过 LiteLLM 调用），
+  因此 Agent 使用 crew_config.create_agent_llm() 创建的 CachedLLM，在 LLM.call 这一层读写缓存
+- 直接调用的 ChatOpenAI（create_llm）：通过 LangChain 缓存接口 LLMResponseCache
+
+缓存键：blake2b(base_url, 调用参数, 消息)
+- 调用参数包含模型名、temperature、max_tokens、stop 和工具定义
+  （LangChain 层为 LangChain 生成的 llm_string）
+- 消息为完整对话
+
+响应保存在 SQLite 文件中（settings.yaml 的 llm_cache 配置），超过有效期的响应视为未命中，
+总大小超出上限时按最近访问时间淘汰。
+
+关闭缓存：
+- 全局：settings.yaml 的 llm_cache.enabled 或环境变量 LLM_CACHE_DISABLED=1
+- 单个 LLM 实例：create_agent_llm(cache=False) / create_llm(cache=False)
+- 单次调用：在 with llm_cache_disabled(): 中调用
+"""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from src.settings import get_setting
+from src.tools.result_cache import ResultCache, resolve_cache_dir
+
+try:
+    from langchain_core.caches import BaseCache
+    from langchain_core.load import dumps, loads
+except ImportError:
+    # 只使用 crewai Agent 时不需要 LangChain
+    BaseCache = object
+
+
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def llm_cache_disabled() -> Iterator[None]:
+    """在该上下文中的 LLM 调用既不读取也不写入缓存"""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def llm_cache_enabled() -> bool:
+    """当前调用是否使用缓存"""
+    if _bypass.get():
+        return False
+    if os.environ.get("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return False
+    return str(get_setting("llm_cache.enabled", True)).lower() not in ("false", "0", "no")
+
+
+_store: Optional[ResultCache] = None
+_store_lock = threading.Lock()
+
+
+def get_llm_cache_store() -> ResultCache:
+    """获取进程级 LLM 响应存储（目录、大小上限和有效期来自 settings.yaml 的 llm_cache 配置）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            directory = resolve_cache_dir(get_setting("llm_cache.dir", ".cache/llm"))
+            max_mb = float(get_setting("llm_cache.max_mb", 256))
+            ttl_hours = float(get_setting("llm_cache.ttl_hours", 24))
+            _store = ResultCache(
+                directory,
+                int(max_mb * 1024 * 1024),
+                filename="responses.sqlite",
+                ttl_seconds=ttl_hours * 3600 if ttl_hours > 0 else None
+            )
+        return _store
+
+
+def completion_cache_key(namespace: str, params: Dict[str, Any], messages: Any) -> str:
+    """
+    一次补全调用的缓存键
+
+    Args:
+        namespace: API 端点（通常为 base_url）
+        params: 影响响应的调用参数（模型名、temperature、max_tokens、stop、工具定义等）
+        messages: 完整对话（字符串或 [{"role", "content"}] 列表）
+
+    Returns:
+        缓存键
+    """
+    payload = json.dumps({"params": params, "messages": messages}, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.blake2b("\0".join([namespace, payload]).encode(), digest_size=20).hexdigest()
+
+
+def cached_completion(namespace: str, params: Dict[str, Any], messages: Any, compute: Callable[[], Any]) -> Any:
+    """
+    读取缓存的补全结果，未命中时调用 compute() 并保存
+
+    只缓存文本响应；缓存读写失败时直接调用 compute()。
+
+    Args:
+        namespace: API 端点（通常为 base_url）
+        params: 影响响应的调用参数
+        messages: 完整对话
+        compute: 实际发起请求的函数
+
+    Returns:
+        补全结果
+    """
+    if not llm_cache_enabled():
+        return compute()
+    key = completion_cache_key(namespace, params, messages)
+    try:
+        found, value = get_llm_cache_store().get(key)
+    except Exception:
+        return compute()
+    if found:
+        return value
+
+    result = compute()
+    if isinstance(result, str) and result:
+        try:
+            get_llm_cache_store().put(key, namespace, result)
+        except Exception:
+            pass
+    return result
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain 缓存接口的 SQLite 实现，通过 ChatOpenAI(cache=...) 按实例启用（需要 langchain_core）
+
+    Args:
+        namespace: 区分不同 API 端点的前缀（通常为 base_url）
+        store: 底层存储（默认为进程级存储）
+    """
+
+    def __init__(self, namespace: str = "", store: Optional[ResultCache] = None):
+        self.namespace = namespace
+        self._store = store
+
+    @property
+    def store(self) -> ResultCache:
+        return self._store or get_llm_cache_store()
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return hashlib.blake2b("\0".join([self.namespace, llm_string, prompt]).encode(), digest_size=20).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Any]:
+        if not llm_cache_enabled():
+            return None
+        found, value = self.store.get(self._key(prompt, llm_string))
+        if not found:
+            return None
+        try:
+            return [loads(generation) for generation in value]
+        except Exception:
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Any) -> None:
+        if not llm_cache_enabled():
+            return
+        self.store.put(self._key(prompt, llm_string), self.namespace, [dumps(generation) for generation in return_val])
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.invalidate(tool_name=self.namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        return self.store.stats()
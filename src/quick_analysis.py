@@ -0,0 +1,199 @@
+"""
+快速分析（--depth quick）
+
+不启动 Crew：在数据样本上直接运行确定性的统计工具（统计量、趋势、异常值、相关性），
+再调用一次 LLM 将结果整理为面向分析目标的摘要。没有配置 LLM 或调用失败时，
+报告只包含工具结果，不影响分析本身。
+"""
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.tools.anomaly_detection import detect_anomalies_batch
+from src.tools.data_loader import load_bounded_dataset
+from src.tools.dataset_profile import to_jsonable
+from src.tools.forecasting import detect_date_column_in_frame, infer_frequency
+from src.tools.statistical_analyzer import calculate_all_statistics, calculate_correlation_matrix
+from src.tools.trend_engine import analyze_trends, date_order
+
+
+# 写入 LLM Prompt 的工具结果最大字符数
+PROMPT_MAX_CHARS = 12000
+
+
+def collect_findings(dataset_path: str, sample_rows: int) -> Dict[str, Any]:
+    """
+    在样本上运行确定性的统计工具
+
+    Args:
+        dataset_path: 数据集路径
+        sample_rows: 超过该行数时只分析随机样本
+
+    Returns:
+        {"dataset", "statistics", "trends", "anomalies", "correlation", "timings"}
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    df, total_rows = load_bounded_dataset(dataset_path, max_rows=sample_rows, sample_size=sample_rows)
+    numeric = df.select_dtypes(include="number").columns.tolist()
+    date_column = detect_date_column_in_frame(df)
+    timings["load"] = time.perf_counter() - start
+    findings: Dict[str, Any] = {
+        "dataset": {
+            "path": dataset_path,
+            "total_rows": total_rows,
+            "analyzed_rows": len(df),
+            "sampled": len(df) < total_rows,
+            "columns": list(df.columns),
+            "numeric_columns": numeric,
+            "date_column": date_column
+        }
+    }
+
+    start = time.perf_counter()
+    findings["statistics"] = calculate_all_statistics(df)
+    timings["statistics"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if date_column and numeric:
+        freq = infer_frequency(date_order(df[date_column])[1])
+        # 样本上的求和会随抽样比例缩小，趋势按周期均值计算
+        agg = "mean" if findings["dataset"]["sampled"] else "sum"
+        findings["trends"] = analyze_trends(df, numeric, date_column, freq=freq, agg=agg)
+    else:
+        findings["trends"] = {"error": "没有可用的日期列或数值列"}
+    timings["trends"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    findings["anomalies"] = detect_anomalies_batch(df, numeric, method="mad", top_n=10) if numeric else {}
+    timings["anomalies"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    findings["correlation"] = (
+        calculate_correlation_matrix(df, numeric, top_k=10) if len(numeric) >= 2 else {"error": "需要至少 2 个数值列"}
+    )
+    timings["correlation"] = time.perf_counter() - start
+
+    findings["timings"] = {name: round(seconds, 3) for name, seconds in timings.items()}
+    return to_jsonable(findings)
+
+
+def summarize_findings(goal: str, findings: Dict[str, Any]) -> Optional[str]:
+    """
+    调用一次 LLM 生成摘要
+
+    Returns:
+        摘要文本；没有配置 LLM 或调用失败时返回 None
+    """
+    try:
+        from src.crew_config import create_llm
+
+        payload = json.dumps({k: v for k, v in findings.items() if k != "timings"}, ensure_ascii=False)
+        prompt = (
+            "你是一位数据分析师。下面是对数据集运行统计工具得到的结果（JSON），"
+            "请围绕分析目标用中文写一份简洁的分析摘要：3-5 条关键发现（引用具体数值）和 2-3 条建议。"
+            "只使用给出的结果，不要编造数据。\n\n"
+            f"分析目标：{goal}\n\n工具结果：\n{payload[:PROMPT_MAX_CHARS]}"
+        )
+        response = create_llm(temperature=0.3, max_tokens=1500).invoke(prompt)
+        return getattr(response, "content", str(response))
+    except Exception as e:
+        print(f"⚠️  LLM 摘要生成失败，报告只包含工具结果：{e}")
+        return None
+
+
+def render_markdown(goal: str, findings: Dict[str, Any], summary: Optional[str]) -> str:
+    """快速分析报告（Markdown）"""
+    dataset = findings["dataset"]
+    lines = [
+        "# 快速分析报告",
+        "",
+        f"- 分析目标：{goal}",
+        f"- 数据集：{dataset['path']}",
+        f"- 数据规模：{dataset['total_rows']:,} 行 × {len(dataset['columns'])} 列"
+        + (f"（分析随机样本 {dataset['analyzed_rows']:,} 行）" if dataset["sampled"] else ""),
+        f"- 生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        "## 摘要",
+        "",
+        summary or "_未生成 LLM 摘要，以下为统计工具结果。_",
+        "",
+        "## 关键指标",
+        "",
+        "| 列 | 均值 | 中位数 | 标准差 | 最小值 | 最大值 |",
+        "|---|---|---|---|---|---|"
+    ]
+    for col, stats in findings["statistics"].get("statistics", {}).items():
+        lines.append(
+            f"| {col} | {stats['mean']:.4g} | {stats['median']:.4g} | {stats['std']:.4g} | {stats['min']:.4g} | {stats['max']:.4g} |"
+        )
+
+    trends = findings["trends"]
+    lines += ["", "## 趋势", ""]
+    if "error" in trends:
+        lines.append(f"_{trends['error']}_")
+    else:
+        lines.append(f"按 {trends['freq']} 重采样（{trends['agg']}），{trends['analysis_period']['start']} ~ {trends['analysis_period']['end']}")
+        lines.append("")
+        for col, trend in trends["trends"].items():
+            lines.append(f"- {col}：{trend['trend']}，平均环比增长 {trend['average_growth_rate']}%")
+
+    anomalies = findings["anomalies"]
+    lines += ["", "## 异常值", ""]
+    for col, count in anomalies.get("per_column", {}).items():
+        lines.append(f"- {col}：{count} 个")
+    if not anomalies.get("per_column"):
+        lines.append("_未检测_")
+
+    lines += ["", "## 强相关变量", ""]
+    pairs = findings["correlation"].get("strong_correlations", [])
+    lines += [f"- {p['var1']} ~ {p['var2']}：{p['correlation']}" for p in pairs] or ["_无_"]
+    return "\n".join(lines) + "\n"
+
+
+def run_quick_analysis(
+    plan: Dict[str, Any],
+    goal: str,
+    dataset_path: str,
+    output_path: str,
+    output_format: str = "markdown"
+) -> Dict[str, Any]:
+    """
+    执行 quick 计划：确定性工具 + 最多 plan["max_llm_calls"] 次 LLM 调用
+
+    Args:
+        plan: compile_plan("quick") 的结果
+        goal: 分析目标
+        dataset_path: 数据集路径
+        output_path: 报告输出路径
+        output_format: markdown / json
+
+    Returns:
+        {"report_path", "report", "findings", "llm_calls", "timings"}
+    """
+    start = time.perf_counter()
+    findings = collect_findings(dataset_path, plan["sample_rows"])
+
+    summary, llm_calls = None, 0
+    if plan.get("max_llm_calls", 0) >= 1:
+        summary_start = time.perf_counter()
+        summary = summarize_findings(goal, findings)
+        # 只统计成功完成的调用（未配置 LLM 或调用失败时 summary 为 None）
+        llm_calls = 1 if summary is not None else 0
+        findings["timings"]["summary"] = round(time.perf_counter() - summary_start, 3)
+
+    if output_format == "json":
+        report = json.dumps({"goal": goal, "summary": summary, **findings}, ensure_ascii=False, indent=2)
+    else:
+        report = render_markdown(goal, findings, summary)
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(report)
+
+    timings = {**findings["timings"], "total": round(time.perf_counter() - start, 3)}
+    return {"report_path": output_path, "report": report, "findings": findings, "llm_calls": llm_calls, "timings": timings}
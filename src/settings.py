@@ -0,0 +1,77 @@
+"""
+项目配置读取 - config/settings.yaml
+
+支持 ${VAR:-default} 形式的环境变量替换。
+配置文件路径可通过环境变量 DATAINSIGHT_SETTINGS 覆盖。
+"""
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+
+DEFAULT_SETTINGS_PATH = Path(__file__).parent.parent / "config" / "settings.yaml"
+
+_ENV_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}")
+
+
+def _expand_env(value: Any) -> Any:
+    """递归替换配置中的环境变量占位符"""
+    if isinstance(value, str):
+        return _ENV_PATTERN.sub(lambda m: os.getenv(m.group(1), m.group(2) or ""), value)
+    if isinstance(value, dict):
+        return {k: _expand_env(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand_env(v) for v in value]
+    return value
+
+
+def load_settings(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    读取配置文件
+
+    Args:
+        path: 配置文件路径（默认 DATAINSIGHT_SETTINGS 或 config/settings.yaml）
+
+    Returns:
+        配置字典；文件不存在时返回空字典
+    """
+    settings_path = Path(path or os.getenv("DATAINSIGHT_SETTINGS") or DEFAULT_SETTINGS_PATH)
+    if not settings_path.exists():
+        return {}
+
+    with open(settings_path, "r", encoding="utf-8") as f:
+        return _expand_env(yaml.safe_load(f) or {})
+
+
+# 全局配置（单例模式）
+_global_settings: Optional[Dict[str, Any]] = None
+
+
+def get_settings() -> Dict[str, Any]:
+    """获取全局配置"""
+    global _global_settings
+    if _global_settings is None:
+        _global_settings = load_settings()
+    return _global_settings
+
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """
+    按点分路径读取配置项
+
+    Args:
+        key: 配置路径，如 "data.chunk_size"
+        default: 配置项不存在时的默认值
+
+    Returns:
+        配置值
+    """
+    value: Any = get_settings()
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
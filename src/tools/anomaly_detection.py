@@ -0,0 +1,355 @@
+"""
+批量异常检测
+
+一次对所有选定的数值列打分，结果为紧凑的异常值表（只保留分数最高的若干行），
+不逐行生成字典，可用于百万行以上的数据。
+
+单列方法（每列独立判断，各列在同一个二维数组上批量计算）：
+- zscore：|v - 均值| / 标准差
+- iqr：超出四分位数的距离 / IQR（阈值即 IQR 倍数 k）
+- mad：修正 z 分数 0.6745 * |v - 中位数| / MAD，对离群值本身不敏感
+- rolling_zscore：相对前 window 个值（不含当前值）的均值和标准差的 z 分数，适用于有趋势的时间序列
+
+多列方法（每行一个分数，含缺失值的行不打分）：
+- mahalanobis：马氏距离，默认阈值为自由度等于列数的卡方分布 99.9% 分位数的平方根
+- isolation_forest：孤立森林异常分数（0~1，越大越异常），纯 NumPy 实现
+"""
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+UNIVARIATE_METHODS = ("zscore", "iqr", "mad", "rolling_zscore")
+MULTIVARIATE_METHODS = ("mahalanobis", "isolation_forest")
+ANOMALY_METHODS = UNIVARIATE_METHODS + MULTIVARIATE_METHODS
+
+DEFAULT_THRESHOLDS = {
+    "zscore": 3.0,
+    "iqr": 1.5,
+    "mad": 3.5,
+    "rolling_zscore": 3.0,
+    "mahalanobis": None,
+    "isolation_forest": 0.6
+}
+
+# 马氏距离默认阈值对应的卡方分布分位数
+MAHALANOBIS_QUANTILE = 0.999
+
+# 孤立森林每批打分的行数（批内数据可留在 CPU 缓存中）
+_SCORE_BATCH_ROWS = 65536
+
+_EULER_GAMMA = 0.5772156649015329
+
+
+# ========================================
+# 单列方法
+# ========================================
+
+def _safe_divide(numerator: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """numerator / scale；scale 为 0 时分子为 0 的位置记 0，否则记 inf（NaN 保持不变）"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = numerator / scale
+    zero_scale = np.broadcast_to(scale == 0, result.shape)
+    result[zero_scale & (numerator == 0)] = 0.0
+    return result
+
+
+def univariate_scores(matrix: np.ndarray, method: str, window: int = 30) -> np.ndarray:
+    """
+    逐列计算异常分数
+
+    Args:
+        matrix: 二维数值数组（行 × 列，可含 NaN）
+        method: zscore / iqr / mad / rolling_zscore
+        window: rolling_zscore 的窗口大小
+
+    Returns:
+        与输入同形状的分数数组（缺失值位置为 NaN）
+    """
+    matrix = np.asarray(matrix, dtype="float64")
+    if matrix.ndim == 1:
+        matrix = matrix[:, None]
+
+    with np.errstate(invalid="ignore"):
+        if method == "zscore":
+            # 总体标准差（与 scipy.stats.zscore 一致）
+            center = np.nanmean(matrix, axis=0)
+            return _safe_divide(np.abs(matrix - center), np.nanstd(matrix, axis=0))
+
+        if method == "iqr":
+            q1, q3 = np.nanquantile(matrix, [0.25, 0.75], axis=0)
+            beyond = np.maximum(np.maximum(q1 - matrix, matrix - q3), 0.0)
+            return _safe_divide(np.where(np.isnan(matrix), np.nan, beyond), q3 - q1)
+
+        if method == "mad":
+            median = np.nanmedian(matrix, axis=0)
+            deviation = np.abs(matrix - median)
+            mad = np.nanmedian(deviation, axis=0)
+            # 超过一半取值相同时 MAD 为 0，改用平均绝对偏差（1.2533 使其与标准差同尺度）
+            scale = np.where(mad > 0, mad / 0.6745, np.nanmean(deviation, axis=0) * 1.2533)
+            return _safe_divide(deviation, scale)
+
+        if method == "rolling_zscore":
+            frame = pd.DataFrame(matrix)
+            min_periods = max(3, window // 2)
+            rolling = frame.rolling(window, min_periods=min_periods)
+            mean = rolling.mean().shift(1).to_numpy()
+            std = rolling.std().shift(1).to_numpy()
+            # 窗口内标准差为 0 时不判断
+            return np.abs(matrix - mean) / np.where(std > 0, std, np.nan)
+
+    raise ValueError(f"不支持的异常检测方法：{method}")
+
+
+# ========================================
+# 多列方法
+# ========================================
+
+def _chi2_quantile(p: float, dof: int) -> float:
+    """卡方分布分位数（Wilson-Hilferty 近似，dof >= 1 时相对误差在 1% 以内）"""
+    z = NormalDist().inv_cdf(p)
+    h = 2.0 / (9.0 * dof)
+    return dof * (1 - h + z * math.sqrt(h)) ** 3
+
+
+def mahalanobis_distances(matrix: np.ndarray) -> np.ndarray:
+    """
+    每行到样本均值的马氏距离（协方差不满秩时使用伪逆）
+
+    Returns:
+        每行的距离（含缺失值的行为 NaN）
+    """
+    matrix = np.asarray(matrix, dtype="float64")
+    complete = ~np.isnan(matrix).any(axis=1)
+    distances = np.full(len(matrix), np.nan)
+    if complete.sum() <= matrix.shape[1]:
+        return distances
+
+    data = matrix[complete]
+    centered = data - data.mean(axis=0)
+    inverse = np.linalg.pinv(np.atleast_2d(np.cov(centered, rowvar=False)))
+    squared = np.einsum("ij,jk,ik->i", centered, inverse, centered)
+    distances[complete] = np.sqrt(np.maximum(squared, 0.0))
+    return distances
+
+
+def _average_path_length(n: np.ndarray) -> np.ndarray:
+    """n 个样本的二叉搜索树中不成功查找的平均路径长度 c(n)"""
+    n = np.asarray(n, dtype="float64")
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = 2.0 * (np.log(n[large] - 1.0) + _EULER_GAMMA) - 2.0 * (n[large] - 1.0) / n[large]
+    return result
+
+
+def _build_isolation_tree(data: np.ndarray, height_limit: int, rng: np.random.Generator):
+    """
+    构建一棵孤立树，按完全二叉树存储（节点 i 的子节点为 2i+1 / 2i+2）
+
+    提前结束的叶节点划分值为 +inf，打分时一直向左下降到第 height_limit 层，
+    该叶节点的路径长度记在最左侧的末层节点上，因此打分时所有行固定下降 height_limit 层。
+
+    Returns:
+        (划分列, 划分值, 末层节点的路径长度)
+    """
+    n_nodes = 2 ** (height_limit + 1) - 1
+    feature = np.zeros(n_nodes, dtype=np.intp)
+    split = np.full(n_nodes, np.inf)
+    leaf_path = np.zeros(n_nodes)
+    stack = [(np.arange(len(data)), 0, 0)]
+
+    while stack:
+        rows, depth, node = stack.pop()
+        if depth < height_limit and len(rows) > 1:
+            subset = data[rows]
+            low, high = subset.min(axis=0), subset.max(axis=0)
+            candidates = np.flatnonzero(high > low)
+            if len(candidates):
+                column = int(rng.choice(candidates))
+                value = float(rng.uniform(low[column], high[column]))
+                feature[node] = column
+                split[node] = value
+                goes_right = subset[:, column] >= value
+                stack.append((rows[~goes_right], depth + 1, 2 * node + 1))
+                stack.append((rows[goes_right], depth + 1, 2 * node + 2))
+                continue
+
+        last = node
+        for _ in range(height_limit - depth):
+            last = 2 * last + 1
+        leaf_path[last] = depth + _average_path_length(np.array([len(rows)]))[0]
+
+    return feature, split, leaf_path
+
+
+def isolation_forest_scores(
+    matrix: np.ndarray,
+    n_trees: int = 100,
+    sample_size: int = 256,
+    random_state: Optional[int] = 42
+) -> np.ndarray:
+    """
+    孤立森林异常分数（Liu 等 2008）：s = 2^(-E[h(x)] / c(sample_size))
+
+    每棵树只用 sample_size 行构建，打分时所有行按层向量化地沿树下降，
+    耗时与行数 × 树数 × 树高成正比。
+
+    Returns:
+        每行的分数（0~1，越接近 1 越异常；含缺失值的行为 NaN）
+    """
+    matrix = np.asarray(matrix, dtype="float64")
+    complete = ~np.isnan(matrix).any(axis=1)
+    scores = np.full(len(matrix), np.nan)
+    data = matrix[complete]
+    if len(data) < 2:
+        return scores
+
+    rng = np.random.default_rng(random_state)
+    sample_size = min(sample_size, len(data))
+    height_limit = int(math.ceil(math.log2(sample_size)))
+    trees = [
+        _build_isolation_tree(data[rng.choice(len(data), sample_size, replace=False)], height_limit, rng)
+        for _ in range(n_trees)
+    ]
+
+    n_columns = data.shape[1]
+    path_lengths = np.zeros(len(data))
+    for start in range(0, len(data), _SCORE_BATCH_ROWS):
+        batch = np.ascontiguousarray(data[start:start + _SCORE_BATCH_ROWS])
+        flat = batch.ravel()
+        row_offsets = np.arange(len(batch), dtype=np.intp) * n_columns
+        total = np.zeros(len(batch))
+        for feature, split, leaf_path in trees:
+            node = np.zeros(len(batch), dtype=np.intp)
+            for _ in range(height_limit):
+                goes_right = flat[row_offsets + feature[node]] >= split[node]
+                node = 2 * node + 1 + goes_right
+            total += leaf_path[node]
+        path_lengths[start:start + len(batch)] = total / n_trees
+
+    scores[complete] = 2.0 ** (-path_lengths / _average_path_length(np.array([sample_size]))[0])
+    return scores
+
+
+# ========================================
+# 批量检测
+# ========================================
+
+def default_threshold(method: str, n_columns: int) -> float:
+    """各方法的默认阈值"""
+    if method == "mahalanobis":
+        return math.sqrt(_chi2_quantile(MAHALANOBIS_QUANTILE, max(n_columns, 1)))
+    return DEFAULT_THRESHOLDS[method]
+
+
+def detect_anomalies_batch(
+    source: Union[pd.DataFrame, str],
+    columns: Optional[List[str]] = None,
+    method: str = "mad",
+    threshold: Optional[float] = None,
+    window: int = 30,
+    date_column: Optional[str] = None,
+    top_n: int = 50,
+    random_state: Optional[int] = 42
+) -> Dict[str, Any]:
+    """
+    对多个数值列批量检测异常值
+
+    Args:
+        source: DataFrame 或数据文件路径（文件只读取需要的列）
+        columns: 要检测的列（默认全部数值列，非数值列跳过）
+        method: zscore / iqr / mad / rolling_zscore / mahalanobis / isolation_forest
+        threshold: 分数阈值（默认见 DEFAULT_THRESHOLDS）
+        window: rolling_zscore 的窗口大小
+        date_column: rolling_zscore 按该列排序后计算（默认按行顺序）
+        top_n: 异常值表最多保留的行数（按分数降序）
+        random_state: 孤立森林的随机种子
+
+    Returns:
+        {method, threshold, rows, columns, skipped, total_anomalies, anomaly_rate, [per_column,] table, truncated}
+        table 为 {"columns": 表头, "rows": [[...], ...]}：单列方法每行为 [行号, 列名, 取值, 分数]，
+        多列方法每行为 [行号, 分数, 各列取值...]
+    """
+    if method not in ANOMALY_METHODS:
+        return {"error": f"不支持的异常检测方法：{method}"}
+
+    if isinstance(source, str):
+        from src.tools.data_loader import get_dataset_columns, load_dataset
+        selected = list(columns) if columns else get_dataset_columns(source)
+        needed = list(dict.fromkeys(selected + ([date_column] if date_column else [])))
+        df = load_dataset(source, columns=needed)
+    else:
+        df = source
+        selected = list(columns) if columns else list(df.columns)
+
+    missing = [col for col in selected + ([date_column] if date_column else []) if col not in df.columns]
+    if missing:
+        return {"error": f"列不存在：{missing}"}
+
+    numeric = [col for col in selected if col != date_column and pd.api.types.is_numeric_dtype(df[col])
+               and not pd.api.types.is_bool_dtype(df[col])]
+    skipped = [col for col in selected if col not in numeric and col != date_column]
+    if not numeric:
+        return {"error": "没有可检测的数值列", "skipped": skipped}
+
+    frame = df[numeric]
+    if method == "rolling_zscore" and date_column:
+        order = pd.to_datetime(df[date_column], errors="coerce").argsort(kind="stable")
+        frame = frame.iloc[order]
+    matrix = frame.to_numpy(dtype="float64", na_value=np.nan)
+    labels = frame.index.to_numpy()
+    threshold = default_threshold(method, len(numeric)) if threshold is None else float(threshold)
+
+    result: Dict[str, Any] = {
+        "method": method,
+        "threshold": threshold,
+        "rows": len(frame),
+        "columns": numeric,
+        "skipped": skipped
+    }
+
+    if method in UNIVARIATE_METHODS:
+        scores = univariate_scores(matrix, method, window=window)
+        with np.errstate(invalid="ignore"):
+            flagged = scores > threshold
+        per_column = flagged.sum(axis=0)
+        row_idx, col_idx = np.nonzero(flagged)
+        flagged_scores = scores[row_idx, col_idx]
+        checked = int((~np.isnan(matrix)).sum())
+        result["per_column"] = {col: int(count) for col, count in zip(numeric, per_column)}
+        header = ["row", "column", "value", "score"]
+    else:
+        if method == "mahalanobis":
+            scores = mahalanobis_distances(matrix)
+        else:
+            scores = isolation_forest_scores(matrix, random_state=random_state)
+        with np.errstate(invalid="ignore"):
+            row_idx = np.flatnonzero(scores > threshold)
+        flagged_scores = scores[row_idx]
+        checked = int((~np.isnan(scores)).sum())
+        header = ["row", "score"] + numeric
+
+    total = len(flagged_scores)
+    keep = np.argsort(-flagged_scores, kind="stable")
+    if total > top_n:
+        keep = np.argpartition(-flagged_scores, top_n - 1)[:top_n]
+        keep = keep[np.argsort(-flagged_scores[keep], kind="stable")]
+
+    if method in UNIVARIATE_METHODS:
+        rows = [[labels[row_idx[k]], numeric[col_idx[k]], matrix[row_idx[k], col_idx[k]], round(float(flagged_scores[k]), 4)]
+                for k in keep]
+    else:
+        rows = [[labels[row_idx[k]], round(float(flagged_scores[k]), 4), *matrix[row_idx[k]].tolist()]
+                for k in keep]
+
+    result.update({
+        "total_anomalies": total,
+        "anomaly_rate": round(total / checked * 100, 4) if checked else 0,
+        "table": {"columns": header, "rows": rows},
+        "truncated": total > len(rows)
+    })
+    return result
@@ -0,0 +1,153 @@
+"""
+列式旁路文件（Parquet/Feather）
+
+上传的 CSV/Excel/JSON 文件在后台转换一次为列式文件，保存在原文件旁边：
+    data.csv -> data.csv.parquet + data.csv.columnar.json（清单）
+
+清单中记录源文件指纹（大小 + 内容哈希），源文件变化后旁路文件自动失效。
+读取带类型的列式数据比重新解析文本快 5-20 倍，并支持只读取部分列。
+
+需要 pyarrow；未安装时所有函数退化为"无旁路文件"，不影响正常读取。
+"""
+import os
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.tools.dataset_cache import dataset_fingerprint
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# 支持的旁路格式
+SIDECAR_FORMATS = ("parquet", "feather")
+MANIFEST_SUFFIX = ".columnar.json"
+
+
+def sidecar_path(file_path: str, suffix: str) -> Path:
+    """
+    获取数据文件的旁路文件路径（与原文件同目录）
+
+    Args:
+        file_path: 原始数据文件路径
+        suffix: 旁路文件后缀（如 .parquet、.profile.json）
+
+    Returns:
+        旁路文件路径
+    """
+    return Path(str(file_path) + suffix)
+
+
+def _default_format() -> str:
+    fmt = os.getenv("COLUMNAR_SIDECAR_FORMAT", "parquet").lower()
+    return fmt if fmt in SIDECAR_FORMATS else "parquet"
+
+
+def _fingerprint_for_manifest(file_path: str) -> Dict[str, Any]:
+    _, size, _, content_hash = dataset_fingerprint(file_path)
+    return {"size": size, "content_hash": content_hash}
+
+
+def write_sidecar(file_path: str, df: pd.DataFrame, fmt: Optional[str] = None) -> Optional[Path]:
+    """
+    将已解析的 DataFrame 写为列式旁路文件
+
+    Args:
+        file_path: 原始数据文件路径
+        df: 原始文件解析得到的 DataFrame
+        fmt: 旁路格式（parquet/feather，默认读取 COLUMNAR_SIDECAR_FORMAT）
+
+    Returns:
+        旁路文件路径；pyarrow 不可用或数据无法转换时返回 None
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+
+    fmt = fmt or _default_format()
+    target = sidecar_path(file_path, f".{fmt}")
+    tmp_target = sidecar_path(file_path, f".{fmt}.tmp")
+
+    try:
+        if fmt == "feather":
+            # Feather 不保存非默认索引
+            df.reset_index(drop=True).to_feather(tmp_target)
+        else:
+            df.to_parquet(tmp_target, index=False)
+        # 先写临时文件再原子替换，避免读取到写了一半的文件
+        os.replace(tmp_target, target)
+
+        manifest = {
+            "source_fingerprint": _fingerprint_for_manifest(file_path),
+            "format": fmt,
+            "sidecar": target.name,
+            "rows": int(len(df)),
+            "columns": [str(c) for c in df.columns]
+        }
+        manifest_path = sidecar_path(file_path, MANIFEST_SUFFIX)
+        tmp_manifest = sidecar_path(file_path, MANIFEST_SUFFIX + ".tmp")
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_manifest, manifest_path)
+
+        return target
+
+    except Exception as e:
+        # 混合类型的 object 列、非字符串列名等无法写入列式格式
+        print(f"⚠️  列式旁路文件生成失败（将继续使用原始文件）：{str(e)}")
+        for leftover in (tmp_target, target):
+            if leftover.exists():
+                leftover.unlink()
+        return None
+
+
+def find_sidecar(file_path: str) -> Optional[Path]:
+    """
+    查找与源文件当前版本匹配的旁路文件
+
+    Args:
+        file_path: 原始数据文件路径
+
+    Returns:
+        有效的旁路文件路径；不存在或已过期时返回 None
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+
+    manifest_path = sidecar_path(file_path, MANIFEST_SUFFIX)
+    if not manifest_path.exists():
+        return None
+
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("source_fingerprint") != _fingerprint_for_manifest(file_path):
+            return None
+
+        target = manifest_path.parent / manifest["sidecar"]
+        return target if target.exists() else None
+
+    except Exception:
+        return None
+
+
+def read_sidecar(sidecar: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    读取列式旁路文件
+
+    Args:
+        sidecar: 旁路文件路径
+        columns: 只读取这些列（None 表示全部）
+
+    Returns:
+        pandas DataFrame
+    """
+    if sidecar.suffix == ".feather":
+        return pd.read_feather(sidecar, columns=columns)
+    return pd.read_parquet(sidecar, columns=columns)
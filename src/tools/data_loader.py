@@ -3,55 +3,289 @@
 """
 import os
 import pandas as pd
+import numpy as np
 import json
 from pathlib import Path
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Iterator, List, Optional, Tuple
 
+from src.settings import get_setting
+from src.tools.dataset_cache import get_dataset_cache
+from src.tools.columnar_store import find_sidecar, read_sidecar, write_sidecar
+from src.tools.dataset_profile import get_profile
+from src.tools.duplicates import DuplicateCounter, count_duplicates
+from src.tools.parallel_csv import parallel_read_csv, should_parse_in_parallel
+from src.tools.row_index import get_row_index, sample_rows
 
-def load_dataset(file_path: str, format: str = "auto") -> pd.DataFrame:
+
+def _resolve_format(file_path: str, format: str) -> str:
+    """根据扩展名推断文件格式"""
+    if format == "auto":
+        format = Path(file_path).suffix.lower().lstrip('.')
+    return format
+
+
+def _parse_dataset(file_path: str, format: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """实际解析数据文件（不经过缓存），优先读取列式旁路文件"""
+    sidecar = find_sidecar(file_path)
+    if sidecar is not None:
+        df = read_sidecar(sidecar, columns)
+        print(f"✅ 成功加载数据（列式旁路文件）：{len(df)} 行 × {len(df.columns)} 列")
+        return df
+
+    return _parse_text_dataset(file_path, format, columns)
+
+
+def _parse_text_dataset(file_path: str, format: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """解析原始文本/Excel 文件，columns 不为空时只解析这些列"""
+    if format == "csv":
+        if should_parse_in_parallel(file_path):
+            df = parallel_read_csv(file_path, usecols=columns)
+        else:
+            df = pd.read_csv(file_path, usecols=columns)
+    elif format == "json":
+        df = pd.read_json(file_path)
+    elif format == "jsonl":
+        df = pd.read_json(file_path, lines=True)
+    elif format in ["xlsx", "xls"]:
+        df = pd.read_excel(file_path, usecols=columns)
+    else:
+        raise ValueError(f"不支持的文件格式：{format}")
+
+    if columns is not None:
+        # usecols 按文件中的顺序返回，这里恢复为请求的顺序
+        df = df[columns]
+
+    print(f"✅ 成功加载数据：{len(df)} 行 × {len(df.columns)} 列")
+    return df
+
+
+def load_dataset(
+    file_path: str,
+    format: str = "auto",
+    columns: Optional[List[str]] = None,
+    optimize: Optional[bool] = None
+) -> pd.DataFrame:
     """
     加载数据集（支持多种格式）
 
+    通过进程级数据集缓存读取，同一文件版本只解析一次。
+    返回的 DataFrame 与缓存共享数据，请勿原地修改。
+
+    指定 columns 时只解析需要的列（文本文件使用 usecols，列式旁路文件按列读取）；
+    如果全量数据已在缓存中，则直接从缓存中选取。
+
     Args:
         file_path: 文件路径
-        format: 文件格式（csv/json/xlsx/auto）
+        format: 文件格式（csv/json/jsonl/xlsx/auto）
+        columns: 只读取这些列（None 表示全部）
+        optimize: 是否执行 optimize_dtypes 内存优化（默认读取 settings.yaml 的 data.optimize_dtypes）
 
     Returns:
         pandas DataFrame
     """
-    path = Path(file_path)
+    format = _resolve_format(file_path, format)
+    if optimize is None:
+        optimize = bool(get_setting("data.optimize_dtypes", False))
+    cache = get_dataset_cache()
+
+    def parse(selected: Optional[List[str]] = None) -> pd.DataFrame:
+        df = _parse_dataset(file_path, format, selected)
+        if optimize:
+            df, report = optimize_dtypes(df)
+            print(f"✅ 内存优化：{report['before_mb']:.2f} MB → {report['after_mb']:.2f} MB "
+                  f"（减少 {report['reduction_pct']}%）")
+        return df
 
-    if format == "auto":
-        format = path.suffix.lower().lstrip('.')
+    # 未优化时的缓存键保持 (format,) / (format, columns) 不变
+    extra = ("optimized",) if optimize else ()
 
     try:
-        if format == "csv":
-            df = pd.read_csv(file_path)
-        elif format == "json":
-            df = pd.read_json(file_path)
-        elif format in ["xlsx", "xls"]:
-            df = pd.read_excel(file_path)
-        else:
-            raise ValueError(f"不支持的文件格式：{format}")
+        if columns is None:
+            return cache.get_or_load(file_path, parse, variant=(format,) + extra)
 
-        print(f"✅ 成功加载数据：{len(df)} 行 × {len(df.columns)} 列")
-        return df
+        columns = list(dict.fromkeys(columns))
+        full = cache.peek(file_path, variant=(format,) + extra)
+        if full is not None:
+            return full[columns]
+
+        return cache.get_or_load(
+            file_path,
+            lambda: parse(columns),
+            variant=(format, tuple(columns)) + extra
+        )
 
     except Exception as e:
         print(f"❌ 加载数据失败：{str(e)}")
         raise
 
 
-def get_data_info(df: pd.DataFrame) -> Dict[str, Any]:
+def get_dataset_columns(file_path: str, format: str = "auto") -> List[str]:
+    """
+    获取数据集的列名（只读取表头，不解析数据）
+
+    Args:
+        file_path: 文件路径
+        format: 文件格式（csv/json/jsonl/xlsx/auto）
+
+    Returns:
+        列名列表
+    """
+    format = _resolve_format(file_path, format)
+
+    sidecar = find_sidecar(file_path)
+    if sidecar is not None:
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+        if sidecar.suffix == ".feather":
+            return list(ipc.open_file(str(sidecar)).schema.names)
+        return list(pq.read_schema(sidecar).names)
+
+    if format == "csv":
+        return list(pd.read_csv(file_path, nrows=0).columns)
+    if format in ["xlsx", "xls"]:
+        return list(pd.read_excel(file_path, nrows=0).columns)
+    return list(load_dataset(file_path, format).columns)
+
+
+def convert_to_columnar(file_path: str, format: str = "auto") -> Union[str, None]:
+    """
+    将数据文件转换为列式旁路文件（Parquet/Feather），供后续读取使用
+
+    解析结果同时写入数据集缓存，转换完成后同一进程内的读取也无需再解析。
+
+    Args:
+        file_path: 文件路径
+        format: 文件格式（csv/json/xlsx/auto）
+
+    Returns:
+        旁路文件路径；已存在有效旁路文件时直接返回；转换失败时返回 None
+    """
+    existing = find_sidecar(file_path)
+    if existing is not None:
+        return str(existing)
+
+    format = _resolve_format(file_path, format)
+    df = get_dataset_cache().get_or_load(
+        file_path,
+        lambda: _parse_text_dataset(file_path, format),
+        variant=(format,)
+    )
+    sidecar = write_sidecar(file_path, df)
+    if sidecar is None:
+        return None
+
+    print(f"✅ 列式旁路文件已生成：{sidecar}")
+    return str(sidecar)
+
+
+# 日期字符串特征：2024-01-31、2024/1/31、2024-01-31 12:00:00 等
+_DATE_LIKE_PATTERN = r"^\d{4}[-/.]\d{1,2}[-/.]\d{1,2}([ T]\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?)?$"
+
+
+def _try_parse_dates(series: pd.Series, sample_size: int = 100) -> Optional[pd.Series]:
+    """如果字符串列看起来是日期，则一次性解析为 datetime；否则返回 None"""
+    non_null = series.dropna()
+    if non_null.empty:
+        return None
+
+    sample = non_null.iloc[:sample_size].astype(str)
+    if not sample.str.match(_DATE_LIKE_PATTERN).all():
+        return None
+
+    try:
+        parsed = pd.to_datetime(series, errors="coerce")
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+    # 有任何非空值解析失败时放弃，避免静默丢失数据
+    if parsed.notna().sum() != len(non_null):
+        return None
+    return parsed
+
+
+def optimize_dtypes(
+    df: pd.DataFrame,
+    category_threshold: float = 0.5,
+    parse_dates: bool = True
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    内存优化：在不丢失信息的前提下压缩列类型
+
+    - 低基数字符串列（唯一值占比 <= category_threshold）转为 category
+    - 形如日期的字符串列一次性解析为 datetime64
+    - int64 向下转换为能容纳取值范围的最小整数类型
+    - float64 仅在转换为 float32 后数值完全一致时才转换
+
+    Args:
+        df: 原始 DataFrame（不会被修改）
+        category_threshold: 转换为 category 的唯一值占比上限
+        parse_dates: 是否解析日期字符串
+
+    Returns:
+        (优化后的 DataFrame, 优化前后内存报告)
+    """
+    before_bytes = int(df.memory_usage(deep=True).sum())
+    optimized = {}
+    changes = {}
+
+    for col in df.columns:
+        series = df[col]
+        new_series = series
+
+        if pd.api.types.is_bool_dtype(series):
+            pass
+        elif pd.api.types.is_integer_dtype(series) and series.dtype == np.dtype("int64"):
+            new_series = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == np.dtype("float64"):
+            as_float32 = series.astype("float32")
+            same = (as_float32.astype("float64") == series) | series.isna()
+            if same.all():
+                new_series = as_float32
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            parsed = _try_parse_dates(series) if parse_dates else None
+            if parsed is not None:
+                new_series = parsed
+            elif len(series) > 0 and series.nunique(dropna=True) / len(series) <= category_threshold:
+                new_series = series.astype("category")
+
+        if new_series.dtype != series.dtype:
+            changes[col] = {"from": str(series.dtype), "to": str(new_series.dtype)}
+        optimized[col] = new_series
+
+    result = pd.DataFrame(optimized, index=df.index)
+    after_bytes = int(result.memory_usage(deep=True).sum())
+
+    report = {
+        "before_mb": round(before_bytes / 1024 / 1024, 4),
+        "after_mb": round(after_bytes / 1024 / 1024, 4),
+        "saved_mb": round((before_bytes - after_bytes) / 1024 / 1024, 4),
+        "reduction_pct": round((1 - after_bytes / before_bytes) * 100, 2) if before_bytes else 0.0,
+        "converted_columns": changes
+    }
+    return result, report
+
+
+def get_data_info(df: Union[pd.DataFrame, str]) -> Dict[str, Any]:
     """
     获取数据集基本信息
 
     Args:
-        df: pandas DataFrame
+        df: pandas DataFrame，或数据文件路径（直接读取数据集概要，不重新扫描）
 
     Returns:
         数据信息字典
     """
+    if isinstance(df, str):
+        profile = get_profile(df)
+        return {
+            "shape": tuple(profile["shape"]),
+            "columns": profile["columns"],
+            "dtypes": profile["dtypes"],
+            "memory_mb": profile["memory_mb"],
+            "is_empty": profile["shape"][0] == 0 or profile["shape"][1] == 0,
+            "sample": profile["preview"][:5]
+        }
+
     return {
         "shape": df.shape,
         "columns": list(df.columns),
@@ -62,22 +296,23 @@ def get_data_info(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def check_data_quality(df: pd.DataFrame) -> Dict[str, Any]:
+def check_data_quality(df: pd.DataFrame, key_columns: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     检查数据质量
 
     Args:
         df: pandas DataFrame
+        key_columns: 判断重复行时使用的关键列（None 表示整行）
 
     Returns:
         数据质量报告
     """
     # 缺失值
     missing = df.isnull().sum()
-    missing_pct = (missing / len(df) * 100).round(2)
+    missing_pct = _missing_percentage(missing, len(df))
 
-    # 重复值
-    duplicates = df.duplicated().sum()
+    # 重复值（基于行哈希，结果与 df.duplicated().sum() 一致）
+    duplicates = count_duplicates(df, subset=key_columns)["duplicates"]
 
     # 数据类型检查
     numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
@@ -100,6 +335,13 @@ def check_data_quality(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
+def _missing_percentage(missing: pd.Series, total_rows: int) -> pd.Series:
+    """各列缺失值百分比（空数据集记为 0）"""
+    if total_rows == 0:
+        return pd.Series(0.0, index=missing.index)
+    return (missing / total_rows * 100).round(2)
+
+
 def _calculate_quality_score(missing: pd.Series, duplicates: int, total_rows: int) -> str:
     """
     计算数据质量分数（A/B/C/D/E）
@@ -132,6 +374,222 @@ def _calculate_quality_score(missing: pd.Series, duplicates: int, total_rows: in
         return "E"
 
 
+def iter_dataset_chunks(
+    file_path: str,
+    chunk_size: Optional[int] = None,
+    format: str = "auto",
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    流式分块读取数据集，不一次性加载全量数据
+
+    CSV 和 JSON Lines 真正流式读取；有列式旁路文件时按批读取；
+    Excel 和普通 JSON 无法流式解析，会整体读取后再分块。
+
+    Args:
+        file_path: 文件路径
+        chunk_size: 每块行数（默认读取 settings.yaml 的 data.chunk_size）
+        format: 文件格式（csv/json/jsonl/xlsx/auto）
+        columns: 只读取这些列（None 表示全部）
+        max_rows: 最多读取的行数（None 表示不限制）
+
+    Yields:
+        每块的 DataFrame，行索引在整个文件中连续
+    """
+    chunk_size = int(chunk_size or get_setting("data.chunk_size", 10000))
+    format = _resolve_format(file_path, format)
+
+    sidecar = find_sidecar(file_path)
+    if sidecar is not None and sidecar.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        batches = (
+            batch.to_pandas()
+            for batch in pq.ParquetFile(sidecar).iter_batches(batch_size=chunk_size, columns=columns)
+        )
+    elif format == "csv":
+        batches = pd.read_csv(file_path, chunksize=chunk_size, usecols=columns)
+    elif format == "jsonl":
+        batches = pd.read_json(file_path, lines=True, chunksize=chunk_size)
+    else:
+        df = load_dataset(file_path, format)
+        if columns is not None:
+            df = df[columns]
+        batches = (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+
+    offset = 0
+    for chunk in batches:
+        if max_rows is not None and offset + len(chunk) > max_rows:
+            chunk = chunk.iloc[:max_rows - offset]
+        if columns is not None and format == "jsonl":
+            chunk = chunk[columns]
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        if len(chunk) > 0:
+            yield chunk
+        if max_rows is not None and offset >= max_rows:
+            break
+
+
+def _merge_dtypes(dtypes: List[Any]) -> Any:
+    """
+    合并各块推断出的列类型，尽量与整体读取时的推断结果一致
+
+    Args:
+        dtypes: 各块中该列的类型（已排除全空块）
+
+    Returns:
+        合并后的类型
+    """
+    unique = list(dict.fromkeys(dtypes))
+    if len(unique) == 1:
+        return unique[0]
+    if all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in unique):
+        if all(pd.api.types.is_integer_dtype(d) for d in unique):
+            return np.dtype("int64")
+        return np.dtype("float64")
+    return np.dtype("object")
+
+
+def _dtype_groups(dtypes: Dict[str, Any]) -> Dict[str, List[str]]:
+    """按与 check_data_quality 相同的规则对列类型分组"""
+    empty = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+    return {
+        "numeric_columns": empty.select_dtypes(include=[np.number]).columns.tolist(),
+        "categorical_columns": empty.select_dtypes(include=['object', 'category']).columns.tolist(),
+        "datetime_columns": empty.select_dtypes(include=['datetime64']).columns.tolist()
+    }
+
+
+def _scan_chunks(
+    file_path: str,
+    chunk_size: Optional[int] = None,
+    key_columns: Optional[List[str]] = None,
+    duplicate_method: Optional[str] = None
+) -> Dict[str, Any]:
+    """单次遍历所有块，收集 get_data_info 和 check_data_quality 所需的聚合量"""
+    columns: List[str] = []
+    chunk_dtypes: Dict[str, List[Any]] = {}
+    fallback_dtypes: Dict[str, Any] = {}
+    missing: Dict[str, int] = {}
+    column_bytes = 0
+    total_rows = 0
+    sample = None
+    duplicate_counter = DuplicateCounter(
+        subset=key_columns,
+        method=duplicate_method or get_setting("data.duplicate_method", "exact"),
+        max_memory_mb=float(get_setting("data.bloom_max_mb", 64)),
+        numeric_strings=True
+    )
+
+    for chunk in iter_dataset_chunks(file_path, chunk_size=chunk_size):
+        if sample is None:
+            columns = list(chunk.columns)
+            sample = chunk.head()
+            missing = {col: 0 for col in columns}
+            chunk_dtypes = {col: [] for col in columns}
+
+        nulls = chunk.isnull().sum()
+        for col in columns:
+            missing[col] += int(nulls[col])
+            fallback_dtypes[col] = chunk[col].dtype
+            # 全空的块无法提供类型信息，不参与类型合并
+            if nulls[col] < len(chunk):
+                chunk_dtypes[col].append(chunk[col].dtype)
+
+        column_bytes += int(chunk.memory_usage(index=False, deep=True).sum())
+        total_rows += len(chunk)
+        duplicate_counter.update(chunk)
+
+    if sample is None:
+        # 空文件：只读取表头
+        sample = pd.read_csv(file_path, nrows=0) if _resolve_format(file_path, "auto") == "csv" else pd.DataFrame()
+        columns = list(sample.columns)
+        missing = {col: 0 for col in columns}
+        fallback_dtypes = sample.dtypes.to_dict()
+
+    dtypes = {
+        col: _merge_dtypes(chunk_dtypes[col]) if chunk_dtypes.get(col) else fallback_dtypes[col]
+        for col in columns
+    }
+
+    return {
+        "columns": columns,
+        "dtypes": dtypes,
+        "missing": missing,
+        "total_rows": total_rows,
+        "memory_bytes": column_bytes + pd.RangeIndex(total_rows).memory_usage(deep=True),
+        "duplicates": duplicate_counter.duplicates,
+        "duplicate_detection": duplicate_counter.result(),
+        "sample": sample
+    }
+
+
+def get_data_info_chunked(file_path: str, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    流式版 get_data_info，适用于超过内存的大文件
+
+    memory_mb 为各块内存之和，与整体加载时的结果可能有细微差异。
+
+    Args:
+        file_path: 文件路径
+        chunk_size: 每块行数（默认读取 settings.yaml 的 data.chunk_size）
+
+    Returns:
+        与 get_data_info 相同结构的数据信息字典
+    """
+    scan = _scan_chunks(file_path, chunk_size)
+    return {
+        "shape": (scan["total_rows"], len(scan["columns"])),
+        "columns": scan["columns"],
+        "dtypes": scan["dtypes"],
+        "memory_mb": scan["memory_bytes"] / 1024 / 1024,
+        "is_empty": scan["total_rows"] == 0 or len(scan["columns"]) == 0,
+        "sample": scan["sample"].to_dict(orient='records')
+    }
+
+
+def check_data_quality_chunked(
+    file_path: str,
+    chunk_size: Optional[int] = None,
+    key_columns: Optional[List[str]] = None,
+    duplicate_method: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    流式版 check_data_quality，适用于超过内存的大文件
+
+    重复行通过逐行哈希统计：exact 方法内存约为每个不同行 8 字节；
+    bloom 方法内存固定为 data.bloom_max_mb，可能略微多计重复行。
+
+    Args:
+        file_path: 文件路径
+        chunk_size: 每块行数（默认读取 settings.yaml 的 data.chunk_size）
+        key_columns: 判断重复行时使用的关键列（None 表示整行）
+        duplicate_method: exact / bloom（默认读取 settings.yaml 的 data.duplicate_method）
+
+    Returns:
+        与 check_data_quality 相同结构的数据质量报告
+    """
+    scan = _scan_chunks(file_path, chunk_size, key_columns, duplicate_method)
+    total_rows = scan["total_rows"]
+    missing = pd.Series(scan["missing"], index=scan["columns"], dtype="int64")
+    missing_pct = _missing_percentage(missing, total_rows)
+    duplicates = scan["duplicates"]
+
+    return {
+        "total_rows": total_rows,
+        "total_columns": len(scan["columns"]),
+        "missing_values": {
+            "count": missing.to_dict(),
+            "percentage": missing_pct.to_dict()
+        },
+        "duplicates": duplicates,
+        "duplicate_rate": round(duplicates / total_rows * 100, 2) if total_rows > 0 else 0,
+        **_dtype_groups(scan["dtypes"]),
+        "quality_score": _calculate_quality_score(missing, duplicates, total_rows)
+    }
+
+
 def clean_dataset(df: pd.DataFrame, strategy: str = "simple") -> pd.DataFrame:
     """
     清理数据集
@@ -163,24 +621,174 @@ def clean_dataset(df: pd.DataFrame, strategy: str = "simple") -> pd.DataFrame:
     return df_clean
 
 
-def sample_dataset(df: pd.DataFrame, size: int = 10, random_state: int = 42) -> pd.DataFrame:
+def sample_dataset(df: Union[pd.DataFrame, str], size: int = 10, random_state: int = 42) -> pd.DataFrame:
     """
     采样数据集
 
     Args:
-        df: 原始 DataFrame
+        df: 原始 DataFrame，或数据文件路径（CSV/JSONL 通过行索引随机读取，其他格式单次流式采样，不加载全量数据）
         size: 采样大小
         random_state: 随机种子
 
     Returns:
         采样后的 DataFrame
     """
+    if isinstance(df, str):
+        if get_row_index(df) is not None:
+            # 通过行索引直接读取被抽中的行
+            return sample_rows(df, size=size, random_state=random_state)[0]
+        return reservoir_sample(df, size=size, random_state=random_state)[0]
+
     if len(df) <= size:
         return df.copy()
 
     return df.sample(n=size, random_state=random_state)
 
 
+def _proportional_allocation(counts: pd.Series, size: int) -> pd.Series:
+    """按各分层行数比例分配样本量（最大余数法，总和恰好为 size）"""
+    total = counts.sum()
+    if total <= size:
+        return counts.astype("int64")
+
+    quotas = counts * size / total
+    allocation = np.floor(quotas).astype("int64")
+    remainder = int(size - allocation.sum())
+    if remainder > 0:
+        order = (quotas - allocation).sort_values(ascending=False, kind="stable").index[:remainder]
+        allocation[order] += 1
+    return allocation
+
+
+# 分层采样遍历过程中最多保留的行数（样本行数的倍数，为分层比例的变化预留余量）
+STRATIFIED_BUFFER_FACTOR = 2
+
+
+def reservoir_sample(
+    file_path: str,
+    size: Optional[int] = None,
+    random_state: int = 42,
+    stratify_by: Optional[str] = None,
+    chunk_size: Optional[int] = None
+) -> Tuple[pd.DataFrame, int]:
+    """
+    单次流式遍历数据文件，得到有界的均匀随机样本（不加载全量数据）
+
+    为每行分配一个随机键，始终只保留键最小的 size 行（等价于蓄水池采样），
+    内存占用不超过 size + chunk_size 行。
+    分层采样时按目前为止各分层的行数比例分配 STRATIFIED_BUFFER_FACTOR × size 行的保留上限，
+    内存占用与分层个数无关；遍历结束后按各分层行数比例分配样本量。
+    分层比例在文件后部变化超过预留余量时，个别分层的样本可能略少于按比例应得的行数。
+
+    Args:
+        file_path: 数据文件路径
+        size: 样本行数（默认读取 settings.yaml 的 data.sample_size）
+        random_state: 随机种子
+        stratify_by: 分层列名（None 表示简单随机采样）
+        chunk_size: 每块行数（默认读取 settings.yaml 的 data.chunk_size）
+
+    Returns:
+        (按原始行顺序排列的样本, 数据集总行数)
+    """
+    size = int(size or get_setting("data.sample_size", 1000))
+    rng = np.random.default_rng(random_state)
+
+    kept: Optional[pd.DataFrame] = None
+    kept_keys = np.empty(0)
+    strata_counts = pd.Series(dtype="int64")
+    total_rows = 0
+
+    def stratum_codes(frame: pd.DataFrame) -> np.ndarray:
+        # 空值作为独立分层
+        return pd.factorize(frame[stratify_by], use_na_sentinel=False)[0]
+
+    def stratum_limits(frame: pd.DataFrame, allocation: pd.Series) -> np.ndarray:
+        # 每行所属分层分配到的行数（空值分层在 allocation 中的键为 NaN）
+        return frame[stratify_by].map(allocation).fillna(allocation.get(np.nan, 0)).to_numpy()
+
+    for chunk in iter_dataset_chunks(file_path, chunk_size=chunk_size):
+        total_rows += len(chunk)
+        keys = rng.random(len(chunk))
+        combined = chunk if kept is None else pd.concat([kept, chunk])
+        combined_keys = np.concatenate([kept_keys, keys])
+
+        if stratify_by is None:
+            if len(combined) > size:
+                keep = np.argpartition(combined_keys, size - 1)[:size]
+                combined, combined_keys = combined.iloc[keep], combined_keys[keep]
+        else:
+            counts = chunk[stratify_by].value_counts(dropna=False)
+            strata_counts = strata_counts.add(counts, fill_value=0)
+            # 各分层保留键最小的若干行，总数不超过 STRATIFIED_BUFFER_FACTOR × size
+            allocation = _proportional_allocation(strata_counts, STRATIFIED_BUFFER_FACTOR * size)
+            ranks = pd.Series(combined_keys).groupby(stratum_codes(combined)).rank(method="first").to_numpy()
+            keep = ranks <= stratum_limits(combined, allocation)
+            combined, combined_keys = combined[keep], combined_keys[keep]
+
+        kept, kept_keys = combined, combined_keys
+
+    if kept is None:
+        return load_dataset(file_path).head(0), 0
+
+    if stratify_by is not None and total_rows > size:
+        allocation = _proportional_allocation(strata_counts, size)
+        ranks = pd.Series(kept_keys).groupby(stratum_codes(kept)).rank(method="first").to_numpy()
+        kept = kept[ranks <= stratum_limits(kept, allocation)]
+
+    return kept.sort_index(), total_rows
+
+
+def load_bounded_dataset(
+    file_path: str,
+    max_rows: Optional[int] = None,
+    sample_size: Optional[int] = None,
+    random_state: int = 42
+) -> Tuple[pd.DataFrame, int]:
+    """
+    加载数据集，行数超过 max_rows 时只返回随机样本
+
+    全量数据已在缓存中时直接采样；CSV/JSONL 通过行索引只读取被抽中的行；
+    其他可流式读取的文件做一次蓄水池采样，不会把超大文件整体读入内存。
+
+    Args:
+        file_path: 数据文件路径
+        max_rows: 不采样的最大行数（默认读取 settings.yaml 的 data.max_rows）
+        sample_size: 超过阈值时的样本行数（默认读取 settings.yaml 的 data.sample_size）
+        random_state: 随机种子
+
+    Returns:
+        (DataFrame, 数据集总行数)
+    """
+    max_rows = int(max_rows or get_setting("data.max_rows", 100000))
+    sample_size = min(int(sample_size or get_setting("data.sample_size", 1000)), max_rows)
+    format = _resolve_format(file_path, "auto")
+
+    full = get_dataset_cache().peek(file_path, variant=(format,))
+    if full is None and format not in ["csv", "jsonl"] and find_sidecar(file_path) is None:
+        # Excel / 普通 JSON 无法流式解析
+        full = load_dataset(file_path, format)
+
+    if full is not None:
+        if len(full) <= max_rows:
+            return full, len(full)
+        return full.sample(n=sample_size, random_state=random_state).sort_index(), len(full)
+
+    offsets = get_row_index(file_path)
+    if offsets is not None:
+        # 行索引直接给出总行数，超过阈值时只读取被抽中的行
+        total_rows = len(offsets) - 1
+        if total_rows <= max_rows:
+            return load_dataset(file_path, format), total_rows
+        return sample_rows(file_path, size=sample_size, random_state=random_state)
+
+    # 蓄水池保留 max_rows 行：总行数不超过阈值时即为全量数据，
+    # 否则从中再均匀抽取 sample_size 行（均匀样本的均匀子样本仍是均匀样本）
+    reservoir, total_rows = reservoir_sample(file_path, size=max_rows, random_state=random_state)
+    if total_rows <= max_rows:
+        return reservoir, total_rows
+    return reservoir.sample(n=sample_size, random_state=random_state).sort_index(), total_rows
+
+
 if __name__ == "__main__":
     # 快速测试
     print("=== 数据工具测试 ===\n")
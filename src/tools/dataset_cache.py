@@ -0,0 +1,237 @@
+"""
+进程级数据集缓存
+
+所有 @tool 函数和 load_dataset 共享同一份已解析的 DataFrame，
+避免一次分析中对同一个文件重复解析十几次。
+
+缓存键：(绝对路径, 文件大小, mtime, 内容哈希, 读取变体)
+- 文件被修改后 size/mtime/哈希 任一变化都会导致缓存失效
+- 内容哈希按 (路径, 大小, mtime) 记忆，同一版本的文件只计算一次
+
+内存预算通过环境变量 DATASET_CACHE_MAX_MB 配置（默认 2048 MB），
+超出预算时按 LRU 顺序淘汰。
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+
+# 读取文件计算哈希时的块大小
+_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# (绝对路径, 大小, mtime_ns) -> 内容哈希
+_content_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_content_hash_lock = threading.Lock()
+
+
+def file_content_hash(file_path: str) -> str:
+    """
+    计算文件内容哈希（blake2b），同一文件版本只计算一次
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        十六进制哈希字符串
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+
+    with _content_hash_lock:
+        cached = _content_hash_memo.get(memo_key)
+    if cached is not None:
+        return cached
+
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    digest = hasher.hexdigest()
+
+    with _content_hash_lock:
+        _content_hash_memo[memo_key] = digest
+    return digest
+
+
+def dataset_fingerprint(file_path: str) -> Tuple[str, int, int, str]:
+    """
+    获取数据集版本指纹
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        (绝对路径, 文件大小, mtime_ns, 内容哈希)
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    return (path, stat.st_size, stat.st_mtime_ns, file_content_hash(path))
+
+
+def _frame_nbytes(df: pd.DataFrame) -> int:
+    """估算 DataFrame 占用的内存（字节）"""
+    try:
+        return int(df.memory_usage(deep=True).sum())
+    except Exception:
+        return int(df.memory_usage(deep=False).sum())
+
+
+class DatasetCache:
+    """带内存预算的 LRU 数据集缓存（线程安全）"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        # 每个键一把加载锁，避免多个线程同时解析同一个文件
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _put(self, key: Hashable, df: pd.DataFrame) -> None:
+        nbytes = _frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+            # 单个数据集超过整个预算时不缓存
+            if nbytes > self.max_bytes:
+                return
+
+            while self._entries and self.current_bytes + nbytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+            self._entries[key] = (df, nbytes)
+            self.current_bytes += nbytes
+
+    def peek(self, file_path: str, variant: Hashable = None) -> Optional[pd.DataFrame]:
+        """
+        只查询缓存，不触发加载（命中时计入 hits）
+
+        Args:
+            file_path: 数据文件路径
+            variant: 读取变体
+
+        Returns:
+            缓存对象的浅拷贝；未命中时返回 None
+        """
+        df = self._get(dataset_fingerprint(file_path) + (variant,))
+        if df is None:
+            return None
+        with self._lock:
+            self.hits += 1
+        return df.copy(deep=False)
+
+    def get_or_load(
+        self,
+        file_path: str,
+        loader: Callable[[], pd.DataFrame],
+        variant: Hashable = None
+    ) -> pd.DataFrame:
+        """
+        从缓存获取数据集，未命中时调用 loader 解析并写入缓存
+
+        返回的是缓存对象的浅拷贝：整列赋值不会影响缓存，
+        但调用方不应对返回值做原地修改（如 df.loc[...] = ...）。
+
+        Args:
+            file_path: 数据文件路径
+            loader: 未命中时的加载函数
+            variant: 读取变体（如格式、列子集），作为缓存键的一部分
+
+        Returns:
+            pandas DataFrame
+        """
+        key = dataset_fingerprint(file_path) + (variant,)
+
+        df = self._get(key)
+        if df is not None:
+            with self._lock:
+                self.hits += 1
+            return df.copy(deep=False)
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        try:
+            with load_lock:
+                # 等锁期间可能已被其他线程加载
+                df = self._get(key)
+                if df is not None:
+                    with self._lock:
+                        self.hits += 1
+                    return df.copy(deep=False)
+
+                with self._lock:
+                    self.misses += 1
+                df = loader()
+                self._put(key, df)
+        finally:
+            with self._lock:
+                self._load_locks.pop(key, None)
+
+        return df.copy(deep=False)
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """
+        清除缓存
+
+        Args:
+            file_path: 只清除该文件的所有版本；为 None 时清空全部
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+
+            path = os.path.abspath(file_path)
+            for key in [k for k in self._entries if k[0] == path]:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "current_mb": round(self.current_bytes / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total * 100, 2) if total else 0.0
+            }
+
+
+# 全局缓存实例（单例模式）
+_global_cache: Optional[DatasetCache] = None
+_global_cache_lock = threading.Lock()
+
+
+def get_dataset_cache() -> DatasetCache:
+    """获取进程级数据集缓存实例"""
+    global _global_cache
+    if _global_cache is None:
+        with _global_cache_lock:
+            if _global_cache is None:
+                max_mb = float(os.getenv("DATASET_CACHE_MAX_MB", "2048"))
+                _global_cache = DatasetCache(max_bytes=int(max_mb * 1024 * 1024))
+    return _global_cache
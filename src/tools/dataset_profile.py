@@ -0,0 +1,427 @@
+"""
+数据集概要（Profile）
+
+每个数据集版本只扫描一次，生成 JSON 概要并保存在原文件旁边：
+    data.csv -> data.csv.profile.json
+
+包含：规模、列类型、缺失值、重复行、数值列 describe 统计、高频取值和数据预览。
+数据探索相关工具直接读取概要，不再重新扫描数据。
+概要中记录源文件指纹（大小 + 内容哈希），源文件变化后自动重建。
+
+对只追加写入的 CSV，概要同时记录已覆盖的字节偏移和行数，以及可合并的聚合量
+（计数、求和、中心矩、缺失数、最小/最大值）和行哈希集合（<file>.rowhash.npz）。
+文件被追加后只解析新增部分并合并统计；如果已覆盖部分的内容发生变化则完整重建。
+"""
+import hashlib
+import io
+import json
+import math
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.tools.columnar_store import sidecar_path
+from src.tools.dataset_cache import dataset_fingerprint
+from src.tools.duplicates import row_hashes
+from src.tools.stats_kernels import column_moments, merge_moments, moments_to_stats
+
+
+PROFILE_VERSION = 3
+PROFILE_SUFFIX = ".profile.json"
+ROW_HASH_SUFFIX = ".rowhash.npz"
+
+# describe 中的分位数（增量更新时无法合并）
+DESCRIBE_QUANTILE_KEYS = ("25%", "50%", "75%")
+
+_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# 预览行数和每列高频取值个数
+PREVIEW_ROWS = 10
+TOP_VALUES = 10
+
+# 指纹 -> 概要（进程内缓存，避免重复读取 JSON）
+_profile_memo: Dict[tuple, Dict[str, Any]] = {}
+_profile_lock = threading.Lock()
+
+
+def to_jsonable(value: Any) -> Any:
+    """将 numpy/pandas 类型递归转换为 JSON 可序列化的 Python 类型（NaN 转为 None）"""
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _source_fingerprint(file_path: str) -> Dict[str, Any]:
+    _, size, _, content_hash = dataset_fingerprint(file_path)
+    return {"size": size, "content_hash": content_hash}
+
+
+def profile_from_frame(df: pd.DataFrame, unique_hashes: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    从内存中的 DataFrame 生成概要
+
+    Args:
+        df: pandas DataFrame
+        unique_hashes: 已计算好的去重行哈希（np.unique(row_hashes(df))，避免重复计算）
+
+    Returns:
+        概要字典（不含源文件指纹）
+    """
+    if unique_hashes is None:
+        unique_hashes = np.unique(row_hashes(df))
+    null_counts = df.isnull().sum()
+    numeric = df.select_dtypes(include=[np.number])
+
+    top_values = {}
+    for col in df.columns:
+        if col in numeric.columns:
+            continue
+        counts = df[col].value_counts(dropna=True).head(TOP_VALUES)
+        top_values[col] = [{"value": value, "count": int(count)} for value, count in counts.items()]
+
+    return to_jsonable({
+        "version": PROFILE_VERSION,
+        "shape": [len(df), len(df.columns)],
+        "aggregates": {col: column_moments(numeric[col].to_numpy(dtype="float64", na_value=np.nan))
+                       for col in numeric.columns},
+        # describe 中的分位数覆盖的行数（增量更新后分位数不再是最新的）
+        "quantiles_rows": len(df),
+        "columns": list(df.columns),
+        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "memory_mb": df.memory_usage(deep=True).sum() / 1024 / 1024,
+        "null_counts": null_counts.to_dict(),
+        "duplicates": len(df) - len(unique_hashes),
+        "numeric_columns": numeric.columns.tolist(),
+        "describe": numeric.describe().to_dict() if len(numeric.columns) > 0 else {},
+        "top_values": top_values,
+        "preview": df.head(PREVIEW_ROWS).to_dict(orient='records')
+    })
+
+
+def build_profile(file_path: str, save: bool = True) -> Dict[str, Any]:
+    """
+    扫描数据集生成概要（并保存为旁路 JSON 文件）
+
+    Args:
+        file_path: 数据文件路径
+        save: 是否保存到 <file>.profile.json
+
+    Returns:
+        概要字典
+    """
+    from src.tools.data_loader import _resolve_format, load_dataset
+
+    fingerprint = dataset_fingerprint(file_path)
+    df = load_dataset(file_path)
+    unique_hashes = np.unique(row_hashes(df))
+    profile = profile_from_frame(df, unique_hashes)
+    profile["source"] = _source_fingerprint(file_path)
+    profile["coverage"] = None
+
+    # 以换行结尾的 CSV 支持增量更新
+    if _resolve_format(file_path, "auto") == "csv" and _ends_with_newline(file_path):
+        covered = fingerprint[1]
+        profile["coverage"] = {
+            "bytes": covered,
+            "rows": len(df),
+            "prefix_hash": _prefix_hashes(file_path, [covered])[0]
+        }
+        if save:
+            _save_row_hashes(file_path, unique_hashes, covered)
+
+    if save:
+        save_profile(file_path, profile)
+
+    with _profile_lock:
+        _profile_memo[fingerprint] = profile
+    return profile
+
+
+def save_profile(file_path: str, profile: Dict[str, Any]) -> None:
+    """原子写入概要 JSON 文件"""
+    target = sidecar_path(file_path, PROFILE_SUFFIX)
+    tmp_target = sidecar_path(file_path, PROFILE_SUFFIX + ".tmp")
+    try:
+        with open(tmp_target, "w", encoding="utf-8") as f:
+            json.dump(profile, f, ensure_ascii=False)
+        os.replace(tmp_target, target)
+    except OSError as e:
+        # 数据目录只读时仍可使用进程内概要
+        print(f"⚠️  数据集概要保存失败：{str(e)}")
+
+
+def _ends_with_newline(file_path: str) -> bool:
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _prefix_hashes(file_path: str, offsets: List[int]) -> List[str]:
+    """单次读取文件，计算多个前缀 [0, offset) 的内容哈希（offsets 须升序）"""
+    hasher = hashlib.blake2b(digest_size=16)
+    digests = []
+    position = 0
+    with open(file_path, "rb") as f:
+        for offset in offsets:
+            while position < offset:
+                block = f.read(min(_HASH_BLOCK_SIZE, offset - position))
+                if not block:
+                    break
+                hasher.update(block)
+                position += len(block)
+            digests.append(hasher.copy().hexdigest())
+    return digests
+
+
+def _save_row_hashes(file_path: str, hashes: np.ndarray, covered_bytes: int) -> None:
+    """保存已覆盖行的哈希集合及其覆盖的字节数"""
+    target = sidecar_path(file_path, ROW_HASH_SUFFIX)
+    tmp_target = sidecar_path(file_path, ROW_HASH_SUFFIX + ".tmp")
+    try:
+        with open(tmp_target, "wb") as f:
+            np.savez(f, hashes=hashes, covered_bytes=np.int64(covered_bytes))
+        os.replace(tmp_target, target)
+    except OSError as e:
+        print(f"⚠️  行哈希保存失败：{str(e)}")
+
+
+def _load_row_hashes(file_path: str, covered_bytes: int) -> Optional[np.ndarray]:
+    """读取行哈希集合；覆盖的字节数与概要不一致（两者未一起保存成功）时返回 None"""
+    target = sidecar_path(file_path, ROW_HASH_SUFFIX)
+    if not target.exists():
+        return None
+    try:
+        with np.load(target) as stored:
+            if int(stored["covered_bytes"]) != covered_bytes:
+                return None
+            return stored["hashes"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _read_profile_file(file_path: str) -> Optional[Dict[str, Any]]:
+    """读取已保存的概要（不检查是否与源文件匹配）"""
+    target = sidecar_path(file_path, PROFILE_SUFFIX)
+    if not target.exists():
+        return None
+    try:
+        with open(target, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return profile if profile.get("version") == PROFILE_VERSION else None
+
+
+def update_profile_incremental(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    只解析追加到 CSV 末尾的新行，合并到已保存的概要中
+
+    以下情况返回 None（调用方应完整重建）：
+    没有已保存的概要或行哈希、文件变短、已覆盖部分的内容被修改、
+    新增数据使数值列变为非数值列。
+
+    Args:
+        file_path: 数据文件路径
+
+    Returns:
+        更新后的概要；无法增量更新时返回 None
+    """
+    stored = _read_profile_file(file_path)
+    if stored is None or not stored.get("coverage"):
+        return None
+
+    coverage = stored["coverage"]
+    size = os.path.getsize(file_path)
+    if size < coverage["bytes"]:
+        return None
+
+    with open(file_path, "rb") as f:
+        f.seek(coverage["bytes"])
+        appended = f.read(size - coverage["bytes"])
+    # 只处理完整的行（追加写入可能尚未结束）
+    appended = appended[:appended.rfind(b"\n") + 1]
+    new_covered = coverage["bytes"] + len(appended)
+
+    old_prefix, new_prefix = _prefix_hashes(file_path, [coverage["bytes"], new_covered])
+    if old_prefix != coverage["prefix_hash"]:
+        # 已覆盖部分被修改，不是单纯追加
+        return None
+
+    known_hashes = _load_row_hashes(file_path, coverage["bytes"])
+    if known_hashes is None:
+        return None
+
+    profile = dict(stored)
+    profile["source"] = _source_fingerprint(file_path)
+    if not appended:
+        return profile
+
+    columns = stored["columns"]
+    # 非数值列按字符串解析，与完整读取时的取值一致（"001" 不会被单独推断为 1），行哈希才能与已有的对应
+    text_columns = {col: str for col in columns if pd.api.types.is_string_dtype(stored["dtypes"][col])}
+    new_rows = pd.read_csv(io.BytesIO(appended), header=None, names=columns, index_col=False, dtype=text_columns)
+    new_rows.index = pd.RangeIndex(coverage["rows"], coverage["rows"] + len(new_rows))
+
+    # 数值列追加了非数值数据时，类型推断结果会变化，需要完整重建
+    numeric_columns = set(stored["numeric_columns"])
+    for col in numeric_columns:
+        series = new_rows[col]
+        if series.notna().any() and (not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)):
+            return None
+
+    dtypes = dict(stored["dtypes"])
+    aggregates = dict(stored["aggregates"])
+    describe = {col: dict(stats) for col, stats in stored["describe"].items()}
+    for col in stored["numeric_columns"]:
+        values = new_rows[col].to_numpy(dtype="float64", na_value=np.nan)
+        aggregates[col] = merge_moments(aggregates[col], column_moments(values))
+        if dtypes[col].startswith("int") and np.isnan(values).any():
+            dtypes[col] = "float64"
+        elif pd.api.types.is_float_dtype(new_rows[col]):
+            dtypes[col] = "float64"
+
+        merged = moments_to_stats(aggregates[col])
+        describe[col].update({key: merged[key] for key in ["count", "mean", "std", "min", "max"]})
+        # 分位数无法增量合并，去掉旧数据上的分位数（需要时按 quantiles_rows 判断后重新计算）
+        for key in DESCRIBE_QUANTILE_KEYS:
+            describe[col].pop(key, None)
+
+    null_counts = {col: stored["null_counts"][col] + int(count)
+                   for col, count in new_rows.isnull().sum().items()}
+
+    top_values = {}
+    for col, entries in stored["top_values"].items():
+        counts = {entry["value"]: entry["count"] for entry in entries}
+        for value, count in new_rows[col].value_counts(dropna=True).items():
+            key = to_jsonable(value)
+            counts[key] = counts.get(key, 0) + int(count)
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:TOP_VALUES]
+        top_values[col] = [{"value": value, "count": count} for value, count in ranked]
+
+    new_hashes = row_hashes(new_rows)
+    unique_new = np.unique(new_hashes)
+    new_duplicates = (len(new_hashes) - len(unique_new)
+                      + int(np.isin(unique_new, known_hashes, assume_unique=True).sum()))
+    # 行哈希记录覆盖的字节数：概要保存失败后重试时与旧概要不匹配，会完整重建而不是重复计数
+    _save_row_hashes(file_path, np.union1d(known_hashes, unique_new), new_covered)
+
+    rows = coverage["rows"] + len(new_rows)
+    profile.update(to_jsonable({
+        "shape": [rows, len(columns)],
+        "dtypes": dtypes,
+        "memory_mb": stored["memory_mb"] + new_rows.memory_usage(index=False, deep=True).sum() / 1024 / 1024,
+        "null_counts": null_counts,
+        "duplicates": stored["duplicates"] + new_duplicates,
+        "aggregates": aggregates,
+        "describe": describe,
+        "top_values": top_values,
+        # 高频取值只基于之前的前 N 个取值与新增行合并，是近似结果
+        "top_values_approximate": True,
+        "coverage": {"bytes": new_covered, "rows": rows, "prefix_hash": new_prefix}
+    }))
+    return profile
+
+
+def load_profile(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取与源文件当前版本匹配的概要
+
+    Args:
+        file_path: 数据文件路径
+
+    Returns:
+        概要字典；不存在或已过期时返回 None
+    """
+    fingerprint = dataset_fingerprint(file_path)
+    with _profile_lock:
+        cached = _profile_memo.get(fingerprint)
+    if cached is not None:
+        return cached
+
+    profile = _read_profile_file(file_path)
+    if profile is None or profile.get("source") != _source_fingerprint(file_path):
+        return None
+
+    with _profile_lock:
+        _profile_memo[fingerprint] = profile
+    return profile
+
+
+def get_profile(file_path: str) -> Dict[str, Any]:
+    """
+    获取数据集概要：优先使用已保存的概要，否则扫描生成
+
+    Args:
+        file_path: 数据文件路径
+
+    Returns:
+        概要字典
+    """
+    profile = load_profile(file_path)
+    if profile is not None:
+        return profile
+
+    profile = update_profile_incremental(file_path)
+    if profile is None:
+        return build_profile(file_path)
+
+    save_profile(file_path, profile)
+    with _profile_lock:
+        _profile_memo[dataset_fingerprint(file_path)] = profile
+    return profile
+
+
+def column_statistics(file_path: str, column: str) -> Optional[Dict[str, Any]]:
+    """
+    从概要中读取数值列的描述统计（增量更新后仍保持最新）
+
+    Args:
+        file_path: 数据文件路径
+        column: 列名
+
+    Returns:
+        {count, mean, std, var, min, max, skewness, kurtosis, nulls, quantiles}，
+        quantiles 在增量更新后不再准确，此时为 None；
+        列不存在或不是数值列时返回 None
+    """
+    profile = get_profile(file_path)
+    aggregates = profile.get("aggregates", {}).get(column)
+    if aggregates is None:
+        return None
+
+    stats = moments_to_stats(aggregates)
+    stats["nulls"] = aggregates["nulls"]
+    stats["quantiles"] = None
+    if profile.get("quantiles_rows") == profile["shape"][0]:
+        describe = profile["describe"].get(column, {})
+        stats["quantiles"] = {q: describe.get(f"{int(q * 100)}%") for q in (0.25, 0.5, 0.75)}
+    return stats
+
+
+def quality_score(profile: Dict[str, Any]) -> str:
+    """按缺失单元格占比计算数据质量评分（A/B/C）"""
+    rows, cols = profile["shape"]
+    total_cells = rows * cols
+    if total_cells == 0:
+        return "C"
+    missing_ratio = sum(profile["null_counts"].values()) / total_cells
+    return "A" if missing_ratio < 0.01 else "B" if missing_ratio < 0.05 else "C"
@@ -0,0 +1,268 @@
+"""
+基于行哈希的流式重复行检测
+
+每行计算一个 64 位哈希（跨块一致），逐块判断是否出现过：
+- exact：保存所有不同行的哈希（分层有序数组，内存约 8 字节/行），结果与 df.duplicated().sum() 一致
+  （仅在 64 位哈希碰撞时可能多计，千万行的碰撞概率约 3e-6）
+- bloom：使用固定内存上限的 Bloom 过滤器，可能把少量新行误判为重复（多计），不会漏计
+
+支持只按部分关键列判断重复。
+"""
+import math
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+DUPLICATE_METHODS = ("exact", "bloom")
+
+# 空值和非字符串对象的标记前缀（不能用 \x00：hash_array 按 C 字符串处理，会在 \x00 处截断）
+_TAG = "\x1f"
+_NULL_HASH = pd.util.hash_array(np.array([_TAG + "<NA>"], dtype=object))[0]
+
+
+def _numeric_hash(values: np.ndarray) -> np.ndarray:
+    """数值哈希：整数值（包括浮点形式的整数）按 int64，其他按 float64（-0.0 归一为 0.0）"""
+    values = np.asarray(values, dtype="float64") + 0.0
+    integral = np.isfinite(values) & (np.floor(values) == values) & (np.abs(values) < 2 ** 63)
+    int_values = np.where(integral, values, 0).astype("int64")
+    return np.where(integral, pd.util.hash_array(int_values), pd.util.hash_array(values))
+
+
+def _object_hash(uniques: np.ndarray, numeric_strings: bool = False) -> np.ndarray:
+    """
+    非数值列取值的哈希
+
+    字符串按字符串哈希；数值对象按数值哈希（1 与 1.0 相同，与 pandas 判断相等的规则一致）；
+    其他对象按“类型名 + str()”哈希，不会与内容相同的字符串混淆。
+
+    numeric_strings=True 时能解析为数值的字符串也按数值哈希：分块读取文件时，同一列在某些块中
+    因为个别非数值取值被推断为字符串列，其余块中为数值列，需要让同一取值的哈希一致。
+    """
+    is_str = np.fromiter((isinstance(value, str) for value in uniques), dtype=bool, count=len(uniques))
+    is_number = np.fromiter(
+        (isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)) for value in uniques),
+        dtype=bool,
+        count=len(uniques)
+    )
+    tagged = np.array(
+        [value if string else f"{_TAG}{type(value).__name__}:{value}" for value, string in zip(uniques, is_str)],
+        dtype=object
+    )
+    hashes = pd.util.hash_array(tagged) if len(tagged) else np.zeros(0, dtype=np.uint64)
+
+    numeric = is_number | (is_str if numeric_strings else False)
+    if numeric.any():
+        parsed = pd.to_numeric(pd.Series(uniques[numeric], dtype=object), errors="coerce").to_numpy(
+            dtype="float64", na_value=np.nan
+        )
+        valid = ~np.isnan(parsed)
+        hashes[np.flatnonzero(numeric)[valid]] = _numeric_hash(parsed[valid])
+    return hashes
+
+
+def value_hashes(series: pd.Series, numeric_strings: bool = False) -> np.ndarray:
+    """
+    一列取值的 64 位哈希（整数与浮点数逐个取值规范化，与所在块推断出的数值类型无关）
+
+    - 整数值（包括浮点形式的整数）按 int64 哈希
+    - 其他数值按 float64 哈希（-0.0 归一为 0.0）
+    - 非数值列的取值按 _object_hash 哈希（"001" 与 "1"、"1" 与 1 不同，与 df.duplicated 一致），空值使用统一标记
+
+    Args:
+        series: 一列取值
+        numeric_strings: 能解析为数值的字符串按数值哈希（只用于分块读取文件，见 _object_hash）
+    """
+    null_mask = series.isna().to_numpy()
+    if pd.api.types.is_integer_dtype(series) and not null_mask.any():
+        hashes = pd.util.hash_array(series.to_numpy(dtype="int64"))
+    elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        hashes = _numeric_hash(series.to_numpy(dtype="float64", na_value=np.nan))
+    else:
+        # 先去重再哈希，重复取值多的字符串列只需哈希一次
+        codes, uniques = pd.factorize(series)
+        unique_hash = _object_hash(np.asarray(uniques, dtype=object), numeric_strings)
+        hashes = unique_hash[np.maximum(codes, 0)] if len(unique_hash) else np.zeros(len(codes), dtype=np.uint64)
+    # 空值无论所在块推断为何种类型，都使用同一个哈希
+    hashes[null_mask] = _NULL_HASH
+    return hashes
+
+
+def row_hashes(chunk: pd.DataFrame, subset: Optional[List[str]] = None, numeric_strings: bool = False) -> np.ndarray:
+    """
+    计算每行的 64 位哈希，跨块保持一致（同一行在不同块中推断为整数或浮点时哈希相同，
+    各列取值的哈希规则见 value_hashes）
+
+    Args:
+        chunk: 数据块
+        subset: 只使用这些列（None 表示全部列）
+        numeric_strings: 能解析为数值的字符串按数值哈希（只用于分块读取文件）
+    """
+    if subset is not None:
+        chunk = chunk[subset]
+
+    hashed = {i: value_hashes(chunk.iloc[:, i], numeric_strings) for i in range(chunk.shape[1])}
+    return pd.util.hash_pandas_object(pd.DataFrame(hashed, index=chunk.index), index=False).to_numpy()
+
+
+class _SortedHashSet:
+    """精确哈希集合：若干层有序数组，层大小按 2 倍递增，合并代价均摊为 O(log n)"""
+
+    def __init__(self):
+        self.levels: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        present = np.zeros(len(hashes), dtype=bool)
+        for level in self.levels:
+            if len(level) == 0:
+                continue
+            positions = np.minimum(np.searchsorted(level, hashes), len(level) - 1)
+            present |= level[positions] == hashes
+        return present
+
+    def add(self, unique_hashes: np.ndarray) -> None:
+        """加入互不相同且不在集合中的哈希"""
+        if len(unique_hashes) == 0:
+            return
+        merged = np.sort(unique_hashes)
+        while self.levels and len(self.levels[-1]) <= len(merged):
+            merged = np.sort(np.concatenate([self.levels.pop(), merged]), kind="mergesort")
+        self.levels.append(merged)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels)
+
+
+class _BloomFilter:
+    """Bloom 过滤器（双重哈希：第 i 个位置为 h1 + i * h2）"""
+
+    def __init__(self, max_memory_mb: float, expected_rows: Optional[int] = None):
+        self.bits = max(int(max_memory_mb * 1024 * 1024 * 8), 64)
+        self.array = np.zeros((self.bits + 7) // 8, dtype=np.uint8)
+        if expected_rows:
+            self.k = max(1, min(16, int(round(self.bits / expected_rows * math.log(2)))))
+        else:
+            self.k = 7
+        self.inserted = 0
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype(np.uint64)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.k, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.bits)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        positions = self._positions(hashes)
+        bits = (self.array[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def add(self, unique_hashes: np.ndarray) -> None:
+        positions = self._positions(unique_hashes).ravel()
+        np.bitwise_or.at(self.array, positions >> np.uint64(3),
+                         np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        self.inserted += len(unique_hashes)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """按当前已插入行数估计的误判率"""
+        return (1 - math.exp(-self.k * self.inserted / self.bits)) ** self.k
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+
+class DuplicateCounter:
+    """
+    逐块统计重复行数（与 df.duplicated(subset).sum() 的语义一致：每组相同行中第一行之外的都计为重复）
+
+    Args:
+        subset: 关键列（None 表示整行）
+        method: exact（精确哈希集合）或 bloom（Bloom 过滤器，内存固定）
+        max_memory_mb: Bloom 过滤器的内存上限
+        expected_rows: 预计行数（用于选择 Bloom 过滤器的哈希函数个数）
+        numeric_strings: 能解析为数值的字符串按数值哈希（分块读取文件时使用，见 value_hashes）
+    """
+
+    def __init__(
+        self,
+        subset: Optional[List[str]] = None,
+        method: str = "exact",
+        max_memory_mb: float = 64,
+        expected_rows: Optional[int] = None,
+        numeric_strings: bool = False
+    ):
+        if method not in DUPLICATE_METHODS:
+            raise ValueError(f"不支持的重复检测方法：{method}")
+        self.subset = subset
+        self.method = method
+        self.numeric_strings = numeric_strings
+        self.rows = 0
+        self.duplicates = 0
+        self._seen = _SortedHashSet() if method == "exact" else _BloomFilter(max_memory_mb, expected_rows)
+
+    def update(self, chunk: pd.DataFrame) -> int:
+        """加入一个数据块，返回该块中的重复行数"""
+        hashes = row_hashes(chunk, self.subset, self.numeric_strings)
+        unique = np.unique(hashes)
+        seen = self._seen.contains(unique) if len(unique) else np.zeros(0, dtype=bool)
+        self._seen.add(unique[~seen])
+
+        chunk_duplicates = len(hashes) - int((~seen).sum())
+        self.rows += len(hashes)
+        self.duplicates += chunk_duplicates
+        return chunk_duplicates
+
+    def result(self) -> Dict[str, Any]:
+        """汇总结果"""
+        result = {
+            "rows": self.rows,
+            "duplicates": self.duplicates,
+            "duplicate_rate": round(self.duplicates / self.rows * 100, 2) if self.rows else 0,
+            "key_columns": self.subset,
+            "method": self.method,
+            "approximate": self.method == "bloom",
+            "memory_mb": round(self._seen.nbytes / 1024 / 1024, 2)
+        }
+        if self.method == "bloom":
+            result["false_positive_rate"] = self._seen.false_positive_rate
+        return result
+
+
+def count_duplicates(
+    source: Union[pd.DataFrame, str],
+    subset: Optional[List[str]] = None,
+    method: str = "exact",
+    max_memory_mb: float = 64,
+    chunk_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    统计重复行
+
+    Args:
+        source: DataFrame 或数据文件路径（文件逐块读取，只解析关键列）
+        subset: 关键列（None 表示整行）
+        method: exact / bloom
+        max_memory_mb: Bloom 过滤器的内存上限
+        chunk_size: 每块行数（默认读取 settings.yaml 的 data.chunk_size）
+
+    Returns:
+        {rows, duplicates, duplicate_rate, key_columns, method, approximate, memory_mb[, false_positive_rate]}
+    """
+    if isinstance(source, pd.DataFrame):
+        counter = DuplicateCounter(subset, method, max_memory_mb, expected_rows=len(source))
+        counter.update(source)
+        return counter.result()
+
+    from src.tools.data_loader import iter_dataset_chunks
+
+    # 不同块中同一列的推断类型可能不同（字符串/数值），能解析为数值的字符串按数值对应
+    counter = DuplicateCounter(subset, method, max_memory_mb, numeric_strings=True)
+    for chunk in iter_dataset_chunks(source, chunk_size=chunk_size, columns=subset):
+        counter.update(chunk)
+    return counter.result()
@@ -0,0 +1,458 @@
+"""
+本地数值预测
+
+对按周期重采样后的序列做确定性的预测（不调用 LLM，结果可复现）：
+- linear：最小二乘直线外推，预测区间按回归预测的标准误差计算
+- holt：Holt 线性趋势指数平滑
+- holt_winters：Holt-Winters 加法季节指数平滑
+- auto：数据至少覆盖两个季节周期时使用 holt_winters，否则使用 holt（少于 3 个周期时使用 linear）
+
+多条序列放在同一个二维数组（周期 × 序列）中一起拟合：平滑参数在网格上搜索，
+所有参数组合 × 所有序列在每个时间步一次向量化更新，按一步预测误差平方和为每条序列选择参数。
+指数平滑的预测区间使用对应 ETS 模型的解析方差公式。
+"""
+import re
+import warnings
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.tools.trend_engine import (
+    RESAMPLE_AGGREGATIONS, RESAMPLE_FREQUENCIES, date_order, future_periods, get_date_order, period_slots,
+    resample_sorted
+)
+
+
+FORECAST_METHODS = ("auto", "linear", "holt", "holt_winters")
+
+# 各重采样频率的默认季节周期
+DEFAULT_SEASON_LENGTH = {"D": 7, "W": 52, "M": 12}
+
+# 平滑参数搜索网格
+_ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+_BETAS = (0.01, 0.05, 0.1, 0.2, 0.3)
+_GAMMAS = (0.05, 0.1, 0.2, 0.3)
+
+# 一次预测的最多序列数（分组预测时保留合计最大的分组）
+MAX_SERIES = 500
+
+
+def _z_value(level: float) -> float:
+    return NormalDist().inv_cdf(0.5 + level / 2)
+
+
+def linear_forecast(values: np.ndarray, horizon: int, level: float = 0.95) -> Dict[str, np.ndarray]:
+    """
+    直线外推（每条序列独立的最小二乘回归，忽略缺失值）
+
+    Args:
+        values: 周期 × 序列 的二维数组
+        horizon: 预测周期数
+        level: 预测区间的置信水平
+
+    Returns:
+        {"forecast", "lower", "upper"}（horizon × 序列）和 {"sigma", "slope", "intercept"}（每条序列）
+    """
+    values = np.asarray(values, dtype="float64")
+    t = np.arange(len(values), dtype="float64")[:, None]
+    valid = ~np.isnan(values)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = valid.sum(axis=0)
+        t_mean = (t * valid).sum(axis=0) / n
+        y_mean = np.where(valid, values, 0.0).sum(axis=0) / n
+        dt = np.where(valid, t - t_mean, 0.0)
+        dy = np.where(valid, values - y_mean, 0.0)
+        sxx = (dt * dt).sum(axis=0)
+        slope = np.where(sxx > 0, (dt * dy).sum(axis=0) / sxx, 0.0)
+        intercept = y_mean - slope * t_mean
+
+        residuals = np.where(valid, values - (intercept + slope * t), 0.0)
+        sigma = np.sqrt((residuals ** 2).sum(axis=0) / np.maximum(n - 2, 1))
+
+        future = len(values) - 1 + np.arange(1, horizon + 1, dtype="float64")[:, None]
+        forecast = intercept + slope * future
+        se = sigma * np.sqrt(1 + 1 / n + np.where(sxx > 0, (future - t_mean) ** 2 / sxx, 0.0))
+
+    z = _z_value(level)
+    return {
+        "forecast": forecast,
+        "lower": forecast - z * se,
+        "upper": forecast + z * se,
+        "sigma": sigma,
+        "slope": slope,
+        "intercept": intercept
+    }
+
+
+def exponential_smoothing_forecast(
+    values: np.ndarray,
+    horizon: int,
+    season_length: Optional[int] = None,
+    level: float = 0.95
+) -> Dict[str, np.ndarray]:
+    """
+    Holt（season_length 为空）/ Holt-Winters 加法季节指数平滑
+
+    更新公式（误差修正形式，e 为一步预测误差）：
+        level' = level + trend + alpha * e
+        trend' = trend + alpha * beta * e
+        season' = season + gamma * e
+    缺失值所在时间步只推进状态、不做修正。
+
+    Args:
+        values: 周期 × 序列 的二维数组（Holt-Winters 至少需要 2 个季节周期）
+        horizon: 预测周期数
+        season_length: 季节周期长度
+        level: 预测区间的置信水平
+
+    Returns:
+        {"forecast", "lower", "upper"}（horizon × 序列）和 {"sigma", "alpha", "beta", "gamma"}（每条序列）
+    """
+    values = np.asarray(values, dtype="float64")
+    n_periods, n_series = values.shape
+    m = int(season_length or 0)
+
+    if m:
+        grid = [(a, b, g) for a in _ALPHAS for b in _BETAS for g in _GAMMAS if g <= 1 - a]
+    else:
+        grid = [(a, b, 0.0) for a in _ALPHAS for b in _BETAS]
+    alpha, beta, gamma = (np.array(p)[:, None] for p in zip(*grid))
+
+    # 没有数据的周期为 NaN：初始化窗口内全部缺失时 nanmean 为 NaN（随后按 0 处理），不提示警告
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if m:
+            # 第一个季节周期的均值和前两个周期均值之差确定初始水平和趋势，
+            # 初始季节分量为第一个周期内各点相对趋势线的偏差
+            first = np.nanmean(values[:m], axis=0)
+            trend0 = np.nan_to_num((np.nanmean(values[m:2 * m], axis=0) - first) / m)
+            offsets = np.arange(m, dtype="float64")[:, None] - (m - 1) / 2
+            season0 = np.nan_to_num(values[:m] - (first + trend0 * offsets))
+            level0 = first + trend0 * (m - 1) / 2
+            season = np.broadcast_to(season0[:, None, :], (m, len(grid), n_series)).copy()
+            start = m
+        else:
+            level0 = np.where(np.isnan(values[0]), np.nanmean(values, axis=0), values[0])
+            trend0 = np.nan_to_num(np.nanmean(np.diff(values[:5], axis=0), axis=0))
+            season = None
+            start = 1
+
+    state_level = np.broadcast_to(level0, (len(grid), n_series)).copy()
+    state_trend = np.broadcast_to(trend0, (len(grid), n_series)).copy()
+    sse = np.zeros((len(grid), n_series))
+
+    for t in range(start, n_periods):
+        observed = values[t]
+        seasonal = season[t % m] if m else 0.0
+        error = observed - (state_level + state_trend + seasonal)
+        error = np.where(np.isnan(observed), 0.0, error)
+        sse += error * error
+        state_level = state_level + state_trend + alpha * error
+        state_trend = state_trend + alpha * beta * error
+        if m:
+            season[t % m] = seasonal + gamma * error
+
+    # 每条序列选择一步预测误差平方和最小的参数组合
+    best = np.argmin(np.nan_to_num(sse, nan=np.inf), axis=0)
+    columns = np.arange(n_series)
+    fitted_level = state_level[best, columns]
+    fitted_trend = state_trend[best, columns]
+    a, b, g = alpha[best, 0], beta[best, 0], gamma[best, 0]
+    observations = (~np.isnan(values[start:])).sum(axis=0)
+    sigma = np.sqrt(sse[best, columns] / np.maximum(observations, 1))
+
+    steps = np.arange(1, horizon + 1, dtype="float64")[:, None]
+    forecast = fitted_level + steps * fitted_trend
+    if m:
+        future_index = (n_periods - 1 + np.arange(1, horizon + 1)) % m
+        forecast = forecast + season[future_index][:, best, columns]
+
+    # h 步预测方差：sigma^2 * (1 + sum_{j<h} c_j^2)，c_j = alpha * (1 + beta * j) + gamma * [j 为季节周期的整数倍]
+    j = np.arange(1, horizon, dtype="float64")[:, None]
+    c = a * (1 + b * j)
+    if m:
+        c = c + g * (j % m == 0)
+    cumulative = np.vstack([np.zeros((1, n_series)), np.cumsum(c * c, axis=0)])
+    se = sigma * np.sqrt(1 + cumulative)
+
+    z = _z_value(level)
+    return {
+        "forecast": forecast,
+        "lower": forecast - z * se,
+        "upper": forecast + z * se,
+        "sigma": sigma,
+        "alpha": a,
+        "beta": b,
+        "gamma": g
+    }
+
+
+def resolve_method(method: str, n_periods: int, season_length: Optional[int]) -> str:
+    """auto 时按数据长度选择方法；数据不足时降级"""
+    if method == "auto":
+        if season_length and season_length > 1 and n_periods >= 2 * season_length:
+            return "holt_winters"
+        return "holt" if n_periods >= 3 else "linear"
+    if method == "holt_winters" and (not season_length or n_periods < 2 * season_length):
+        return "holt" if n_periods >= 3 else "linear"
+    if method == "holt" and n_periods < 3:
+        return "linear"
+    return method
+
+
+def forecast_matrix(
+    values: np.ndarray,
+    horizon: int = 3,
+    method: str = "auto",
+    season_length: Optional[int] = None,
+    level: float = 0.95
+) -> Dict[str, Any]:
+    """
+    一次预测多条等长序列
+
+    Args:
+        values: 周期 × 序列 的二维数组
+        horizon: 预测周期数
+        method: auto / linear / holt / holt_winters
+        season_length: 季节周期长度（holt_winters 使用）
+        level: 预测区间的置信水平
+
+    Returns:
+        各方法的输出加上 "method"（实际使用的方法）
+    """
+    if method not in FORECAST_METHODS:
+        raise ValueError(f"不支持的预测方法：{method}")
+    values = np.asarray(values, dtype="float64")
+    if values.ndim == 1:
+        values = values[:, None]
+
+    method = resolve_method(method, len(values), season_length)
+    if method == "linear":
+        result = linear_forecast(values, horizon, level)
+    else:
+        result = exponential_smoothing_forecast(
+            values, horizon, season_length if method == "holt_winters" else None, level
+        )
+    result["method"] = method
+    return result
+
+
+def infer_frequency(sorted_dates: np.ndarray) -> str:
+    """按相邻不同日期间隔的中位数推断重采样频率"""
+    days = np.unique(np.asarray(sorted_dates).astype("datetime64[D]"))
+    if len(days) < 2:
+        return "D"
+    gap = float(np.median(np.diff(days).astype(np.int64)))
+    if gap >= 28:
+        return "M"
+    if gap >= 7:
+        return "W"
+    return "D"
+
+
+def _round_list(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def forecast_dataset(
+    source: Union[pd.DataFrame, str],
+    value_columns: Union[str, List[str]],
+    date_column: str,
+    horizon: int = 3,
+    freq: Optional[str] = "D",
+    agg: str = "sum",
+    method: str = "auto",
+    season_length: Optional[int] = None,
+    group_by: Optional[Union[str, List[str]]] = None,
+    level: float = 0.95,
+    max_series: int = MAX_SERIES
+) -> Dict[str, Any]:
+    """
+    按日期重采样后预测一个或多个指标列（可按维度拆分为多条序列一起预测）
+
+    Args:
+        source: DataFrame 或数据文件路径（文件只读取需要的列，日期排序按数据集版本缓存）
+        value_columns: 指标列
+        date_column: 日期列
+        horizon: 预测周期数
+        freq: 重采样频率 D / W / M（None 表示按日期间隔推断）
+        agg: 周期内聚合方式 sum / mean
+        method: auto / linear / holt / holt_winters
+        season_length: 季节周期长度（默认按频率：日 7、周 52、月 12）
+        group_by: 维度列（可选，每个分组 × 指标列为一条序列）
+        level: 预测区间的置信水平
+        max_series: 最多预测的序列数（分组过多时保留合计最大的分组）
+
+    Returns:
+        {"freq", "horizon", "level", "history_periods", "last_period", "forecast_periods", "series": [...]}
+    """
+    if freq is not None and freq not in RESAMPLE_FREQUENCIES:
+        return {"error": f"不支持的重采样频率：{freq}"}
+    if agg not in RESAMPLE_AGGREGATIONS:
+        return {"error": f"不支持的聚合方式：{agg}"}
+    if method not in FORECAST_METHODS:
+        return {"error": f"不支持的预测方法：{method}"}
+    value_columns = [value_columns] if isinstance(value_columns, str) else list(value_columns)
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+
+    needed = list(dict.fromkeys([date_column] + value_columns + group_by))
+    if isinstance(source, str):
+        from src.tools.data_loader import load_dataset
+        df = load_dataset(source, columns=needed)
+        order, sorted_dates = get_date_order(source, df, date_column)
+    else:
+        df = source
+        order, sorted_dates = date_order(df[date_column])
+
+    non_numeric = [col for col in value_columns if not pd.api.types.is_numeric_dtype(df[col])]
+    if non_numeric:
+        return {"error": f"以下列不是数值类型：{non_numeric}"}
+    if len(order) == 0:
+        return {"error": f"日期列 '{date_column}' 没有可解析的日期"}
+    freq = freq or infer_frequency(sorted_dates)
+    season_length = season_length or DEFAULT_SEASON_LENGTH[freq]
+
+    values = np.column_stack([df[col].to_numpy(dtype="float64", na_value=np.nan)[order] for col in value_columns])
+    truncated = 0
+    if not group_by:
+        periods, matrix = resample_sorted(sorted_dates, values, freq=freq, agg=agg)
+        series_info = [{"column": col} for col in value_columns]
+    else:
+        from src.tools.segment_analysis import factorize_groups, get_group_codes
+        if isinstance(source, str):
+            codes, labels = get_group_codes(source, df, group_by)
+        else:
+            codes, labels = factorize_groups(df, group_by)
+
+        # 分组 × 周期 一次 bincount 聚合
+        periods, slots = period_slots(sorted_dates, freq)
+        n_groups, n_periods = len(labels), len(periods)
+        keys = codes[order] * n_periods + slots
+        valid = ~np.isnan(values)
+        grids, totals = [], []
+        for i in range(len(value_columns)):
+            sums = np.bincount(keys, weights=np.where(valid[:, i], values[:, i], 0.0), minlength=n_groups * n_periods)
+            counts = np.bincount(keys, weights=valid[:, i], minlength=n_groups * n_periods)
+            # 该分组没有数据的周期为 NaN（与 resample_sorted 一致），预测时跳过而不是当作 0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                grid = np.where(counts > 0, sums if agg == "sum" else sums / counts, np.nan)
+            grids.append(grid.reshape(n_groups, n_periods))
+            totals.append(np.abs(sums.reshape(n_groups, n_periods).sum(axis=1)))
+        grids, totals = np.vstack(grids), np.concatenate(totals)
+
+        keep = np.arange(len(grids))
+        if len(keep) > max_series:
+            keep = np.sort(np.argsort(-totals, kind="stable")[:max_series])
+            truncated = len(grids) - max_series
+        matrix = grids[keep].T
+        series_info = [
+            {"column": value_columns[k // n_groups], **{key: labels[key].iloc[k % n_groups] for key in group_by}}
+            for k in keep
+        ]
+
+    result = forecast_matrix(matrix, horizon=horizon, method=method, season_length=season_length, level=level)
+
+    series = []
+    for k, info in enumerate(series_info):
+        observed = matrix[:, k][~np.isnan(matrix[:, k])]
+        series.append({
+            **info,
+            "last_value": round(float(observed[-1]), 4) if len(observed) else None,
+            "forecast": _round_list(result["forecast"][:, k]),
+            "lower": _round_list(result["lower"][:, k]),
+            "upper": _round_list(result["upper"][:, k])
+        })
+
+    output = {
+        "date_column": date_column,
+        "freq": freq,
+        "agg": agg,
+        "method": result["method"],
+        "horizon": horizon,
+        "level": level,
+        "history_periods": len(periods),
+        "last_period": str(periods[-1]),
+        "forecast_periods": [str(p) for p in future_periods(periods[-1], horizon, freq)],
+        "series": series
+    }
+    if truncated:
+        output["truncated_series"] = truncated
+    return output
+
+
+# ========================================
+# 日期列识别（PandaAI 预测问题走本地预测时使用）
+# ========================================
+
+# 与 data_loader 中识别日期字符串的规则一致
+_DATE_LIKE = re.compile(r"^\d{4}[-/.]\d{1,2}[-/.]\d{1,2}([ T]\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+
+
+def detect_date_column(file_path: str) -> Optional[str]:
+    """从数据集概要识别日期列：datetime 类型，或预览中的值全部形如日期的列"""
+    from src.tools.dataset_profile import get_profile
+
+    profile = get_profile(file_path)
+    for col in profile["columns"]:
+        if "datetime" in profile["dtypes"].get(col, ""):
+            return col
+    for col in profile["columns"]:
+        if col in profile["numeric_columns"]:
+            continue
+        sample = [row.get(col) for row in profile["preview"] if row.get(col) is not None]
+        if sample and all(_DATE_LIKE.match(str(value)) for value in sample):
+            return col
+    return None
+
+
+def detect_date_column_in_frame(df: pd.DataFrame, preview_rows: int = 20) -> Optional[str]:
+    """从内存中的 DataFrame 识别日期列（规则同 detect_date_column，不需要数据集概要）"""
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            return col
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        sample = df[col].dropna().head(preview_rows)
+        if len(sample) and all(_DATE_LIKE.match(str(value)) for value in sample):
+            return col
+    return None
+
+
+# 只问未来一段时间预测值、不涉及其他分析的问题，例如“预测未来 3 个月的销售额”“forecast the next 6 weeks”
+_FORECAST_QUESTION = re.compile(r"(预测|预估|forecast|predict)", re.IGNORECASE)
+# 必须指向未来的时间范围
+_FUTURE_HORIZON = re.compile(
+    r"(未来|接下来|今后|之后|下一?个?\s*(\d+\s*个?\s*)?(天|日|周|星期|月|季度|年)|"
+    r"\b(next|coming|upcoming|future|ahead)\b)",
+    re.IGNORECASE
+)
+# 问哪些因素/特征能预测某个结果，属于特征分析而不是时间序列预测
+_NOT_FORECAST = re.compile(
+    r"(哪些|哪个|什么因素|因素|特征|变量|指标能|影响|驱动|原因|为什么|"
+    r"\b(which|features?|factors?|variables?|drivers?|predictors?|importance|why)\b)",
+    re.IGNORECASE
+)
+_HORIZON = re.compile(r"(\d+)\s*(个)?\s*(天|日|周|星期|月|periods?|days?|weeks?|months?)", re.IGNORECASE)
+_FREQ_WORDS = {"天": "D", "日": "D", "day": "D", "周": "W", "星期": "W", "week": "W", "月": "M", "month": "M"}
+
+
+def parse_forecast_question(question: str) -> Optional[Dict[str, Any]]:
+    """
+    识别简单的预测问题：包含预测关键词和未来时间范围，且不是在问哪些因素能预测某个结果
+
+    Returns:
+        {"horizon", "freq"（可能为 None）}；不是预测问题时返回 None
+    """
+    if not _FORECAST_QUESTION.search(question) or not _FUTURE_HORIZON.search(question):
+        return None
+    if _NOT_FORECAST.search(question):
+        return None
+    match = _HORIZON.search(question)
+    if not match:
+        return {"horizon": 3, "freq": None}
+    unit = match.group(3).lower().rstrip("s")
+    return {"horizon": int(match.group(1)), "freq": _FREQ_WORDS.get(unit)}
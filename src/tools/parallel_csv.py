@@ -0,0 +1,222 @@
+"""
+大型 CSV 多进程并行解析
+
+把文件按字节均分，并把切分点移到下一个记录结束的换行符之后，这样每一段都只包含完整的行。
+切分时跟踪引号奇偶（与 row_index 相同），引号内的换行符不会被当作记录边界。
+表头和列类型（包括文本列）只从第一块推断一次，然后应用到所有分段；各分段在进程池中解析，最后一次性拼接。
+
+进程池使用 forkserver / spawn 方式启动子进程：Web 服务和 Crew 运行时进程内有其他线程，
+在多线程进程中 fork 可能复制到被持有的锁。
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.settings import get_setting
+
+
+CSV_ENGINES = ("pandas", "pyarrow")
+
+# 推断表头和列类型时读取的行数
+INFER_ROWS = 10000
+
+# 查找切分点时每次读取的字节数
+SCAN_BLOCK_BYTES = 4 * 1024 * 1024
+
+_QUOTE = ord('"')
+_NEWLINE = ord("\n")
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """进程数：参数 > settings.yaml 的 data.parallel_workers > CPU 核数（0 表示自动）"""
+    if workers is None:
+        workers = int(get_setting("data.parallel_workers", 0) or 0)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def should_parse_in_parallel(file_path: str, workers: Optional[int] = None) -> bool:
+    """文件超过 data.parallel_min_mb 且可用进程数大于 1 时并行解析"""
+    min_bytes = float(get_setting("data.parallel_min_mb", 256)) * 1024 * 1024
+    return resolve_workers(workers) > 1 and os.path.getsize(file_path) >= min_bytes
+
+
+def split_offsets(file_path: str, parts: int, start: int = 0) -> List[Tuple[int, int]]:
+    """
+    将文件 [start, EOF) 按记录边界切分为最多 parts 段
+
+    从 start 开始顺序扫描并跟踪引号奇偶，切分点取目标位置之后第一个不在引号内的换行符。
+    不含切分目标的数据块只统计引号个数。
+
+    Returns:
+        [(起始字节, 结束字节), ...]，每段都以完整的记录结束
+    """
+    size = os.path.getsize(file_path)
+    step = max((size - start) // max(parts, 1), 1)
+
+    boundaries = [start]
+    target = start + step
+    parity = 0
+    block_start = start
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        while target < size:
+            raw = f.read(SCAN_BLOCK_BYTES)
+            if not raw:
+                break
+            block_end = block_start + len(raw)
+            if target >= block_end:
+                parity = (parity + raw.count(b'"')) % 2
+                block_start = block_end
+                continue
+
+            data = np.frombuffer(raw, dtype=np.uint8)
+            quotes = np.cumsum(data == _QUOTE, dtype=np.int64) + parity
+            # 记录边界：引号外的换行符之后的位置
+            breaks = np.flatnonzero((data == _NEWLINE) & (quotes % 2 == 0)) + block_start + 1
+            while target < block_end:
+                idx = int(np.searchsorted(breaks, target + 1))
+                if idx >= len(breaks):
+                    break
+                boundary = int(breaks[idx])
+                if boundary >= size:
+                    target = size
+                    break
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+                target = boundary + step
+            parity = int(quotes[-1] % 2)
+            block_start = block_end
+    boundaries.append(size)
+
+    return [(a, b) for a, b in zip(boundaries[:-1], boundaries[1:]) if b > a]
+
+
+def _header_end(file_path: str) -> int:
+    """表头结束位置（表头中的引号内可能包含换行符）"""
+    parity, offset = 0, 0
+    with open(file_path, "rb") as f:
+        while True:
+            raw = f.read(SCAN_BLOCK_BYTES)
+            if not raw:
+                return offset
+            data = np.frombuffer(raw, dtype=np.uint8)
+            quotes = np.cumsum(data == _QUOTE, dtype=np.int64) + parity
+            breaks = np.flatnonzero((data == _NEWLINE) & (quotes % 2 == 0))
+            if len(breaks):
+                return offset + int(breaks[0]) + 1
+            parity = int(quotes[-1] % 2)
+            offset += len(raw)
+
+
+def _infer_schema(file_path: str, usecols: Optional[List[str]]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    从第一块推断列名和列类型
+
+    数值列和布尔列固定为推断出的类型，文本列固定为 str（后面的分段中看起来像数字的取值
+    仍按字符串解析，与整体解析一致）；第一块中全部为空的列无法判断类型，由各分段自行推断。
+    """
+    head = pd.read_csv(file_path, nrows=INFER_ROWS)
+    names = list(head.columns)
+    selected = usecols if usecols is not None else names
+    dtypes = {}
+    for col in selected:
+        series = head[col]
+        if series.isna().all():
+            continue
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            dtypes[col] = series.dtype
+        elif pd.api.types.is_string_dtype(series) or series.dtype == object:
+            dtypes[col] = str
+    return names, dtypes
+
+
+def _read_piece(
+    file_path: str,
+    start: int,
+    end: int,
+    names: List[str],
+    usecols: Optional[List[str]],
+    dtypes: Dict[str, Any]
+) -> pd.DataFrame:
+    """解析一个分段（在子进程中执行）"""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    def read(dtype):
+        return pd.read_csv(io.BytesIO(data), header=None, names=names,
+                           usecols=usecols, dtype=dtype, index_col=False)
+
+    try:
+        return read(dtypes)
+    except (ValueError, TypeError):
+        pass
+    # 整数列在本段出现缺失值：放宽为 float64（整体解析时同样是 float64）
+    relaxed = {col: "float64" if pd.api.types.is_integer_dtype(dtype) else dtype for col, dtype in dtypes.items()}
+    try:
+        return read(relaxed)
+    except (ValueError, TypeError):
+        # 数值列 / 布尔列在本段出现其他取值：这些列按本段重新推断，文本列仍按字符串解析
+        return read({col: dtype for col, dtype in dtypes.items() if dtype is str})
+
+
+def _process_context() -> multiprocessing.context.BaseContext:
+    """子进程启动方式：优先 forkserver，不支持时使用 spawn（不在多线程的父进程中 fork）"""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def parallel_read_csv(
+    file_path: str,
+    usecols: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    engine: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    并行解析 CSV 文件
+
+    Args:
+        file_path: CSV 文件路径
+        usecols: 只解析这些列（None 表示全部）
+        workers: 进程数（默认读取 settings.yaml 的 data.parallel_workers，0 表示 CPU 核数）
+        engine: pandas（按换行切分 + 进程池）或 pyarrow（pyarrow 多线程 CSV 读取器），
+                默认读取 settings.yaml 的 data.csv_engine
+
+    Returns:
+        pandas DataFrame，结果与 pd.read_csv 一致
+    """
+    engine = engine or get_setting("data.csv_engine", "pandas")
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"不支持的 CSV 解析引擎：{engine}")
+
+    if engine == "pyarrow":
+        from src.tools.columnar_store import PYARROW_AVAILABLE
+        if PYARROW_AVAILABLE:
+            return pd.read_csv(file_path, usecols=usecols, engine="pyarrow")
+        print("⚠️  pyarrow 未安装，改用多进程解析")
+
+    workers = resolve_workers(workers)
+    names, dtypes = _infer_schema(file_path, usecols)
+    pieces = split_offsets(file_path, workers, start=_header_end(file_path))
+    if workers <= 1 or len(pieces) <= 1:
+        return pd.read_csv(file_path, usecols=usecols)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(pieces)), mp_context=_process_context()) as pool:
+        futures = [pool.submit(_read_piece, file_path, start, end, names, usecols, dtypes)
+                   for start, end in pieces]
+        frames = [future.result() for future in futures]
+
+    # 各段推断出的类型不一致且不是数值间的提升时，结果可能与整体解析不同，退回单进程解析
+    for col in frames[0].columns:
+        kinds = {frame[col].dtype for frame in frames if frame[col].notna().any()}
+        if len(kinds) > 1 and not all(pd.api.types.is_numeric_dtype(kind) for kind in kinds):
+            return pd.read_csv(file_path, usecols=usecols)
+
+    return pd.concat(frames, ignore_index=True)
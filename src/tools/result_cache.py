@@ -0,0 +1,343 @@
+"""
+统计工具结果的持久化缓存
+
+同一份数据集、同一个工具、同样的参数，分析结果只计算一次，跨进程、跨分析复用。
+
+缓存键：blake2b(数据集内容哈希, 工具名, 规范化后的参数, 代码版本)
+- 数据集内容哈希：文件路径使用 file_content_hash，DataFrame 按内容（含索引、列名、类型）计算
+- 规范化参数：按函数签名绑定并补全默认值，与位置/关键字传参方式无关
+- 代码版本：src/tools 下所有模块及被包装函数所在模块的源码哈希，代码修改后旧结果自动失效
+
+结果以 pickle 形式保存在 SQLite 文件中（settings.yaml 的 cache.result_dir，相对路径基于项目根目录），
+总大小超过 cache.result_max_mb 时按最近访问时间淘汰。返回 error 的结果不缓存。
+缓存不可用（数据库被锁、目录只读等）时直接调用原函数，不影响工具结果。
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.settings import get_setting
+from src.tools.dataset_cache import file_content_hash
+
+
+# 缓存格式版本：修改键或存储格式时递增
+RESULT_CACHE_VERSION = 1
+
+# 淘汰时清理到上限的该比例，避免每次写入都触发淘汰
+_EVICT_TARGET_RATIO = 0.9
+
+_TOOLS_DIR = Path(__file__).parent
+PROJECT_ROOT = _TOOLS_DIR.parent.parent
+
+
+def resolve_cache_dir(directory: str) -> str:
+    """缓存目录：相对路径基于项目根目录，与启动时的工作目录无关"""
+    path = Path(os.path.expanduser(directory))
+    return str(path if path.is_absolute() else PROJECT_ROOT / path)
+
+
+def frame_content_hash(df: pd.DataFrame) -> str:
+    """计算 DataFrame 内容哈希（数据、索引、列名和列类型）"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+def dataset_content_key(source: Any) -> Optional[str]:
+    """
+    数据集内容哈希
+
+    Args:
+        source: 数据文件路径或 DataFrame
+
+    Returns:
+        内容哈希；无法识别的输入（如不存在的文件）返回 None，表示不缓存
+    """
+    if isinstance(source, pd.DataFrame):
+        return "frame:" + frame_content_hash(source)
+    if isinstance(source, (str, os.PathLike)) and os.path.isfile(source):
+        return "file:" + file_content_hash(os.fspath(source))
+    return None
+
+
+_code_version_memo: Dict[str, str] = {}
+_code_version_lock = threading.Lock()
+
+
+def code_version(func: Callable) -> str:
+    """被包装函数的代码版本：src/tools 下所有模块及函数所在模块的源码哈希（进程内只计算一次）"""
+    module_file = getattr(sys.modules.get(func.__module__), "__file__", None) or ""
+    with _code_version_lock:
+        cached = _code_version_memo.get(module_file)
+        if cached is not None:
+            return cached
+
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(str(RESULT_CACHE_VERSION).encode())
+        files = sorted(_TOOLS_DIR.glob("*.py"))
+        if module_file and Path(module_file).resolve().parent != _TOOLS_DIR.resolve():
+            files.append(Path(module_file))
+        for path in files:
+            hasher.update(path.name.encode())
+            hasher.update(path.read_bytes())
+        _code_version_memo[module_file] = hasher.hexdigest()
+        return _code_version_memo[module_file]
+
+
+def _normalize(value: Any) -> Any:
+    """将参数转换为稳定的 JSON 结构（列表与元组等价，字典键排序由 json.dumps 处理）"""
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(v) for v in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def normalize_arguments(arguments: Dict[str, Any]) -> str:
+    """参数规范化为 JSON 字符串"""
+    return json.dumps(_normalize(arguments), sort_keys=True, ensure_ascii=False)
+
+
+def _is_error_result(result: Any) -> bool:
+    """工具返回的错误结果（{"error": ...} 或 [{"error": ...}]）不缓存"""
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return "error" in result[0]
+    return False
+
+
+class ResultCache:
+    """
+    基于 SQLite 的结果缓存，按总字节数限制大小，超出时按最近访问时间淘汰
+
+    Args:
+        directory: 缓存目录
+        max_bytes: 缓存总大小上限（字节）
+        filename: SQLite 文件名（不同用途的缓存使用不同文件）
+        ttl_seconds: 结果有效期（秒），None 表示不过期
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        filename: str = "results.sqlite",
+        ttl_seconds: Optional[float] = None
+    ):
+        self.path = os.path.join(directory, filename)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, tool TEXT NOT NULL, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接，退出时提交事务并关闭"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        读取缓存结果
+
+        Returns:
+            (是否命中, 结果)
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return False, None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            value = pickle.loads(row[0])
+        except Exception:
+            # 无法反序列化（如依赖的类已变化）视为未命中
+            self.invalidate(key)
+            with self._lock:
+                self.misses += 1
+            return False, None
+        with self._lock:
+            self.hits += 1
+        return True, value
+
+    def put(self, key: str, tool_name: str, value: Any) -> None:
+        """写入结果；单个结果超过缓存上限时不保存"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, tool, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool_name, sqlite3.Binary(blob), len(blob), now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if self.ttl_seconds is not None:
+            expired = conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self.evictions += expired.rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * _EVICT_TARGET_RATIO
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed_at ASC"):
+            if total <= target:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def invalidate(self, key: Optional[str] = None, tool_name: Optional[str] = None) -> None:
+        """删除指定键 / 指定工具的缓存；都不指定时清空"""
+        with self._lock, self._connect() as conn:
+            if key is not None:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            elif tool_name is not None:
+                conn.execute("DELETE FROM results WHERE tool = ?", (tool_name,))
+            else:
+                conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock, self._connect() as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "size_mb": total / 1024 / 1024,
+                "max_mb": self.max_bytes / 1024 / 1024,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def result_cache_enabled() -> bool:
+    """settings.yaml 的 cache.result_enabled，环境变量 RESULT_CACHE_DISABLED=1 可临时关闭"""
+    if os.environ.get("RESULT_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return False
+    return str(get_setting("cache.result_enabled", True)).lower() not in ("false", "0", "no")
+
+
+def get_result_cache() -> ResultCache:
+    """获取进程级结果缓存单例（目录和大小上限来自 settings.yaml 的 cache 配置）"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            directory = resolve_cache_dir(get_setting("cache.result_dir", ".cache/results"))
+            max_mb = float(get_setting("cache.result_max_mb", 512))
+            _result_cache = ResultCache(directory, int(max_mb * 1024 * 1024))
+        return _result_cache
+
+
+def memoize_result(tool_name: Optional[str] = None, dataset_arg: Optional[str] = None) -> Callable:
+    """
+    持久化缓存统计工具结果的装饰器
+
+    Args:
+        tool_name: 缓存中使用的工具名（默认为 模块.函数名）
+        dataset_arg: 数据集参数名（默认为函数的第一个参数），取值为文件路径或 DataFrame
+
+    Returns:
+        装饰器；无法识别数据集或缓存关闭时直接调用原函数
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        name = tool_name or f"{func.__module__}.{func.__qualname__}"
+        source_arg = dataset_arg or next(iter(signature.parameters))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not result_cache_enabled():
+                return func(*args, **kwargs)
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return func(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+
+            # 缓存只是加速手段：计算键或读取失败（数据库被锁、目录只读等）时直接计算
+            try:
+                content_key = dataset_content_key(arguments.pop(source_arg))
+                if content_key is None:
+                    cache = None
+                else:
+                    key = hashlib.blake2b(
+                        "\0".join([content_key, name, normalize_arguments(arguments), code_version(func)]).encode(),
+                        digest_size=20
+                    ).hexdigest()
+                    cache = get_result_cache()
+                    found, value = cache.get(key)
+            except Exception:
+                cache = None
+            if cache is None:
+                return func(*args, **kwargs)
+            if found:
+                return value
+
+            result = func(*args, **kwargs)
+            if not _is_error_result(result):
+                try:
+                    cache.put(key, name, result)
+                except Exception:
+                    pass
+            return result
+
+        wrapper.cache_tool_name = name
+        return wrapper
+
+    return decorator
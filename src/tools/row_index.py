@@ -0,0 +1,260 @@
+"""
+文本数据集行偏移索引
+
+一次遍历 CSV / JSONL 文件，记录每个数据行的起始字节偏移，保存为 uint64 数组：
+    data.csv -> data.csv.rowidx.npy（偏移数组）+ data.csv.rowidx.json（源文件指纹）
+
+数组最后一项为文件大小，第 i 行的字节范围为 [offsets[i], offsets[i + 1])。
+读取任意一页（第 N..N+k 行）或随机抽取若干行时直接定位到对应字节，无需从头解析。
+CSV 引号内的换行符不会被当作行分隔符。
+"""
+import io
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.tools.columnar_store import sidecar_path
+from src.tools.dataset_cache import dataset_fingerprint
+
+
+ROW_INDEX_SUFFIX = ".rowidx.npy"
+ROW_INDEX_MANIFEST_SUFFIX = ".rowidx.json"
+INDEXABLE_FORMATS = ("csv", "jsonl")
+
+_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def _index_format(file_path: str) -> Optional[str]:
+    suffix = os.path.splitext(file_path)[1].lower().lstrip(".")
+    return suffix if suffix in INDEXABLE_FORMATS else None
+
+
+def _manifest_for(file_path: str) -> dict:
+    _, size, _, content_hash = dataset_fingerprint(file_path)
+    return {"size": size, "content_hash": content_hash}
+
+
+def _scan_line_starts(file_path: str, quoted: bool) -> np.ndarray:
+    """返回每一行的起始偏移（含第 0 行），忽略引号内的换行符"""
+    starts = [np.zeros(1, dtype=np.uint64)]
+    quote_parity = 0
+    base = 0
+
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(_BLOCK_SIZE)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            newlines = data == ord("\n")
+            if quoted:
+                quotes = np.cumsum(data == ord('"'), dtype=np.int64) + quote_parity
+                newlines &= (quotes % 2) == 0
+                quote_parity = int(quotes[-1] % 2)
+            starts.append(np.flatnonzero(newlines).astype(np.uint64) + np.uint64(base + 1))
+            base += len(block)
+
+    return np.concatenate(starts)
+
+
+def _blank_lines(file_path: str, starts: np.ndarray, size: int) -> np.ndarray:
+    """标记只有换行符（\n 或 \r\n）的行；只检查长度不超过 2 字节的行"""
+    lengths = np.append(starts[1:], np.uint64(size)) - starts
+    blank = np.zeros(len(starts), dtype=bool)
+    candidates = np.flatnonzero(lengths <= 2)
+    if len(candidates) == 0:
+        return blank
+
+    data = np.memmap(file_path, dtype=np.uint8, mode="r")
+    first = data[starts[candidates]]
+    last = data[starts[candidates] + lengths[candidates] - 1]
+    blank[candidates] = (last == ord("\n")) & ((lengths[candidates] == 1) | (first == ord("\r")))
+    return blank
+
+
+def build_row_index(file_path: str, save: bool = True) -> np.ndarray:
+    """
+    遍历文件生成行偏移索引
+
+    Args:
+        file_path: CSV / JSONL 文件路径
+        save: 是否保存到 <file>.rowidx.npy
+
+    Returns:
+        uint64 偏移数组（长度为数据行数 + 1）
+    """
+    format = _index_format(file_path)
+    if format is None:
+        raise ValueError(f"不支持建立行索引的文件格式：{file_path}")
+
+    size = os.path.getsize(file_path)
+    starts = _scan_line_starts(file_path, quoted=(format == "csv"))
+    starts = starts[starts < size]
+
+    # 空行（\n 或 \r\n）不计为数据行（pandas 解析时同样会跳过）
+    starts = starts[~_blank_lines(file_path, starts, size)]
+
+    if format == "csv":
+        # 第一行为表头
+        starts = starts[1:]
+    offsets = np.append(starts, np.uint64(size)).astype(np.uint64)
+
+    if save:
+        target = sidecar_path(file_path, ROW_INDEX_SUFFIX)
+        tmp_target = sidecar_path(file_path, ROW_INDEX_SUFFIX + ".tmp")
+        manifest = sidecar_path(file_path, ROW_INDEX_MANIFEST_SUFFIX)
+        try:
+            with open(tmp_target, "wb") as f:
+                np.save(f, offsets)
+            os.replace(tmp_target, target)
+            with open(manifest, "w", encoding="utf-8") as f:
+                json.dump(_manifest_for(file_path), f)
+        except OSError as e:
+            print(f"⚠️  行索引保存失败：{str(e)}")
+
+    return offsets
+
+
+def load_row_index(file_path: str) -> Optional[np.ndarray]:
+    """读取与源文件匹配的行索引（内存映射，不整体读入）；不存在或已过期时返回 None"""
+    target = sidecar_path(file_path, ROW_INDEX_SUFFIX)
+    manifest = sidecar_path(file_path, ROW_INDEX_MANIFEST_SUFFIX)
+    if not target.exists() or not manifest.exists():
+        return None
+
+    try:
+        with open(manifest, "r", encoding="utf-8") as f:
+            if json.load(f) != _manifest_for(file_path):
+                return None
+        return np.load(target, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def get_row_index(file_path: str) -> Optional[np.ndarray]:
+    """获取行索引（不存在时构建）；不支持的文件格式返回 None"""
+    if _index_format(file_path) is None:
+        return None
+    offsets = load_row_index(file_path)
+    if offsets is None:
+        offsets = build_row_index(file_path)
+    return offsets
+
+
+def _profile_dtypes(file_path: str) -> Optional[Dict[str, str]]:
+    """与源文件当前版本匹配的数据集概要中的列类型（没有现成概要时返回 None，不为此扫描全量数据）"""
+    from src.tools.dataset_profile import load_profile
+
+    profile = load_profile(file_path)
+    return dict(profile["dtypes"]) if profile else None
+
+
+def _apply_dtypes(file_path: str, buffer: io.BytesIO, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """按整体解析得到的列类型解析选中的行"""
+    if _index_format(file_path) == "csv":
+        # 日期列不能通过 dtype 指定，改用 parse_dates
+        dates = [col for col, dtype in dtypes.items() if dtype.startswith("datetime64")]
+        others = {col: dtype for col, dtype in dtypes.items() if col not in dates}
+        return pd.read_csv(buffer, dtype=others, parse_dates=dates)
+    df = pd.read_json(buffer, lines=True)
+    return df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+
+def _parse_rows(
+    file_path: str,
+    offsets: np.ndarray,
+    rows: np.ndarray,
+    dtypes: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """
+    按行号读取并解析若干行，返回以原始行号为索引的 DataFrame
+
+    只根据选中的行推断类型时，结果可能与整体解析不同（例如整数列被推断为浮点或字符串），
+    因此优先使用 dtypes（默认取数据集概要中的列类型）；无法按这些类型解析时退回自动推断。
+    """
+    if len(rows) == 0 and _index_format(file_path) == "jsonl":
+        return pd.DataFrame()
+
+    with open(file_path, "rb") as f:
+        header = b""
+        if _index_format(file_path) == "csv":
+            header = f.read(int(offsets[0]))
+
+        pieces = [header]
+        # 连续的行合并为一次读取
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        for run in np.split(rows, breaks) if len(rows) else []:
+            start, end = int(offsets[run[0]]), int(offsets[run[-1] + 1])
+            f.seek(start)
+            chunk = f.read(end - start)
+            if not chunk.endswith(b"\n"):
+                chunk += b"\n"
+            pieces.append(chunk)
+
+    content = b"".join(pieces)
+    dtypes = _profile_dtypes(file_path) if dtypes is None else dtypes
+    df = None
+    if dtypes:
+        try:
+            df = _apply_dtypes(file_path, io.BytesIO(content), dtypes)
+        except (ValueError, TypeError):
+            df = None
+    if df is None:
+        buffer = io.BytesIO(content)
+        df = pd.read_csv(buffer) if _index_format(file_path) == "csv" else pd.read_json(buffer, lines=True)
+    df.index = pd.Index(rows[:len(df)])
+    return df
+
+
+def read_rows(file_path: str, start: int, count: int, dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    读取第 start 行开始的 count 行（O(1) 定位，不解析前面的行）
+
+    Args:
+        file_path: CSV / JSONL 文件路径
+        start: 起始行号（从 0 开始，不含表头）
+        count: 行数
+        dtypes: 列类型（默认取数据集概要中的列类型，与整体解析一致）
+
+    Returns:
+        以原始行号为索引的 DataFrame
+    """
+    offsets = get_row_index(file_path)
+    if offsets is None:
+        raise ValueError(f"不支持建立行索引的文件格式：{file_path}")
+
+    total_rows = len(offsets) - 1
+    start = max(0, min(int(start), total_rows))
+    end = min(start + max(0, int(count)), total_rows)
+    return _parse_rows(file_path, offsets, np.arange(start, end), dtypes)
+
+
+def sample_rows(
+    file_path: str,
+    size: int,
+    random_state: int = 42,
+    dtypes: Optional[Dict[str, str]] = None
+) -> Tuple[pd.DataFrame, int]:
+    """
+    均匀随机抽取 size 行（不放回），只读取被抽中的行
+
+    Args:
+        file_path: CSV / JSONL 文件路径
+        size: 样本行数
+        random_state: 随机种子
+        dtypes: 列类型（默认取数据集概要中的列类型，与整体解析一致）
+
+    Returns:
+        (按原始行顺序排列的样本, 数据集总行数)
+    """
+    offsets = get_row_index(file_path)
+    if offsets is None:
+        raise ValueError(f"不支持建立行索引的文件格式：{file_path}")
+
+    total_rows = len(offsets) - 1
+    rng = np.random.default_rng(random_state)
+    rows = np.sort(rng.choice(total_rows, size=min(size, total_rows), replace=False))
+    return _parse_rows(file_path, offsets, rows, dtypes), total_rows
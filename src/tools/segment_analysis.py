@@ -0,0 +1,263 @@
+"""
+分组（细分维度）统计分析
+
+按一个或多个维度列（品类、地区、SKU 等）拆分指标，一次向量化遍历得到每个分组的
+统计量、趋势和异常值个数，不逐个分组循环。
+
+分组编码（每行所属分组的整数编号）对每个数据集版本只计算一次，
+缓存在进程内，同一数据集按相同维度的后续调用直接复用。
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.tools.dataset_cache import dataset_fingerprint
+
+
+# 最多缓存的分组编码个数
+GROUP_CODES_CACHE_SIZE = 32
+
+# 趋势判断阈值：拟合直线在整个区间内的变化占均值的百分比
+TREND_THRESHOLD_PCT = 5.0
+
+_group_codes_cache: "OrderedDict[tuple, Tuple[np.ndarray, pd.DataFrame]]" = OrderedDict()
+_group_codes_lock = threading.Lock()
+
+
+def factorize_groups(df: pd.DataFrame, group_by: List[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """
+    计算分组编码
+
+    Args:
+        df: 至少包含 group_by 列的 DataFrame
+        group_by: 维度列
+
+    Returns:
+        (每行的分组编号 0..n-1, 每个分组的维度取值表)，空值作为独立分组
+    """
+    if len(group_by) == 1:
+        codes, uniques = pd.factorize(df[group_by[0]], use_na_sentinel=False)
+        return codes.astype(np.int64), pd.DataFrame({group_by[0]: uniques})
+
+    per_column = [pd.factorize(df[col], use_na_sentinel=False) for col in group_by]
+    # 逐列组合编码并重新编号，组合值不超过 已有分组数 × 当前列取值数，不会溢出
+    codes = per_column[0][0].astype(np.int64)
+    for col_codes, uniques in per_column[1:]:
+        codes, _ = pd.factorize(codes * len(uniques) + col_codes)
+    # 编号按首次出现顺序分配，每个分组首次出现的行即代表行
+    representative = np.unique(codes, return_index=True)[1]
+    labels = pd.DataFrame({
+        col: np.asarray(uniques, dtype=object)[col_codes[representative]]
+        for col, (col_codes, uniques) in zip(group_by, per_column)
+    })
+    return codes.astype(np.int64), labels
+
+
+def get_group_codes(file_path: str, df: pd.DataFrame, group_by: List[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """获取数据集的分组编码（按数据集版本和维度缓存）"""
+    key = (dataset_fingerprint(file_path), tuple(group_by))
+    with _group_codes_lock:
+        cached = _group_codes_cache.get(key)
+        if cached is not None and len(cached[0]) == len(df):
+            _group_codes_cache.move_to_end(key)
+            return cached
+
+    result = factorize_groups(df, group_by)
+    with _group_codes_lock:
+        _group_codes_cache[key] = result
+        while len(_group_codes_cache) > GROUP_CODES_CACHE_SIZE:
+            _group_codes_cache.popitem(last=False)
+    return result
+
+
+def segment_statistics(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    dates: Optional[np.ndarray] = None,
+    anomaly_threshold: float = 2.0
+) -> pd.DataFrame:
+    """
+    一次遍历计算每个分组的统计量
+
+    Args:
+        values: 指标值（float64，可含 NaN）
+        codes: 每行的分组编号
+        n_groups: 分组个数
+        dates: 每行的日期（datetime64，可选，用于趋势）
+        anomaly_threshold: 组内 z 分数阈值
+
+    Returns:
+        每个分组一行：count, total, mean, std, min, max, anomalies[, slope_per_day, trend_pct]
+    """
+    values = np.asarray(values, dtype="float64")
+    valid = ~np.isnan(values)
+    v = np.where(valid, values, 0.0)
+
+    count = np.bincount(codes, weights=valid, minlength=n_groups)
+    total = np.bincount(codes, weights=v, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        # 组内离差平方和（先减去组均值，避免大数相减的精度损失）
+        dev = np.where(valid, values - mean[codes], 0.0)
+        m2 = np.bincount(codes, weights=dev * dev, minlength=n_groups)
+        std = np.sqrt(m2 / (count - 1))
+        std[count < 2] = np.nan
+
+    minimum = np.full(n_groups, np.inf)
+    maximum = np.full(n_groups, -np.inf)
+    np.minimum.at(minimum, codes[valid], values[valid])
+    np.maximum.at(maximum, codes[valid], values[valid])
+    minimum[count == 0] = np.nan
+    maximum[count == 0] = np.nan
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = dev / std[codes]
+        is_anomaly = valid & (np.abs(z) > anomaly_threshold)
+    anomalies = np.bincount(codes, weights=is_anomaly, minlength=n_groups)
+
+    result = pd.DataFrame({
+        "count": count.astype(np.int64),
+        "total": total,
+        "mean": mean,
+        "std": std,
+        "min": minimum,
+        "max": maximum,
+        "anomalies": anomalies.astype(np.int64)
+    })
+
+    if dates is not None:
+        # 组内最小二乘斜率（指标值 ~ 天数），以组内日期均值为原点
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        has_date = valid & ~np.isnat(dates)
+        days = dates.astype("int64") / 86_400e9
+        n_dated = np.bincount(codes, weights=has_date, minlength=n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t_mean = np.bincount(codes, weights=np.where(has_date, days, 0.0), minlength=n_groups) / n_dated
+            dt = np.where(has_date, days - t_mean[codes], 0.0)
+            dv = np.where(has_date, values - mean[codes], 0.0)
+            stt = np.bincount(codes, weights=dt * dt, minlength=n_groups)
+            stv = np.bincount(codes, weights=dt * dv, minlength=n_groups)
+            slope = stv / stt
+            first = np.full(n_groups, np.inf)
+            last = np.full(n_groups, -np.inf)
+            np.minimum.at(first, codes[has_date], days[has_date])
+            np.maximum.at(last, codes[has_date], days[has_date])
+            span = last - first
+            trend_pct = slope * span / np.abs(mean) * 100
+        slope[stt == 0] = np.nan
+        trend_pct[stt == 0] = np.nan
+        result["slope_per_day"] = slope
+        result["trend_pct"] = trend_pct
+
+    return result
+
+
+def _trend_label(trend_pct: float) -> str:
+    if pd.isna(trend_pct):
+        return "unknown"
+    if trend_pct > TREND_THRESHOLD_PCT:
+        return "increasing"
+    if trend_pct < -TREND_THRESHOLD_PCT:
+        return "decreasing"
+    return "stable"
+
+
+def analyze_segments(
+    source: Union[pd.DataFrame, str],
+    value_column: str,
+    group_by: Union[str, List[str]],
+    date_column: Optional[str] = None,
+    top_n: int = 20,
+    sort_by: str = "total",
+    anomaly_threshold: float = 2.0
+) -> Dict[str, Any]:
+    """
+    按维度拆分指标：每个分组的计数、合计、均值、标准差、最值、占比、组内异常值个数和趋势
+
+    Args:
+        source: DataFrame 或数据文件路径（文件只读取需要的列，分组编码按数据集版本缓存）
+        value_column: 指标列
+        group_by: 维度列（一个或多个）
+        date_column: 日期列（可选，提供时计算每个分组的趋势）
+        top_n: 返回排名前 top_n 的分组，其余合并为“其他”
+        sort_by: 排序字段（total/mean/count/anomalies/trend_pct）
+        anomaly_threshold: 组内 z 分数阈值
+
+    Returns:
+        分组统计结果
+    """
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+    needed = list(dict.fromkeys(group_by + [value_column] + ([date_column] if date_column else [])))
+
+    if isinstance(source, str):
+        from src.tools.data_loader import load_dataset
+        df = load_dataset(source, columns=needed)
+        codes, labels = get_group_codes(source, df, group_by)
+    else:
+        df = source
+        codes, labels = factorize_groups(df, group_by)
+
+    if not pd.api.types.is_numeric_dtype(df[value_column]):
+        return {"error": f"列 '{value_column}' 不是数值类型"}
+
+    dates = None
+    if date_column:
+        dates = pd.to_datetime(df[date_column], errors="coerce").to_numpy()
+
+    stats = segment_statistics(
+        df[value_column].to_numpy(dtype="float64", na_value=np.nan),
+        codes,
+        len(labels),
+        dates=dates,
+        anomaly_threshold=anomaly_threshold
+    )
+    grand_total = float(np.nansum(stats["total"]))
+    stats["share_pct"] = stats["total"] / grand_total * 100 if grand_total else np.nan
+    table = pd.concat([labels, stats], axis=1)
+
+    if sort_by not in table.columns:
+        return {"error": f"不支持的排序字段：{sort_by}"}
+    table = table.sort_values(sort_by, ascending=False, na_position="last", kind="stable")
+    top, rest = table.head(top_n), table.iloc[top_n:]
+
+    segments = []
+    for row in top.to_dict(orient="records"):
+        segment = {col: row[col] for col in group_by}
+        segment.update({
+            "count": int(row["count"]),
+            "total": round(float(row["total"]), 4),
+            "mean": round(float(row["mean"]), 4),
+            "std": round(float(row["std"]), 4),
+            "min": float(row["min"]),
+            "max": float(row["max"]),
+            "share_pct": round(float(row["share_pct"]), 2),
+            "anomalies": int(row["anomalies"])
+        })
+        if date_column:
+            segment["trend"] = _trend_label(row["trend_pct"])
+            segment["trend_pct"] = round(float(row["trend_pct"]), 2)
+        segments.append(segment)
+
+    result = {
+        "value_column": value_column,
+        "group_by": group_by,
+        "total_segments": len(table),
+        "grand_total": grand_total,
+        "sort_by": sort_by,
+        "segments": segments
+    }
+    if len(rest):
+        result["others"] = {
+            "segments": len(rest),
+            "count": int(rest["count"].sum()),
+            "total": float(rest["total"].sum()),
+            "share_pct": round(float(rest["share_pct"].sum()), 2),
+            "anomalies": int(rest["anomalies"].sum())
+        }
+    if date_column:
+        result["trend_summary"] = table["trend_pct"].map(_trend_label).value_counts().to_dict()
+    return result
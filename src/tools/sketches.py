@@ -0,0 +1,246 @@
+"""
+可合并的概要数据结构（Sketch）
+
+用于无法整体读入内存的数据集：逐块更新，不同分区 / 进程的结果可以合并，
+合并后的误差界与单次遍历相同。
+
+- KLLSketch：分位数（中位数、四分位距等），按排名的相对误差约 2.296 / k^0.9723
+- HyperLogLog：去重计数，相对标准误差 1.04 / sqrt(2^p)
+- MisraGries：高频取值（Top-K），计数最多低估 (n - 已计数总和) / (k + 1)
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.tools.duplicates import value_hashes
+
+
+# ========================================
+# KLL 分位数 Sketch
+# ========================================
+
+class KLLSketch:
+    """
+    KLL 分位数 Sketch（Karnin, Lang, Liberty 2016）
+
+    第 h 层的每个元素代表 2^h 个原始值；某层超出容量时排序并随机保留奇数位或偶数位元素，
+    提升到上一层。越低的层容量越小，总内存约为 O(k)。
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = int(k)
+        self.count = 0
+        self.min = math.nan
+        self.max = math.nan
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        """归一化排名误差（99% 置信度，Apache DataSketches 的经验公式）"""
+        return 2.296 / self.k ** 0.9723
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: np.ndarray) -> "KLLSketch":
+        """批量加入数值（忽略 NaN）"""
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.min = float(np.nanmin([self.min, values.min()]))
+        self.max = float(np.nanmax([self.max, values.max()]))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """合并另一个 Sketch（两者的 k 应相同）"""
+        if other.count == 0:
+            return self
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.count += other.count
+        self.min = float(np.nanmin([self.min, other.min]))
+        self.max = float(np.nanmax([self.max, other.max]))
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # 奇数个元素时留下一个，保证权重总和不变
+                if len(items) % 2 == 1:
+                    kept, items = items[-1:], items[:-1]
+                else:
+                    kept = np.empty(0)
+                offset = int(self._rng.integers(0, 2))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+                self.levels[level] = kept
+            level += 1
+
+    def quantiles(self, qs) -> np.ndarray:
+        """估计分位数"""
+        qs = np.atleast_1d(np.asarray(qs, dtype="float64"))
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_h), 2.0 ** h) for h, items_h in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        result = items[np.minimum(positions, len(items) - 1)]
+        # 端点使用精确的最小/最大值
+        result = np.where(qs <= 0, self.min, result)
+        return np.where(qs >= 1, self.max, result)
+
+
+# ========================================
+# HyperLogLog 去重计数
+# ========================================
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """uint64 数组每个元素的二进制位数（按高低 32 位拆分，保证浮点运算精确）"""
+    high = (values >> np.uint64(32)).astype("float64")
+    low = (values & np.uint64(0xFFFFFFFF)).astype("float64")
+    high_bits = np.frexp(high)[1]
+    low_bits = np.frexp(low)[1]
+    return np.where(high > 0, high_bits + 32, low_bits)
+
+
+def hash_values(values: pd.Series, numeric_strings: bool = False) -> np.ndarray:
+    """
+    非空值的 64 位哈希
+
+    逐个取值规范化（与 duplicates.value_hashes 相同）：整数值的浮点数与整数哈希相同，
+    不论所在块中是否还有非整数值，分块读取时类型不同也能对应。
+    numeric_strings=True 时能解析为数值的字符串也按数值哈希（只用于分块读取文件）。
+    """
+    return value_hashes(values.dropna(), numeric_strings)
+
+
+def canonical_values(values: pd.Series) -> pd.Series:
+    """逐个取值规范化：整数值的浮点数转为整数，其他取值不变（用于按取值计数）"""
+    if not pd.api.types.is_float_dtype(values):
+        return values
+    array = values.to_numpy(dtype="float64", na_value=np.nan)
+    integral = np.isfinite(array) & (np.floor(array) == array) & (np.abs(array) < 2 ** 63)
+    if not integral.any():
+        return values
+    canonical = values.astype(object)
+    canonical[integral] = [int(value) for value in array[integral]]
+    return canonical
+
+
+class HyperLogLog:
+    """HyperLogLog 去重计数（Flajolet 等 2007），2^p 个寄存器"""
+
+    def __init__(self, p: int = 14):
+        self.p = int(p)
+        self.registers = np.zeros(1 << self.p, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """相对标准误差"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """加入 64 位哈希值"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if len(hashes) == 0:
+            return self
+
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = ((64 - self.p) - _bit_length(remaining) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def update(self, values: pd.Series, numeric_strings: bool = False) -> "HyperLogLog":
+        """加入一列取值（忽略空值，numeric_strings 见 hash_values）"""
+        return self.update_hashes(hash_values(values, numeric_strings))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """合并另一个 HyperLogLog（两者的 p 应相同）"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        """估计去重后的取值个数"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            # 小基数时使用线性计数
+            return m * math.log(m / zeros)
+        return float(raw)
+
+
+# ========================================
+# Misra-Gries 高频取值
+# ========================================
+
+class MisraGries:
+    """
+    Misra-Gries 高频取值摘要，最多保留 k 个计数器
+
+    计数器只会低估真实频次，低估量不超过 max_error；
+    频次超过 n / (k + 1) 的取值一定会被保留。
+    """
+
+    def __init__(self, k: int = 100):
+        self.k = int(k)
+        self.n = 0
+        self.counters: Dict[Any, int] = {}
+
+    @property
+    def max_error(self) -> float:
+        """单个计数器的最大低估量"""
+        return (self.n - sum(self.counters.values())) / (self.k + 1)
+
+    def _absorb(self, counts: Dict[Any, int], n: int) -> "MisraGries":
+        merged = dict(self.counters)
+        for value, count in counts.items():
+            merged[value] = merged.get(value, 0) + int(count)
+
+        if len(merged) > self.k:
+            # 减去第 k+1 大的计数，只保留仍为正数的计数器
+            cut = sorted(merged.values(), reverse=True)[self.k]
+            merged = {value: count - cut for value, count in merged.items() if count > cut}
+
+        self.counters = merged
+        self.n += n
+        return self
+
+    def update(self, values: pd.Series) -> "MisraGries":
+        """加入一列取值（忽略空值，整数值的浮点数与整数计为同一取值）"""
+        counts = canonical_values(values).value_counts(dropna=True)
+        return self._absorb(counts.to_dict(), int(counts.sum()))
+
+    def merge(self, other: "MisraGries") -> "MisraGries":
+        """合并另一个摘要（两者的 k 应相同）"""
+        return self._absorb(other.counters, other.n)
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        """估计频次最高的 n 个取值"""
+        ranked = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [{"value": value, "count": count} for value, count in ranked]
@@ -1,25 +1,97 @@
 """
 统计分析工具
 """
+import math
+import os
+
 import numpy as np
 import pandas as pd
-from scipy import stats
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
 from datetime import datetime, timedelta
 
+from src.settings import get_setting
+from src.tools.data_loader import get_dataset_columns, iter_dataset_chunks, load_dataset
+from src.tools.anomaly_detection import ANOMALY_METHODS, DEFAULT_THRESHOLDS, isolation_forest_scores, univariate_scores
+from src.tools.correlation_engine import (
+    CORRELATION_METHODS, STRONG_CORRELATION_THRESHOLD, correlation_matrix, correlation_pairs
+)
+from src.tools.dataset_profile import column_statistics
+from src.tools.result_cache import memoize_result
+from src.tools.sketches import HyperLogLog, KLLSketch, MisraGries, canonical_values
+from src.tools.stats_kernels import (
+    column_moments, describe_matrix, growth_rates, iqr_bounds, merge_moments, moments_to_stats,
+    trailing_mean, zscore_outliers
+)
+from src.tools.trend_engine import date_order
+
+
+def basic_statistics_from_profile(file_path: str, column: str) -> Optional[Dict[str, Any]]:
+    """
+    从数据集概要中的可合并聚合量计算基本统计量
+
+    追加写入的 CSV 只需解析新增行即可保持最新；
+    分位数无法增量合并，概要中的分位数过期时只加载该列重新计算。
 
-def calculate_basic_statistics(df: pd.DataFrame, column: str) -> Dict[str, float]:
+    Args:
+        file_path: 数据文件路径
+        column: 列名
+
+    Returns:
+        与 calculate_basic_statistics 相同结构的统计结果；非数值列返回 None
+    """
+    profile_stats = column_statistics(file_path, column)
+    if profile_stats is None:
+        return None
+
+    quantiles = profile_stats["quantiles"]
+    if quantiles is None:
+        series = load_dataset(file_path, columns=[column])[column]
+        quantiles = {q: float(series.quantile(q)) for q in (0.25, 0.5, 0.75)}
+
+    non_null = int(profile_stats["count"])
+    total = non_null + int(profile_stats["nulls"])
+    return {
+        "column": column,
+        "type": "numeric",
+        "count": total,
+        "non_null_count": non_null,
+        "mean": float(profile_stats["mean"]),
+        "median": float(quantiles[0.5]),
+        "std": float(profile_stats["std"]),
+        "var": float(profile_stats["var"]),
+        "min": float(profile_stats["min"]),
+        "max": float(profile_stats["max"]),
+        "range": float(profile_stats["max"] - profile_stats["min"]),
+        "q25": float(quantiles[0.25]),
+        "q50": float(quantiles[0.5]),
+        "q75": float(quantiles[0.75]),
+        "iqr": float(quantiles[0.75] - quantiles[0.25]),
+        "skewness": float(profile_stats["skewness"]) if total > 2 else 0.0,
+        "kurtosis": float(profile_stats["kurtosis"]) if total > 3 else 0.0
+    }
+
+
+@memoize_result()
+def calculate_basic_statistics(df: Union[pd.DataFrame, str], column: str) -> Dict[str, float]:
     """
     计算基本统计量：均值、中位数、标准差、最小值、最大值、分位数
 
     Args:
-        df: DataFrame
+        df: DataFrame 或数据文件路径（传入路径时优先使用数据集概要）
         column: 列名
 
     Returns:
-        统计结果字典
+        统计结果字典（count 为总行数，non_null_count 为非缺失值个数）
     """
     try:
+        if isinstance(df, str):
+            result = basic_statistics_from_profile(df, column)
+            if result is not None:
+                return result
+            if column not in get_dataset_columns(df):
+                return {"column": column, "error": f"列 '{column}' 不存在"}
+            return {"column": column, "type": "categorical", "error": "该列不是数值类型"}
+
         series = df[column]
 
         if not pd.api.types.is_numeric_dtype(series):
@@ -33,6 +105,7 @@ def calculate_basic_statistics(df: pd.DataFrame, column: str) -> Dict[str, float
             "column": column,
             "type": "numeric",
             "count": len(series),
+            "non_null_count": int(series.count()),
             "mean": float(series.mean()),
             "median": float(series.median()),
             "std": float(series.std()),
@@ -57,6 +130,198 @@ def calculate_basic_statistics(df: pd.DataFrame, column: str) -> Dict[str, float
         }
 
 
+# 列数不超过该值时才返回完整相关系数矩阵
+MATRIX_MAX_COLUMNS = 20
+
+
+def should_use_sketches(file_path: str) -> bool:
+    """文件超过 settings.yaml 的 data.sketch_min_mb 时使用 Sketch 近似统计"""
+    min_bytes = float(get_setting("data.sketch_min_mb", 2048)) * 1024 * 1024
+    return os.path.getsize(file_path) >= min_bytes
+
+
+@memoize_result()
+def calculate_approximate_statistics(
+    file_path: str,
+    columns: Optional[List[str]] = None,
+    k: int = 200,
+    p: int = 14,
+    top_k: int = 10,
+    chunk_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    逐块遍历数据文件，用可合并的 Sketch 计算统计量（不把数据整体读入内存）
+
+    计数、均值、标准差、最值、偏度、峰度通过可合并的矩统计量精确计算；
+    分位数（KLL）、去重计数（HyperLogLog）和高频取值（Misra-Gries）为近似值，
+    误差界见返回结果中的 error_bounds。
+    列在中途出现非数值数据时改按分类列统计，此前各块的取值不计入高频取值。
+
+    Args:
+        file_path: 数据文件路径
+        columns: 需要统计的列（None 表示全部）
+        k: KLL 精度参数（越大越精确）
+        p: HyperLogLog 寄存器位数（2^p 个寄存器）
+        top_k: 每个分类列返回的高频取值个数
+        chunk_size: 每块行数（默认读取 settings.yaml 的 data.chunk_size）
+
+    Returns:
+        {"statistics": 数值列统计, "categorical": 分类列统计, "approximate": True, "error_bounds": 误差界}
+    """
+    moments: Dict[str, Dict[str, Any]] = {}
+    quantile_sketches: Dict[str, KLLSketch] = {}
+    distinct_sketches: Dict[str, HyperLogLog] = {}
+    frequent_sketches: Dict[str, MisraGries] = {}
+    total_rows = 0
+
+    for chunk in iter_dataset_chunks(file_path, chunk_size=chunk_size, columns=columns):
+        total_rows += len(chunk)
+        for col in chunk.columns:
+            series = chunk[col]
+            # 不同块中同一列可能被推断为字符串或数值，能解析为数值的字符串按数值去重
+            distinct_sketches.setdefault(col, HyperLogLog(p)).update(series, numeric_strings=True)
+
+            # 全部为空的块会被推断为 float64，不能据此判断列类型
+            if series.isna().all():
+                if col in moments:
+                    moments[col] = merge_moments(moments[col], column_moments(series.to_numpy(dtype="float64")))
+                continue
+
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) \
+                    and col not in frequent_sketches:
+                values = series.to_numpy(dtype="float64", na_value=np.nan)
+                chunk_moments = column_moments(values)
+                moments[col] = merge_moments(moments[col], chunk_moments) if col in moments else chunk_moments
+                quantile_sketches.setdefault(col, KLLSketch(k, seed=0)).update(values)
+            else:
+                # 一旦出现非数值数据即按分类列处理
+                moments.pop(col, None)
+                quantile_sketches.pop(col, None)
+                frequent_sketches.setdefault(col, MisraGries(max(top_k * 10, 100))).update(canonical_values(series).astype(str).where(series.notna()))
+
+    statistics = {}
+    for col, merged in moments.items():
+        summary = moments_to_stats(merged)
+        q25, q50, q75 = (float(v) for v in quantile_sketches[col].quantiles([0.25, 0.5, 0.75]))
+        statistics[col] = {
+            "column": col,
+            "type": "numeric",
+            "count": total_rows,
+            "non_null_count": int(summary["count"]),
+            "mean": float(summary["mean"]),
+            "median": q50,
+            "std": float(summary["std"]),
+            "var": float(summary["var"]),
+            "min": float(summary["min"]),
+            "max": float(summary["max"]),
+            "range": float(summary["max"] - summary["min"]),
+            "q25": q25,
+            "q50": q50,
+            "q75": q75,
+            "iqr": q75 - q25,
+            "skewness": float(summary["skewness"]) if total_rows > 2 else 0.0,
+            "kurtosis": float(summary["kurtosis"]) if total_rows > 3 else 0.0,
+            "distinct": int(round(distinct_sketches[col].estimate()))
+        }
+
+    categorical = {
+        col: {
+            "column": col,
+            "type": "categorical",
+            "count": total_rows,
+            "distinct": int(round(distinct_sketches[col].estimate())),
+            "top_values": sketch.top(top_k),
+            "top_values_max_undercount": int(math.ceil(sketch.max_error))
+        }
+        for col, sketch in frequent_sketches.items()
+    }
+
+    return {
+        "statistics": statistics,
+        "categorical": categorical,
+        "approximate": True,
+        "error_bounds": {
+            "quantile_rank_error": round(KLLSketch(k).rank_error, 4),
+            "distinct_relative_error": round(HyperLogLog(p).relative_error, 4),
+            "note": (f"分位数的排名误差约 ±{KLLSketch(k).rank_error:.1%}（99% 置信度），"
+                     f"去重计数相对标准误差约 {HyperLogLog(p).relative_error:.1%}，"
+                     "高频取值计数可能偏低（见 top_values_max_undercount）；"
+                     "计数、均值、标准差、最值、偏度、峰度为精确值")
+        }
+    }
+
+
+@memoize_result()
+def calculate_all_statistics(
+    df: Union[pd.DataFrame, str],
+    columns: Optional[List[str]] = None,
+    approximate: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    一次计算所有数值列的基本统计量（与逐列调用 calculate_basic_statistics 结果一致）
+
+    所有数值列组成一个二维数组，矩统计量按列向量化计算，每列只排序一次得到最值和分位数。
+
+    Args:
+        df: DataFrame 或数据文件路径（传入路径时只读取需要的列）
+        columns: 需要统计的列（None 表示全部数值列）
+        approximate: 是否改用 calculate_approximate_statistics 逐块近似计算
+                     （仅对文件路径有效，默认在文件超过 data.sketch_min_mb 时启用）
+
+    Returns:
+        {"statistics": {列名: 统计结果}, "skipped": 非数值列列表}
+    """
+    try:
+        if isinstance(df, str):
+            if columns is not None:
+                missing_cols = [col for col in columns if col not in get_dataset_columns(df)]
+                if missing_cols:
+                    return {"error": f"列 {missing_cols} 不存在"}
+            if approximate is None:
+                approximate = should_use_sketches(df)
+            if approximate:
+                return calculate_approximate_statistics(df, columns)
+            df = load_dataset(df, columns=columns)
+
+        selected = df[columns] if columns is not None else df
+        numeric = selected.select_dtypes(include=[np.number]).columns.tolist()
+        skipped = [col for col in selected.columns if col not in numeric]
+
+        matrix = selected[numeric].to_numpy(dtype="float64", na_value=np.nan)
+        described = describe_matrix(matrix, quantiles=(0.25, 0.5, 0.75))
+
+        statistics = {}
+        for i, col in enumerate(numeric):
+            q25, q50, q75 = (float(v) for v in described["quantiles"][:, i])
+            statistics[col] = {
+                "column": col,
+                "type": "numeric",
+                "count": len(selected),
+                "non_null_count": int(described["count"][i]),
+                "mean": float(described["mean"][i]),
+                "median": q50,
+                "std": float(described["std"][i]),
+                "var": float(described["var"][i]),
+                "min": float(described["min"][i]),
+                "max": float(described["max"][i]),
+                "range": float(described["max"][i] - described["min"][i]),
+                "q25": q25,
+                "q50": q50,
+                "q75": q75,
+                "iqr": q75 - q25,
+                "skewness": float(described["skewness"][i]) if len(selected) > 2 else 0.0,
+                "kurtosis": float(described["kurtosis"][i]) if len(selected) > 3 else 0.0
+            }
+
+        return {"statistics": statistics, "skipped": skipped}
+
+    except Exception as e:
+        return {
+            "error": str(e)
+        }
+
+
+@memoize_result()
 def analyze_trend(df: pd.DataFrame, value_column: str, date_column: str, periods: int = 7) -> Dict[str, Any]:
     """
     分析时间序列趋势
@@ -71,24 +336,17 @@ def analyze_trend(df: pd.DataFrame, value_column: str, date_column: str, periods
         趋势分析结果
     """
     try:
-        # 确保日期列是 datetime 类型
-        df[date_column] = pd.to_datetime(df[date_column])
+        # 解析并排序日期（不修改调用方的 DataFrame；多列、重采样分析见 trend_engine.analyze_trends）
+        order, dates = date_order(df[date_column])
+        dates = pd.Series(dates)
 
-        # 按日期排序
-        df_sorted = df.sort_values(date_column)
+        values = df[value_column].to_numpy(dtype="float64", na_value=np.nan)[order]
 
         # 计算同比/环比增长
-        df_sorted['value_lag'] = df_sorted[value_column].shift(1)
-        df_sorted['growth_rate'] = (
-            (df_sorted[value_column] - df_sorted['value_lag']) /
-            df_sorted['value_lag'] * 100
-        ).round(2)
-
-        # 计算移动平均
-        df_sorted['ma'] = df_sorted[value_column].rolling(window=periods).mean()
+        growth = np.round(growth_rates(values, skip_zero_base=False), 2)
 
         # 趋势判断
-        avg_growth = df_sorted['growth_rate'].mean()
+        avg_growth = np.nanmean(growth) if np.any(~np.isnan(growth)) else np.nan
         if avg_growth > 5:
             trend = "上升"
         elif avg_growth < -5:
@@ -97,34 +355,34 @@ def analyze_trend(df: pd.DataFrame, value_column: str, date_column: str, periods
             trend = "稳定"
 
         # 检测拐点
-        df_sorted['growth_change'] = df_sorted['growth_rate'].diff()
-        inflection_points = df_sorted[
-            df_sorted['growth_change'].abs() > df_sorted['growth_change'].std()
-        ][date_column].tolist()
+        with np.errstate(invalid="ignore"):
+            growth_change = np.diff(growth, prepend=np.nan)
+            changes = growth_change[~np.isnan(growth_change)]
+            change_std = changes.std(ddof=1) if len(changes) > 1 else np.nan
+            inflection_mask = np.abs(growth_change) > change_std
+        inflection_points = dates[inflection_mask].tolist()
+
+        head_avg = float(np.nanmean(values[:periods]))
+        tail_avg = float(np.nanmean(values[-periods:]))
 
         return {
             "value_column": value_column,
             "date_column": date_column,
+            # 日期缺失或无法解析的行不参与分析
+            "dropped_rows": int(len(df) - len(order)),
             "analysis_period": {
-                "start": df_sorted[date_column].min(),
-                "end": df_sorted[date_column].max()
+                "start": dates.iloc[0],
+                "end": dates.iloc[-1]
             },
             "trend": trend,
             "average_growth_rate": float(avg_growth),
-            "total_growth": float(
-                ((df_sorted[value_column].iloc[-1] - df_sorted[value_column].iloc[0]) /
-                 df_sorted[value_column].iloc[0]) * 100).round(2)
-            ),
-            "moving_average": float(df_sorted['ma'].iloc[-1]),
+            "total_growth": round(float((values[-1] - values[0]) / values[0] * 100), 2),
+            "moving_average": trailing_mean(values, periods),
             "inflection_points": inflection_points,
             "recent_performance": {
-                "last_period_avg": float(df_sorted[value_column].tail(periods).mean()),
-                "first_period_avg": float(df_sorted[value_column].head(periods).mean()),
-                "performance_change": float(
-                    ((df_sorted[value_column].tail(periods).mean() -
-                      df_sorted[value_column].head(periods).mean()) /
-                     df_sorted[value_column].head(periods).mean()) * 100
-                ).round(2)
+                "last_period_avg": tail_avg,
+                "first_period_avg": head_avg,
+                "performance_change": round(float((tail_avg - head_avg) / head_avg * 100), 2)
             }
         }
 
@@ -134,14 +392,26 @@ def analyze_trend(df: pd.DataFrame, value_column: str, date_column: str, periods
         }
 
 
-def calculate_correlation_matrix(df: pd.DataFrame, columns: List[str], method: str = "pearson") -> Dict[str, Any]:
+@memoize_result()
+def calculate_correlation_matrix(
+    df: pd.DataFrame,
+    columns: List[str],
+    method: str = "pearson",
+    threshold: float = STRONG_CORRELATION_THRESHOLD,
+    top_k: int = 100
+) -> Dict[str, Any]:
     """
     计算相关性矩阵
 
+    Pearson / Spearman 使用分块相关性引擎，只返回绝对值最大的 top_k 个强相关列对；
+    完整矩阵仅在列数不超过 MATRIX_MAX_COLUMNS 时返回。
+
     Args:
         df: DataFrame
         columns: 要分析的列名列表
         method: 相关系数计算方法（pearson/spearman/kendall）
+        threshold: 强相关阈值（相关系数绝对值）
+        top_k: 最多返回的强相关列对数
 
     Returns:
         相关性矩阵
@@ -156,28 +426,37 @@ def calculate_correlation_matrix(df: pd.DataFrame, columns: List[str], method: s
                 "numeric_columns": numeric_cols
             }
 
-        # 计算相关系数
-        corr_matrix = df[numeric_cols].corr(method=method)
-
-        # 找出强相关关系
-        strong_correlations = []
-        for i, col1 in enumerate(numeric_cols):
-            for j, col2 in enumerate(numeric_cols):
-                if i < j:  # 避免重复和自相关
-                    corr_value = corr_matrix.loc[col1, col2]
-                    if abs(corr_value) >= 0.7:  # 强相关阈值
-                        strong_correlations.append({
-                            "var1": col1,
-                            "var2": col2,
-                            "correlation": round(corr_value, 3),
-                            "strength": "strong" if abs(corr_value) >= 0.9 else "moderate"
-                        })
+        if method in CORRELATION_METHODS:
+            screened = correlation_pairs(df[numeric_cols], method=method, threshold=threshold, top_k=top_k)
+            pairs, total_pairs = screened["pairs"], screened["total_pairs"]
+            matrix = correlation_matrix(df[numeric_cols], method) if len(numeric_cols) <= MATRIX_MAX_COLUMNS else None
+        else:
+            # kendall 没有向量化实现，沿用 pandas
+            matrix = df[numeric_cols].corr(method=method)
+            upper = matrix.where(np.triu(np.ones(matrix.shape, dtype=bool), k=1)).stack()
+            upper = upper[upper.abs() >= threshold]
+            upper = upper.reindex(upper.abs().sort_values(ascending=False).index)
+            pairs = [(col1, col2, float(value)) for (col1, col2), value in upper.head(top_k).items()]
+            total_pairs = len(upper)
+
+        strong_correlations = [
+            {
+                "var1": col1,
+                "var2": col2,
+                "correlation": round(corr_value, 3),
+                "strength": "strong" if abs(corr_value) >= 0.9 else "moderate"
+            }
+            for col1, col2, corr_value in pairs
+        ]
 
-        return {
+        result = {
             "method": method,
-            "matrix": corr_matrix.to_dict(),
-            "strong_correlations": sorted(strong_correlations, key=lambda x: abs(x['correlation']), reverse=True)
+            "strong_correlations": strong_correlations,
+            "total_strong_correlations": total_pairs
         }
+        if matrix is not None:
+            result["matrix"] = matrix.to_dict()
+        return result
 
     except Exception as e:
         return {
@@ -185,15 +464,16 @@ def calculate_correlation_matrix(df: pd.DataFrame, columns: List[str], method: s
         }
 
 
-def detect_anomalies(df: pd.DataFrame, column: str, method: str = "zscore", threshold: float = 2.0) -> Dict[str, Any]:
+@memoize_result()
+def detect_anomalies(df: pd.DataFrame, column: str, method: str = "zscore", threshold: Optional[float] = None) -> Dict[str, Any]:
     """
-    检测异常值
+    检测异常值（多列批量检测见 anomaly_detection.detect_anomalies_batch）
 
     Args:
         df: DataFrame
         column: 列名
-        method: 检测方法（zscore/iqr/isolation_forest）
-        threshold: 异常阈值
+        method: 检测方法（zscore/iqr/mad/rolling_zscore/isolation_forest）
+        threshold: 异常阈值（zscore 默认 2.0，iqr 固定为 1.5 倍 IQR，其他方法见 DEFAULT_THRESHOLDS）
 
     Returns:
         异常检测结果
@@ -203,38 +483,53 @@ def detect_anomalies(df: pd.DataFrame, column: str, method: str = "zscore", thre
 
         anomalies = []
 
+        values = series.to_numpy(dtype="float64")
+
         if method == "zscore":
-            # 使用标准差法
-            z_scores = np.abs(stats.zscore(series))
-            anomaly_indices = np.where(z_scores > threshold)[0]
+            # 使用标准差法（总体标准差，与 scipy.stats.zscore 一致）
+            threshold = 2.0 if threshold is None else threshold
+            anomaly_positions, z_scores = zscore_outliers(values, threshold, ddof=0)
 
-            for idx in anomaly_indices:
+            for pos in anomaly_positions:
+                idx = series.index[pos]
                 anomalies.append({
-                    "index": int(df.index[idx]),
-                    "value": float(series.iloc[idx]),
-                    "z_score": float(z_scores[idx]),
-                    "date": str(df.index[idx]) if hasattr(df.index[idx], 'strftime') else str(df.index[idx])
+                    "index": int(idx),
+                    "value": float(values[pos]),
+                    "z_score": float(abs(z_scores[pos])),
+                    "date": str(idx)
                 })
 
         elif method == "iqr":
             # 使用四分位距法
-            q1 = series.quantile(0.25)
-            q3 = series.quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
+            lower_bound, upper_bound = iqr_bounds(values)
+            anomaly_positions = np.flatnonzero((values < lower_bound) | (values > upper_bound))
 
-            anomaly_indices = series[(series < lower_bound) | (series > upper_bound)].index
-
-            for idx in anomaly_indices:
+            for pos in anomaly_positions:
                 anomalies.append({
-                    "index": int(idx),
-                    "value": float(series.loc[idx]),
-                    "lower_bound": float(lower_bound),
-                    "upper_bound": float(upper_bound),
+                    "index": int(series.index[pos]),
+                    "value": float(values[pos]),
+                    "lower_bound": lower_bound,
+                    "upper_bound": upper_bound,
                     "method": "iqr"
                 })
 
+        elif method in ANOMALY_METHODS and method != "mahalanobis":
+            threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+            if method == "isolation_forest":
+                scores = isolation_forest_scores(values[:, None])
+            else:
+                scores = univariate_scores(values, method)[:, 0]
+            with np.errstate(invalid="ignore"):
+                anomaly_positions = np.flatnonzero(scores > threshold)
+
+            for pos in anomaly_positions:
+                anomalies.append({
+                    "index": int(series.index[pos]),
+                    "value": float(values[pos]),
+                    "score": float(scores[pos]),
+                    "method": method
+                })
+
         else:
             return {
                 "error": f"不支持的异常检测方法：{method}"
@@ -0,0 +1,288 @@
+"""
+向量化统计内核
+
+统计工具共用的 NumPy 实现，避免在各个工具中重复编写（并各自演化出不同结果）的逐行循环。
+"""
+import math
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+
+# ========================================
+# 可合并的矩统计量
+# ========================================
+
+def column_moments(values: np.ndarray) -> Dict[str, Any]:
+    """
+    计算一列数值的可合并矩统计量（自动忽略 NaN）
+
+    Args:
+        values: 一维数值数组
+
+    Returns:
+        {count, nulls, sum, mean, m2, m3, m4, min, max}，其中 m2/m3/m4 为中心矩之和
+    """
+    values = np.asarray(values, dtype="float64")
+    mask = np.isnan(values)
+    valid = values[~mask]
+    n = len(valid)
+
+    if n == 0:
+        return {"count": 0, "nulls": int(mask.sum()), "sum": 0.0, "mean": 0.0,
+                "m2": 0.0, "m3": 0.0, "m4": 0.0, "min": None, "max": None}
+
+    mean = float(valid.mean())
+    dev = valid - mean
+    dev2 = dev * dev
+    return {
+        "count": n,
+        "nulls": int(mask.sum()),
+        "sum": float(valid.sum()),
+        "mean": mean,
+        "m2": float(dev2.sum()),
+        "m3": float((dev2 * dev).sum()),
+        "m4": float((dev2 * dev2).sum()),
+        "min": float(valid.min()),
+        "max": float(valid.max())
+    }
+
+
+def merge_moments(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    合并两组矩统计量（Chan / Pébay 并行公式），结果与对合并后的数据直接计算一致
+
+    Args:
+        a: column_moments 的结果
+        b: column_moments 的结果
+
+    Returns:
+        合并后的矩统计量
+    """
+    na, nb = a["count"], b["count"]
+    nulls = a["nulls"] + b["nulls"]
+    if na == 0:
+        return {**b, "nulls": nulls}
+    if nb == 0:
+        return {**a, "nulls": nulls}
+
+    n = na + nb
+    delta = b["mean"] - a["mean"]
+    delta2 = delta * delta
+
+    m2 = a["m2"] + b["m2"] + delta2 * na * nb / n
+    m3 = (a["m3"] + b["m3"]
+          + delta * delta2 * na * nb * (na - nb) / (n * n)
+          + 3 * delta * (na * b["m2"] - nb * a["m2"]) / n)
+    m4 = (a["m4"] + b["m4"]
+          + delta2 * delta2 * na * nb * (na * na - na * nb + nb * nb) / (n ** 3)
+          + 6 * delta2 * (na * na * b["m2"] + nb * nb * a["m2"]) / (n * n)
+          + 4 * delta * (na * b["m3"] - nb * a["m3"]) / n)
+
+    return {
+        "count": n,
+        "nulls": nulls,
+        "sum": a["sum"] + b["sum"],
+        "mean": a["mean"] + delta * nb / n,
+        "m2": m2,
+        "m3": m3,
+        "m4": m4,
+        "min": min(a["min"], b["min"]),
+        "max": max(a["max"], b["max"])
+    }
+
+
+def moments_to_stats(m: Dict[str, Any]) -> Dict[str, float]:
+    """
+    由矩统计量得到描述统计（std/var/skew/kurtosis 与 pandas 的无偏估计一致，
+    有效值不足 3/4 个时偏度/峰度为 NaN，常数列为 0）
+
+    Args:
+        m: column_moments / merge_moments 的结果
+
+    Returns:
+        {count, mean, std, var, min, max, skewness, kurtosis}
+    """
+    n = m["count"]
+    var = m["m2"] / (n - 1) if n > 1 else math.nan
+
+    skew = math.nan if n < 3 else 0.0
+    if n > 2 and m["m2"] > 0:
+        g1 = (m["m3"] / n) / (m["m2"] / n) ** 1.5
+        skew = g1 * math.sqrt(n * (n - 1)) / (n - 2)
+
+    kurt = math.nan if n < 4 else 0.0
+    if n > 3 and m["m2"] > 0:
+        numer = n * (n + 1) * (n - 1) * m["m4"]
+        denom = (n - 2) * (n - 3) * m["m2"] ** 2
+        kurt = numer / denom - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+
+    return {
+        "count": n,
+        "mean": m["mean"] if n else math.nan,
+        "std": math.sqrt(var) if n > 1 else math.nan,
+        "var": var,
+        "min": m["min"] if n else math.nan,
+        "max": m["max"] if n else math.nan,
+        "skewness": skew,
+        "kurtosis": kurt
+    }
+
+
+# ========================================
+# 多列描述统计
+# ========================================
+
+def describe_matrix(matrix: np.ndarray, quantiles=(0.25, 0.5, 0.75)) -> Dict[str, np.ndarray]:
+    """
+    一次计算二维数组每一列的描述统计（忽略 NaN）
+
+    每列只排序一次，最小值、最大值和所有分位数都从排序结果中读取；
+    矩统计量在整个二维数组上按列向量化计算。
+
+    Args:
+        matrix: 形状为 (行数, 列数) 的数值数组
+        quantiles: 需要的分位数（与 pandas 的线性插值一致）
+
+    Returns:
+        {count, mean, std, var, min, max, skewness, kurtosis, quantiles}，
+        除 quantiles 形状为 (len(quantiles), 列数) 外，其余均为长度为列数的数组
+    """
+    matrix = np.asarray(matrix, dtype="float64")
+    if matrix.ndim != 2:
+        raise ValueError("describe_matrix 需要二维数组")
+    if matrix.shape[0] == 0:
+        # 空表按一行全缺失处理，所有统计量均为 NaN
+        matrix = np.full((1, matrix.shape[1]), np.nan)
+
+    n_cols = matrix.shape[1]
+    mask = np.isnan(matrix)
+    count = (~mask).sum(axis=0)
+    safe_count = np.maximum(count, 1)
+
+    mean = np.where(mask, 0.0, matrix).sum(axis=0) / safe_count
+    dev = np.where(mask, 0.0, matrix - mean)
+    dev2 = dev * dev
+    m2 = dev2.sum(axis=0)
+    m3 = (dev2 * dev).sum(axis=0)
+    m4 = (dev2 * dev2).sum(axis=0)
+    del dev, dev2
+
+    # NaN 排在每列末尾，有效值为前 count 行
+    ordered = np.sort(matrix, axis=0)
+    cols = np.arange(n_cols)
+    last = np.maximum(count - 1, 0)
+    values_at = np.empty((len(quantiles), n_cols))
+    for i, q in enumerate(quantiles):
+        position = last * q
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        low_values, high_values = ordered[lower, cols], ordered[upper, cols]
+        values_at[i] = low_values + (high_values - low_values) * (position - lower)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = np.where(count > 1, m2 / (count - 1), np.nan)
+        n = count.astype("float64")
+        g1 = (m3 / n) / (m2 / n) ** 1.5
+        skew = np.where((count > 2) & (m2 > 0), g1 * np.sqrt(n * (n - 1)) / (n - 2), 0.0)
+        kurt = np.where(
+            (count > 3) & (m2 > 0),
+            n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2) - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)),
+            0.0
+        )
+    # 与 pandas 一致：有效值不足时为 NaN
+    skew = np.where(count < 3, np.nan, skew)
+    kurt = np.where(count < 4, np.nan, kurt)
+
+    empty = count == 0
+    return {
+        "count": count,
+        "mean": np.where(empty, np.nan, mean),
+        "std": np.sqrt(var),
+        "var": var,
+        "min": np.where(empty, np.nan, ordered[0, cols]),
+        "max": np.where(empty, np.nan, ordered[last, cols]),
+        "skewness": skew,
+        "kurtosis": kurt,
+        "quantiles": np.where(empty, np.nan, values_at)
+    }
+
+
+# ========================================
+# 趋势与异常检测
+# ========================================
+
+def growth_rates(values: np.ndarray, skip_zero_base: bool = True) -> np.ndarray:
+    """
+    逐期增长率（%）：(v[i] - v[i-1]) / v[i-1] * 100
+
+    Args:
+        values: 按时间排序的一维数值数组
+        skip_zero_base: True 时去掉上一期为 0 或缺失的项（结果长度可能小于 n-1）；
+                        False 时保持与输入等长，第一项为 NaN，上一期为 0 时为 ±inf
+
+    Returns:
+        增长率数组
+    """
+    values = np.asarray(values, dtype="float64")
+    if len(values) < 2:
+        return np.empty(0) if skip_zero_base else np.full(len(values), np.nan)
+
+    previous, current = values[:-1], values[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = (current - previous) / previous * 100
+
+    if skip_zero_base:
+        return rates[(previous != 0) & ~np.isnan(rates)]
+    return np.concatenate([[np.nan], rates])
+
+
+def trailing_mean(values: np.ndarray, window: int) -> float:
+    """最后 window 个值的均值（与 rolling(window).mean().iloc[-1] 一致，不足 window 个或含缺失值时为 NaN）"""
+    values = np.asarray(values, dtype="float64")
+    if window <= 0 or len(values) < window:
+        return math.nan
+    return float(values[-window:].mean())
+
+
+def zscores(values: np.ndarray, ddof: int = 1) -> np.ndarray:
+    """
+    标准分数 (v - mean) / std（忽略 NaN；标准差为 0 时全部为 0）
+
+    Args:
+        values: 一维数值数组
+        ddof: 标准差自由度（1 与 pandas 一致，0 与 scipy.stats.zscore 一致）
+
+    Returns:
+        与输入等长的 z 分数数组（缺失值位置为 NaN）
+    """
+    values = np.asarray(values, dtype="float64")
+    valid = values[~np.isnan(values)]
+    if len(valid) <= ddof:
+        return np.zeros_like(values)
+
+    std = valid.std(ddof=ddof)
+    if std == 0:
+        return np.where(np.isnan(values), np.nan, 0.0)
+    return (values - valid.mean()) / std
+
+
+def zscore_outliers(values: np.ndarray, threshold: float = 2.0, ddof: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    标准差法异常检测
+
+    Returns:
+        (异常值位置数组, 全部 z 分数)
+    """
+    z = zscores(values, ddof=ddof)
+    with np.errstate(invalid="ignore"):
+        positions = np.flatnonzero(np.abs(z) > threshold)
+    return positions, z
+
+
+def iqr_bounds(values: np.ndarray, k: float = 1.5) -> Tuple[float, float]:
+    """四分位距法的上下界 (Q1 - k*IQR, Q3 + k*IQR)，分位数与 pandas 的线性插值一致"""
+    values = np.asarray(values, dtype="float64")
+    q1, q3 = np.nanquantile(values, [0.25, 0.75])
+    iqr = q3 - q1
+    return float(q1 - k * iqr), float(q3 + k * iqr)
@@ -0,0 +1,266 @@
+"""
+按时间重采样的多序列趋势分析
+
+- 日期列只解析、排序一次：结果（有效日期的行位置和排好序的日期）按数据集版本缓存
+- 按 D（日）/ W（周，周一开始）/ M（月）重采样，多个指标列在同一个二维数组上一次聚合
+- 不修改、不复制调用方的 DataFrame：只按排序位置取出需要的列
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.tools.dataset_cache import dataset_fingerprint
+
+
+RESAMPLE_FREQUENCIES = ("D", "W", "M")
+RESAMPLE_AGGREGATIONS = ("sum", "mean")
+
+# 同比（与一年前同期比较）对应的周期数
+YEAR_OVER_YEAR_LAG = {"D": 365, "W": 52, "M": 12}
+
+# 趋势判断阈值：平均环比增长率（%）
+TREND_THRESHOLD_PCT = 5.0
+
+# 最多缓存的日期排序结果个数
+DATE_ORDER_CACHE_SIZE = 32
+
+_date_order_cache: "OrderedDict[tuple, Tuple[int, Tuple[np.ndarray, np.ndarray]]]" = OrderedDict()
+_date_order_lock = threading.Lock()
+
+
+def date_order(dates: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    解析并排序日期列
+
+    Args:
+        dates: 日期列（字符串或 datetime）
+
+    Returns:
+        (有效日期行按时间排序后的行位置, 排好序的日期 datetime64[ns])，无法解析的行被丢弃
+    """
+    parsed = pd.to_datetime(dates, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    positions = np.flatnonzero(~np.isnat(parsed))
+    order = positions[np.argsort(parsed[positions], kind="stable")]
+    return order, parsed[order]
+
+
+def get_date_order(file_path: str, df: pd.DataFrame, date_column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """获取数据集日期列的排序结果（按数据集版本和日期列缓存）"""
+    key = (dataset_fingerprint(file_path), date_column)
+    with _date_order_lock:
+        cached = _date_order_cache.get(key)
+        if cached is not None and cached[0] == len(df):
+            _date_order_cache.move_to_end(key)
+            return cached[1]
+
+    result = date_order(df[date_column])
+    with _date_order_lock:
+        _date_order_cache[key] = (len(df), result)
+        while len(_date_order_cache) > DATE_ORDER_CACHE_SIZE:
+            _date_order_cache.popitem(last=False)
+    return result
+
+
+def _period_starts(sorted_dates: np.ndarray, freq: str) -> np.ndarray:
+    """每个日期所属周期的起始日（datetime64[D]）"""
+    days = sorted_dates.astype("datetime64[D]")
+    if freq == "D":
+        return days
+    if freq == "W":
+        # 1970-01-01 是周四，偏移 3 天后按 7 天取整即为周一
+        day_numbers = days.astype(np.int64)
+        return ((day_numbers + 3) // 7 * 7 - 3).astype("datetime64[D]")
+    if freq == "M":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    raise ValueError(f"不支持的重采样频率：{freq}")
+
+
+def period_slots(sorted_dates: np.ndarray, freq: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将排好序的日期映射到连续的周期
+
+    Returns:
+        (从第一个到最后一个周期的连续起始日 datetime64[D], 每个日期所属周期在其中的位置)
+    """
+    starts = _period_starts(sorted_dates, freq)
+    if len(starts) == 0:
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.int64)
+    if freq == "M":
+        months = starts.astype("datetime64[M]")
+        grid = np.arange(months[0], months[-1] + 1).astype("datetime64[D]")
+        return grid, (months - months[0]).astype(np.int64)
+    step = 7 if freq == "W" else 1
+    grid = np.arange(starts[0], starts[-1] + 1, step)
+    return grid, (starts - starts[0]).astype(np.int64) // step
+
+
+def future_periods(last: np.datetime64, horizon: int, freq: str) -> np.ndarray:
+    """last 之后 horizon 个周期的起始日"""
+    if freq == "M":
+        month = np.datetime64(last, "M")
+        return (month + np.arange(1, horizon + 1)).astype("datetime64[D]")
+    step = 7 if freq == "W" else 1
+    return np.datetime64(last, "D") + np.arange(1, horizon + 1) * step
+
+
+def resample_sorted(
+    sorted_dates: np.ndarray,
+    values: np.ndarray,
+    freq: str = "D",
+    agg: str = "sum"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将按时间排好序的多列数据重采样为连续的周期
+
+    Args:
+        sorted_dates: 排好序的日期
+        values: 与日期对应的二维数值数组（行 × 列，可含 NaN）
+        freq: D / W / M
+        agg: sum / mean
+
+    Returns:
+        (连续周期的起始日, 周期 × 列 的聚合值)，没有数据的周期（如工作日数据的周末）为 NaN，
+        不当作 0 参与增长率、移动平均和预测
+    """
+    if agg not in RESAMPLE_AGGREGATIONS:
+        raise ValueError(f"不支持的聚合方式：{agg}")
+    values = np.asarray(values, dtype="float64")
+    n_columns = values.shape[1]
+    if len(sorted_dates) == 0:
+        return np.empty(0, dtype="datetime64[D]"), np.empty((0, n_columns))
+
+    # 补齐没有数据的周期，保证环比 / 同比按日历周期对齐
+    grid, slots = period_slots(sorted_dates, freq)
+    boundaries = np.flatnonzero(np.concatenate([[True], slots[1:] != slots[:-1]]))
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), boundaries, axis=0)
+    counts = np.add.reduceat(valid.astype(np.int64), boundaries, axis=0)
+    slots = slots[boundaries]
+
+    result = np.full((len(grid), n_columns), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[slots] = np.where(counts > 0, sums if agg == "sum" else sums / counts, np.nan)
+    return grid, result
+
+
+def _growth(series: np.ndarray, lag: int = 1) -> np.ndarray:
+    """相对 lag 个周期之前的增长率（%），基数为 0 或缺失时为 NaN"""
+    growth = np.full(series.shape, np.nan)
+    if len(series) > lag:
+        base, current = series[:-lag], series[lag:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            growth[lag:] = np.where(base != 0, (current - base) / np.abs(base) * 100, np.nan)
+    return growth
+
+
+def _round(value: float, digits: int = 2) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def analyze_trends(
+    source: Union[pd.DataFrame, str],
+    value_columns: Union[str, List[str]],
+    date_column: str,
+    freq: str = "D",
+    agg: str = "sum",
+    window: int = 7,
+    include_series: bool = False
+) -> Dict[str, Any]:
+    """
+    多个指标列的重采样趋势分析
+
+    Args:
+        source: DataFrame 或数据文件路径（文件只读取需要的列，日期排序结果按数据集版本缓存）
+        value_columns: 指标列（一个或多个）
+        date_column: 日期列
+        freq: 重采样频率 D / W / M
+        agg: 周期内聚合方式 sum / mean
+        window: 移动平均和环比比较的周期数
+        include_series: 是否返回重采样后的完整序列
+
+    Returns:
+        {"date_column", "freq", "periods", "analysis_period", "trends": {列名: 趋势结果}}
+        每列包含平均环比增长率、首尾总增长、趋势判断、最近 window 个周期的移动平均、
+        最近 window 个周期与之前 window 个周期的对比，数据超过一年时还包括同比增长
+    """
+    if freq not in RESAMPLE_FREQUENCIES:
+        return {"error": f"不支持的重采样频率：{freq}"}
+    if agg not in RESAMPLE_AGGREGATIONS:
+        return {"error": f"不支持的聚合方式：{agg}"}
+    value_columns = [value_columns] if isinstance(value_columns, str) else list(value_columns)
+
+    if isinstance(source, str):
+        from src.tools.data_loader import load_dataset
+        df = load_dataset(source, columns=list(dict.fromkeys([date_column] + value_columns)))
+        order, sorted_dates = get_date_order(source, df, date_column)
+    else:
+        df = source
+        order, sorted_dates = date_order(df[date_column])
+
+    non_numeric = [col for col in value_columns if not pd.api.types.is_numeric_dtype(df[col])]
+    if non_numeric:
+        return {"error": f"以下列不是数值类型：{non_numeric}"}
+    if len(order) == 0:
+        return {"error": f"日期列 '{date_column}' 没有可解析的日期"}
+
+    values = np.column_stack([df[col].to_numpy(dtype="float64", na_value=np.nan)[order] for col in value_columns])
+    periods, resampled = resample_sorted(sorted_dates, values, freq=freq, agg=agg)
+
+    trends = {}
+    for i, column in enumerate(value_columns):
+        series = resampled[:, i]
+        observed = np.flatnonzero(~np.isnan(series))
+        # 环比只在有数据的周期之间计算（跳过没有数据的周期）
+        growth = _growth(series[observed])
+        valid_growth = growth[~np.isnan(growth)]
+        avg_growth = float(valid_growth.mean()) if len(valid_growth) else np.nan
+
+        if avg_growth > TREND_THRESHOLD_PCT:
+            trend = "上升"
+        elif avg_growth < -TREND_THRESHOLD_PCT:
+            trend = "下降"
+        else:
+            trend = "稳定"
+
+        first, last = (series[observed[0]], series[observed[-1]]) if len(observed) else (np.nan, np.nan)
+        recent = series[-window:]
+        previous = series[-2 * window:-window] if len(series) >= 2 * window else np.empty(0)
+        recent_avg = float(np.nanmean(recent)) if np.any(~np.isnan(recent)) else np.nan
+        previous_avg = float(np.nanmean(previous)) if np.any(~np.isnan(previous)) else np.nan
+
+        result = {
+            "trend": trend if len(valid_growth) else "数据不足",
+            "average_growth_rate": _round(avg_growth),
+            "total_growth": _round((last - first) / abs(first) * 100) if first else None,
+            "first_value": _round(first, 4),
+            "last_value": _round(last, 4),
+            "moving_average": _round(recent_avg if len(series) >= window else np.nan, 4),
+            "period_comparison": {
+                "recent_avg": _round(recent_avg, 4),
+                "previous_avg": _round(previous_avg, 4),
+                "change_pct": _round((recent_avg - previous_avg) / abs(previous_avg) * 100) if previous_avg else None
+            }
+        }
+
+        lag = YEAR_OVER_YEAR_LAG[freq]
+        if len(series) > lag:
+            result["year_over_year_growth"] = _round(_growth(series, lag)[-1])
+
+        if include_series:
+            result["series"] = [_round(v, 4) for v in series]
+        trends[column] = result
+
+    output = {
+        "date_column": date_column,
+        "freq": freq,
+        "agg": agg,
+        "periods": len(periods),
+        "analysis_period": {"start": str(periods[0]), "end": str(periods[-1])},
+        "trends": trends
+    }
+    if include_series:
+        output["period_starts"] = [str(p) for p in periods]
+    return output
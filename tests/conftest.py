@@ -0,0 +1,26 @@
+"""
+测试公共配置
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src import settings
+from src.tools import result_cache
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_cache_dirs(tmp_path_factory):
+    """持久化缓存写入临时目录，测试不在项目目录下留下 .cache/"""
+    root = tmp_path_factory.mktemp("cache")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("RESULT_CACHE_DIR", str(root / "results"))
+    patch.setenv("LLM_CACHE_DIR", str(root / "llm"))
+    patch.setattr(settings, "_global_settings", None)
+    patch.setattr(result_cache, "_result_cache", None)
+    yield root
+    patch.undo()
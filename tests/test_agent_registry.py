@@ -0,0 +1,47 @@
+"""
+Agent 注册表测试
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.agents import registry
+
+
+def test_agents_created_once_on_first_use(monkeypatch):
+    """Agent 第一次使用时创建，之后复用；reset 后重新创建"""
+    monkeypatch.setattr(registry, "AGENT_FACTORIES", {"demo": ("collections", "OrderedDict")})
+    monkeypatch.setattr(registry, "_agents", {})
+
+    assert registry.loaded_agents() == []
+    agent = registry.get_agent("demo")
+    assert registry.get_agent("demo") is agent
+    assert registry.get_agents() == [agent]
+    assert registry.loaded_agents() == ["demo"]
+
+    registry.reset_agents()
+    assert registry.get_agent("demo") is not agent
+    with pytest.raises(KeyError):
+        registry.get_agent("unknown")
+
+
+def test_registry_import_is_lightweight():
+    """导入注册表不加载 crewai / langchain / pandasai，也不需要 API Key"""
+    code = (
+        "import sys; sys.path.insert(0, '.'); import src.agents.registry; "
+        "print([m for m in ('crewai', 'langchain_openai', 'pandasai') if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        env={"PATH": ""}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,111 @@
+"""
+批量异常检测测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.anomaly_detection import (
+    detect_anomalies_batch,
+    isolation_forest_scores,
+    mahalanobis_distances,
+    univariate_scores
+)
+
+
+def _metrics_frame(rows: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "sales": rng.normal(1000, 100, rows),
+        "visits": rng.normal(50, 5, rows),
+        "region": rng.choice(["华东", "华北"], rows)
+    })
+    df.loc[rng.random(rows) < 0.02, "visits"] = np.nan
+    return df
+
+
+def test_univariate_scores_match_column_wise_reference():
+    """批量计算的分数与逐列参考实现一致"""
+    df = _metrics_frame()
+    matrix = df[["sales", "visits"]].to_numpy()
+
+    for i, col in enumerate(["sales", "visits"]):
+        series = df[col]
+        z = (series - series.mean()).abs() / series.std(ddof=0)
+        np.testing.assert_allclose(univariate_scores(matrix, "zscore")[:, i], z, rtol=1e-10)
+
+        median = series.median()
+        mad = (series - median).abs().median()
+        np.testing.assert_allclose(univariate_scores(matrix, "mad")[:, i], 0.6745 * (series - median).abs() / mad, rtol=1e-10)
+
+        mean = series.rolling(30, min_periods=15).mean().shift(1)
+        std = series.rolling(30, min_periods=15).std().shift(1)
+        np.testing.assert_allclose(univariate_scores(matrix, "rolling_zscore", window=30)[:, i],
+                                   (series - mean).abs() / std, rtol=1e-8)
+
+        q1, q3 = series.quantile([0.25, 0.75])
+        flagged = univariate_scores(matrix, "iqr")[:, i] > 1.5
+        expected = (series < q1 - 1.5 * (q3 - q1)) | (series > q3 + 1.5 * (q3 - q1))
+        np.testing.assert_array_equal(flagged, expected)
+
+
+def test_multivariate_methods_find_unusual_combinations():
+    """单列都正常、组合异常的行能被马氏距离发现；孤立森林给远离数据的行更高的分数"""
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=5000)
+    matrix = np.column_stack([x, x + rng.normal(scale=0.1, size=5000)])
+    matrix[123] = [1.5, -1.5]
+    matrix[7] = [6.0, 6.0]
+
+    distances = mahalanobis_distances(matrix)
+    assert np.argmax(distances) == 123
+    centered = matrix - matrix.mean(axis=0)
+    expected = np.sqrt(np.einsum("ij,jk,ik->i", centered, np.linalg.inv(np.cov(matrix, rowvar=False)), centered))
+    np.testing.assert_allclose(distances, expected, rtol=1e-8)
+
+    scores = isolation_forest_scores(matrix, random_state=0)
+    assert scores[7] == scores.max()
+    assert scores[7] > 0.6 > np.median(scores)
+    assert ((scores > 0) & (scores < 1)).all()
+
+
+def test_batch_table_is_compact_and_sorted(tmp_path):
+    """结果为按分数降序的紧凑表，非数值列跳过"""
+    df = _metrics_frame()
+    df.loc[10, "sales"] = 5000
+    df.loc[20, "visits"] = 500
+    path = tmp_path / "metrics.csv"
+    df.to_csv(path, index=False)
+
+    result = detect_anomalies_batch(str(path), method="mad", top_n=5)
+    assert result["columns"] == ["sales", "visits"]
+    assert result["skipped"] == ["region"]
+    assert result["table"]["columns"] == ["row", "column", "value", "score"]
+    assert len(result["table"]["rows"]) <= 5
+    assert result["total_anomalies"] == sum(result["per_column"].values())
+    scores = [row[3] for row in result["table"]["rows"]]
+    assert scores == sorted(scores, reverse=True)
+    assert {(row[0], row[1]) for row in result["table"]["rows"][:2]} == {(10, "sales"), (20, "visits")}
+
+    multivariate = detect_anomalies_batch(df, ["sales", "visits"], method="mahalanobis", top_n=3)
+    assert multivariate["table"]["columns"] == ["row", "score", "sales", "visits"]
+    assert multivariate["table"]["rows"][0][0] in (10, 20)
+
+    assert "error" in detect_anomalies_batch(df, method="unknown")
+
+
+def test_statistical_analyzer_supports_new_methods():
+    """statistical_analyzer.detect_anomalies 支持新增的单列方法"""
+    from src.tools.statistical_analyzer import detect_anomalies
+
+    df = _metrics_frame()
+    df.loc[100, "sales"] = 5000
+    for method in ["mad", "rolling_zscore", "isolation_forest"]:
+        result = detect_anomalies(df, "sales", method=method)
+        assert 100 in [a["index"] for a in result["anomalies"]], method
@@ -0,0 +1,90 @@
+"""
+流式分块读取测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.settings import get_setting
+from src.tools.data_loader import (
+    check_data_quality,
+    check_data_quality_chunked,
+    get_data_info,
+    get_data_info_chunked,
+    iter_dataset_chunks,
+)
+
+
+def _write_mixed_csv(path: Path) -> pd.DataFrame:
+    """生成含缺失值、跨块重复行和全空块的测试数据"""
+    rng = np.random.default_rng(0)
+    rows = 5000
+    df = pd.DataFrame({
+        "id": rng.integers(0, 5, rows),
+        "amount": rng.integers(0, 3, rows).astype(float),
+        "region": rng.choice(["east", "west", None], rows),
+        "flag": rng.choice([True, False], rows)
+    })
+    df.loc[4000:4010, "id"] = np.nan
+    df.loc[100:3000, "region"] = None
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+
+def test_settings_chunk_size():
+    """settings.yaml 中的 data.chunk_size 可以被读取"""
+    assert get_setting("data.chunk_size") == 10000
+    assert get_setting("data.missing_key", 42) == 42
+
+
+def test_iter_dataset_chunks(tmp_path):
+    """分块读取覆盖全部行，索引连续"""
+    csv_path = tmp_path / "data.csv"
+    full = _write_mixed_csv(csv_path)
+
+    chunks = list(iter_dataset_chunks(str(csv_path), chunk_size=700))
+    assert len(chunks) == 8
+    combined = pd.concat(chunks)
+    assert combined.index.equals(full.index)
+
+    capped = list(iter_dataset_chunks(str(csv_path), chunk_size=700, max_rows=1000))
+    assert sum(len(c) for c in capped) == 1000
+
+
+def test_chunked_quality_matches_in_memory(tmp_path):
+    """流式质量检查与整体加载结果一致"""
+    csv_path = tmp_path / "data.csv"
+    full = _write_mixed_csv(csv_path)
+
+    assert check_data_quality_chunked(str(csv_path), chunk_size=700) == check_data_quality(full)
+
+
+def test_quality_of_empty_dataset(tmp_path):
+    """只有表头的数据集：缺失率记为 0，不除以零"""
+    csv_path = tmp_path / "empty.csv"
+    csv_path.write_text("a,b\n")
+    empty = pd.read_csv(csv_path)
+
+    report = check_data_quality_chunked(str(csv_path), chunk_size=700)
+    assert report["missing_values"]["percentage"] == {"a": 0.0, "b": 0.0}
+    assert report["duplicate_rate"] == 0 and report["quality_score"] == "E"
+    assert check_data_quality(empty)["missing_values"] == report["missing_values"]
+
+
+def test_chunked_info_matches_in_memory(tmp_path):
+    """流式数据信息与整体加载结果一致（内存为近似值）"""
+    csv_path = tmp_path / "data.csv"
+    full = _write_mixed_csv(csv_path)
+
+    expected = get_data_info(full)
+    actual = get_data_info_chunked(str(csv_path), chunk_size=700)
+
+    for key in ["shape", "columns", "dtypes", "is_empty"]:
+        assert actual[key] == expected[key]
+    assert actual["memory_mb"] == pytest.approx(expected["memory_mb"], rel=0.05)
@@ -0,0 +1,46 @@
+"""
+列式旁路文件测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+
+from src.tools.columnar_store import PYARROW_AVAILABLE, find_sidecar
+from src.tools.data_loader import _parse_dataset, convert_to_columnar
+
+pytestmark = pytest.mark.skipif(not PYARROW_AVAILABLE, reason="需要 pyarrow")
+
+
+def test_sidecar_roundtrip(tmp_path):
+    """旁路文件读取结果与解析 CSV 一致"""
+    csv_path = tmp_path / "sales.csv"
+    pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-02", "2024-01-03"],
+        "sales": [100.5, None, 120.0],
+        "region": ["east", "west", None]
+    }).to_csv(csv_path, index=False)
+
+    sidecar = convert_to_columnar(str(csv_path))
+    assert sidecar is not None
+    assert find_sidecar(str(csv_path)) == Path(sidecar)
+
+    from_sidecar = _parse_dataset(str(csv_path), "csv")
+    from_text = pd.read_csv(csv_path)
+    pd.testing.assert_frame_equal(from_sidecar, from_text)
+
+
+def test_sidecar_invalidated_when_source_changes(tmp_path):
+    """源文件被修改后旁路文件失效"""
+    csv_path = tmp_path / "sales.csv"
+    pd.DataFrame({"a": [1, 2, 3]}).to_csv(csv_path, index=False)
+    convert_to_columnar(str(csv_path))
+
+    pd.DataFrame({"a": [1, 2, 3, 4]}).to_csv(csv_path, index=False)
+
+    assert find_sidecar(str(csv_path)) is None
+    assert len(_parse_dataset(str(csv_path), "csv")) == 4
@@ -0,0 +1,61 @@
+"""
+分块相关性引擎测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.correlation_engine import STRONG_CORRELATION_THRESHOLD, correlation_matrix, correlation_pairs
+
+
+def _sensor_frame(rows: int = 400, columns: int = 60) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(rows, 4))
+    data = base @ rng.normal(size=(4, columns)) + rng.normal(scale=1.5, size=(rows, columns)) + 1e4
+    df = pd.DataFrame(data, columns=[f"s{i}" for i in range(columns)])
+    df["constant"] = 1.0
+    return df
+
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+def test_blocked_matrix_matches_pandas(method):
+    """分块计算结果与 pandas 一致（块大小不整除列数）"""
+    df = _sensor_frame()
+    expected = df.corr(method=method)
+    result = correlation_matrix(df, method, block_size=16)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-10)
+
+
+def test_pairwise_complete_with_missing_values():
+    """含缺失值时按成对完整观测计算"""
+    df = _sensor_frame()
+    df = df.mask(np.random.default_rng(1).random(df.shape) < 0.1)
+    np.testing.assert_allclose(correlation_matrix(df, block_size=16).to_numpy(), df.corr().to_numpy(), atol=1e-10)
+
+
+def test_top_pairs_match_upper_triangle():
+    """强相关列对与完整矩阵上三角筛选结果一致"""
+    df = _sensor_frame()
+    corr = df.corr()
+    upper = corr.where(np.triu(np.ones(corr.shape, dtype=bool), k=1)).stack()
+    expected = upper[upper.abs() >= 0.6].abs().sort_values(ascending=False)
+
+    result = correlation_pairs(df, threshold=0.6, top_k=15, block_size=16, workers=4)
+    assert result["total_pairs"] == len(expected)
+    assert len(result["pairs"]) == 15
+    assert [abs(value) for _, _, value in result["pairs"]] == pytest.approx(expected.head(15).tolist())
+    assert {(a, b) for a, b, _ in result["pairs"]} == set(expected.head(15).index)
+
+
+def test_default_threshold_counts_the_returned_pairs():
+    """默认强相关阈值下，返回的列对与 total_pairs 使用同一判定"""
+    df = _sensor_frame()
+    result = correlation_pairs(df, top_k=None, block_size=16)
+    assert result["total_pairs"] == len(result["pairs"]) > 0
+    assert all(abs(value) >= STRONG_CORRELATION_THRESHOLD for _, _, value in result["pairs"])
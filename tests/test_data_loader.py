@@ -0,0 +1,135 @@
+"""
+数据加载工具测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.tools.data_loader import optimize_dtypes
+
+
+def test_optimize_dtypes_is_lossless():
+    """类型压缩不改变任何取值"""
+    rows = 2000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "quantity": rng.integers(0, 100, rows),
+        "price": rng.integers(0, 100, rows) * 0.5,
+        "score": rng.normal(size=rows),
+        "region": rng.choice(["east", "west", "north"], rows).astype(object),
+        "date": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M:%S"),
+        "order_id": [f"o{i}" for i in range(rows)]
+    })
+
+    optimized, report = optimize_dtypes(df)
+
+    assert optimized["quantity"].dtype == np.int8
+    assert optimized["price"].dtype == np.float32
+    assert optimized["score"].dtype == np.float64  # float32 会丢失精度，保持不变
+    assert isinstance(optimized["region"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(optimized["date"])
+    assert not isinstance(optimized["order_id"].dtype, pd.CategoricalDtype)
+
+    assert (optimized["quantity"].astype("int64") == df["quantity"]).all()
+    assert (optimized["price"].astype("float64") == df["price"]).all()
+    assert (optimized["region"].astype(object) == df["region"]).all()
+    assert (optimized["date"] == pd.to_datetime(df["date"])).all()
+
+    assert report["after_mb"] < report["before_mb"]
+    assert set(report["converted_columns"]) == {"quantity", "price", "region", "date"}
+    # 原始 DataFrame 不被修改
+    assert df["quantity"].dtype == np.int64
+
+
+def test_optimize_dtypes_keeps_unparseable_dates():
+    """部分值无法解析为日期时保持原样"""
+    df = pd.DataFrame({"date": ["2024-01-01", "2024-13-45", "2024-02-01"] * 10})
+    optimized, _ = optimize_dtypes(df, category_threshold=0.0)
+    assert not pd.api.types.is_datetime64_any_dtype(optimized["date"])
+
+
+def _write_strata_csv(path: Path, rows: int = 20000) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "row": np.arange(rows),
+        "segment": rng.choice(["a", "b", "c"], rows, p=[0.7, 0.2, 0.1])
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_reservoir_sample_is_bounded_and_ordered(tmp_path):
+    """蓄水池采样只保留 size 行，按原始行顺序返回"""
+    from src.tools.data_loader import reservoir_sample
+
+    csv_path = tmp_path / "data.csv"
+    _write_strata_csv(csv_path)
+
+    sample, total_rows = reservoir_sample(str(csv_path), size=500, chunk_size=1500)
+    assert total_rows == 20000
+    assert len(sample) == 500
+    assert sample.index.is_monotonic_increasing
+    assert (sample["row"].to_numpy() == sample.index.to_numpy()).all()
+
+    again, _ = reservoir_sample(str(csv_path), size=500, chunk_size=1500)
+    assert again.equals(sample)
+
+
+def test_reservoir_sample_stratified(tmp_path):
+    """分层采样按各分层比例分配样本量"""
+    from src.tools.data_loader import reservoir_sample
+
+    csv_path = tmp_path / "data.csv"
+    df = _write_strata_csv(csv_path)
+
+    sample, _ = reservoir_sample(str(csv_path), size=1000, stratify_by="segment", chunk_size=1500)
+    expected = (df["segment"].value_counts() / len(df) * 1000).round()
+
+    assert len(sample) == 1000
+    for segment, count in sample["segment"].value_counts().items():
+        assert abs(count - expected[segment]) <= 1
+
+
+def test_reservoir_sample_many_strata_is_bounded(tmp_path, monkeypatch):
+    """高基数分层列：遍历过程中保留的行数不随分层个数增长"""
+    from src.tools.data_loader import STRATIFIED_BUFFER_FACTOR, reservoir_sample
+
+    rows = 20000
+    df = pd.DataFrame({
+        "row": np.arange(rows),
+        "user": np.where(np.arange(rows) % 2 == 0, "big", [f"u{i}" for i in range(rows)])
+    })
+    csv_path = tmp_path / "users.csv"
+    df.to_csv(csv_path, index=False)
+
+    kept_sizes = []
+    original = pd.concat
+    monkeypatch.setattr(pd, "concat", lambda objs, *args, **kwargs: (
+        kept_sizes.append(len(objs[0])) or original(objs, *args, **kwargs)))
+
+    sample, total_rows = reservoir_sample(str(csv_path), size=200, stratify_by="user", chunk_size=1500)
+    assert total_rows == rows
+    assert kept_sizes and max(kept_sizes) <= STRATIFIED_BUFFER_FACTOR * 200
+    assert len(sample) == 200
+    assert (sample["user"] == "big").sum() == 100
+
+
+def test_load_bounded_dataset(tmp_path):
+    """未超过阈值时返回全量数据，超过时返回 sample_size 行样本"""
+    from src.tools.data_loader import load_bounded_dataset
+
+    csv_path = tmp_path / "data.csv"
+    df = _write_strata_csv(csv_path, rows=3000)
+
+    full, total_rows = load_bounded_dataset(str(csv_path), max_rows=5000, sample_size=100)
+    assert total_rows == 3000
+    pd.testing.assert_frame_equal(full, df)
+
+    sample, total_rows = load_bounded_dataset(str(csv_path), max_rows=1000, sample_size=100)
+    assert total_rows == 3000
+    assert len(sample) == 100
@@ -0,0 +1,112 @@
+"""
+数据集缓存测试
+"""
+import os
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from src.tools.dataset_cache import DatasetCache, dataset_fingerprint
+
+
+def _write_csv(path: Path, rows: int) -> None:
+    pd.DataFrame({"a": range(rows), "b": [f"v{i}" for i in range(rows)]}).to_csv(path, index=False)
+
+
+def test_cache_hit_and_miss(tmp_path):
+    """同一文件版本只解析一次"""
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path, 100)
+
+    cache = DatasetCache(max_bytes=64 * 1024 * 1024)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return pd.read_csv(csv_path)
+
+    first = cache.get_or_load(str(csv_path), loader)
+    second = cache.get_or_load(str(csv_path), loader)
+
+    assert len(calls) == 1
+    assert first.equals(second)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_invalidated_on_file_change(tmp_path):
+    """文件内容变化后重新解析"""
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path, 10)
+    cache = DatasetCache(max_bytes=64 * 1024 * 1024)
+
+    first = cache.get_or_load(str(csv_path), lambda: pd.read_csv(csv_path))
+    old_fingerprint = dataset_fingerprint(str(csv_path))
+
+    _write_csv(csv_path, 20)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = cache.get_or_load(str(csv_path), lambda: pd.read_csv(csv_path))
+
+    assert dataset_fingerprint(str(csv_path)) != old_fingerprint
+    assert len(first) == 10
+    assert len(second) == 20
+
+
+def test_cache_lru_eviction(tmp_path):
+    """超出内存预算时淘汰最久未使用的数据集"""
+    paths = []
+    for i in range(3):
+        csv_path = tmp_path / f"data_{i}.csv"
+        _write_csv(csv_path, 1000)
+        paths.append(csv_path)
+
+    one_frame = int(pd.read_csv(paths[0]).memory_usage(deep=True).sum())
+    cache = DatasetCache(max_bytes=one_frame * 2 + 1)
+
+    for csv_path in paths:
+        cache.get_or_load(str(csv_path), lambda p=csv_path: pd.read_csv(p))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+    # 最早加载的文件已被淘汰，再次读取为未命中
+    cache.get_or_load(str(paths[0]), lambda: pd.read_csv(paths[0]))
+    assert cache.stats()["misses"] == 4
+
+
+def test_cached_frame_not_mutated_by_column_assignment(tmp_path):
+    """整列赋值不会污染缓存"""
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path, 10)
+    cache = DatasetCache(max_bytes=64 * 1024 * 1024)
+
+    df = cache.get_or_load(str(csv_path), lambda: pd.read_csv(csv_path))
+    df["a"] = 0
+
+    again = cache.get_or_load(str(csv_path), lambda: pd.read_csv(csv_path))
+    assert again["a"].tolist() == list(range(10))
+
+
+def test_load_dataset_column_projection(tmp_path):
+    """只读取请求的列，并保持请求的列顺序"""
+    from src.tools.data_loader import get_dataset_columns, load_dataset
+
+    csv_path = tmp_path / "wide.csv"
+    pd.DataFrame({f"c{i}": range(5) for i in range(10)}).to_csv(csv_path, index=False)
+
+    assert get_dataset_columns(str(csv_path)) == [f"c{i}" for i in range(10)]
+
+    subset = load_dataset(str(csv_path), columns=["c7", "c2"])
+    assert list(subset.columns) == ["c7", "c2"]
+
+    # 全量数据已缓存时直接从缓存中选取
+    load_dataset(str(csv_path))
+    from_full = load_dataset(str(csv_path), columns=["c3"])
+    assert from_full["c3"].tolist() == list(range(5))
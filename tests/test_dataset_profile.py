@@ -0,0 +1,150 @@
+"""
+数据集概要测试
+"""
+import json
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.tools.data_loader import get_data_info
+from src.tools.dataset_profile import PROFILE_SUFFIX, build_profile, get_profile, load_profile
+
+
+def _write_sales_csv(path: Path) -> pd.DataFrame:
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=30).strftime("%Y-%m-%d"),
+        "sales": np.arange(30, dtype=float),
+        "region": ["east", "west", None] * 10
+    })
+    df.loc[3, "sales"] = np.nan
+    df = pd.concat([df, df.iloc[:2]], ignore_index=True)
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+
+def test_profile_matches_frame(tmp_path):
+    """概要中的统计与直接计算一致，并保存为合法 JSON"""
+    csv_path = tmp_path / "sales.csv"
+    df = _write_sales_csv(csv_path)
+
+    profile = build_profile(str(csv_path))
+
+    assert profile["shape"] == [32, 3]
+    assert profile["null_counts"] == {k: int(v) for k, v in df.isnull().sum().items()}
+    assert profile["duplicates"] == int(df.duplicated().sum())
+    assert profile["describe"]["sales"]["mean"] == df["sales"].mean()
+    assert profile["top_values"]["region"][0]["value"] in {"east", "west"}
+    assert len(profile["preview"]) == 10
+
+    saved = json.loads((tmp_path / ("sales.csv" + PROFILE_SUFFIX)).read_text(encoding="utf-8"))
+    assert saved["shape"] == profile["shape"]
+
+
+def test_profile_reused_and_rebuilt_on_change(tmp_path):
+    """同一版本复用概要，源文件变化后重建"""
+    csv_path = tmp_path / "sales.csv"
+    _write_sales_csv(csv_path)
+    build_profile(str(csv_path))
+
+    assert load_profile(str(csv_path)) is not None
+    assert get_data_info(str(csv_path))["shape"] == (32, 3)
+
+    pd.DataFrame({"a": [1, 2]}).to_csv(csv_path, index=False)
+    assert load_profile(str(csv_path)) is None
+    assert get_profile(str(csv_path))["shape"] == [2, 1]
+
+
+def test_profile_incremental_append_matches_rebuild(tmp_path):
+    """追加写入后只解析新增行，结果与完整重建一致"""
+    from src.tools.statistical_analyzer import calculate_basic_statistics
+
+    csv_path = tmp_path / "sales.csv"
+    _write_sales_csv(csv_path)
+    build_profile(str(csv_path))
+
+    appended = pd.DataFrame({
+        "date": ["2024-02-01", "2024-01-01", "2024-02-02"],
+        "sales": [500.0, 0.0, np.nan],
+        "region": ["north", "east", "north"]
+    })
+    appended.to_csv(csv_path, mode="a", header=False, index=False)
+    full = pd.read_csv(csv_path)
+
+    profile = get_profile(str(csv_path))
+    assert profile["coverage"]["rows"] == len(full)
+    assert profile["quantiles_rows"] == 32  # 增量更新（未完整重建）
+    assert profile["shape"] == [35, 3]
+    assert profile["null_counts"] == {k: int(v) for k, v in full.isnull().sum().items()}
+    assert profile["duplicates"] == int(full.duplicated().sum())
+    assert profile["top_values"]["region"][0]["value"] in {"east", "west"}
+    # 旧数据上的分位数不再作为当前结果返回
+    assert "50%" not in profile["describe"]["sales"]
+    assert profile["describe"]["sales"]["count"] == full["sales"].count()
+
+    stats = calculate_basic_statistics(str(csv_path), "sales")
+    expected = calculate_basic_statistics(full, "sales")
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert np.isclose(stats[key], value), key
+        else:
+            assert stats[key] == value, key
+
+
+def test_incremental_append_keeps_text_columns_as_strings(tmp_path):
+    """追加的行中看起来像数字的编码仍按字符串处理，与完整读取一致"""
+    csv_path = tmp_path / "codes.csv"
+    csv_path.write_text("code,qty\nA,1\n001,2\n", encoding="utf-8")
+    build_profile(str(csv_path))
+
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("001,2\n5,3\n")
+    full = pd.read_csv(csv_path)
+
+    profile = get_profile(str(csv_path))
+    assert profile["coverage"]["rows"] == 4  # 增量更新
+    assert profile["duplicates"] == int(full.duplicated().sum()) == 1
+    assert {entry["value"] for entry in profile["top_values"]["code"]} == {"A", "001", "5"}
+
+
+def test_failed_profile_save_does_not_double_count_duplicates(tmp_path, monkeypatch):
+    """概要保存失败后重试：行哈希与概要不一致时完整重建，追加的行不被重复计为重复行"""
+    from src.tools import dataset_profile
+
+    csv_path = tmp_path / "sales.csv"
+    _write_sales_csv(csv_path)
+    build_profile(str(csv_path))
+    pd.DataFrame({"date": ["2024-02-01"], "sales": [500.0], "region": ["north"]}).to_csv(
+        csv_path, mode="a", header=False, index=False
+    )
+
+    monkeypatch.setattr(dataset_profile, "save_profile", lambda file_path, profile: None)
+    get_profile(str(csv_path))
+    monkeypatch.undo()
+    dataset_profile._profile_memo.clear()
+
+    full = pd.read_csv(csv_path)
+    profile = get_profile(str(csv_path))
+    assert profile["duplicates"] == int(full.duplicated().sum())
+    assert profile["shape"] == [len(full), 3]
+
+
+def test_profile_rebuilt_after_non_append_edit(tmp_path):
+    """已覆盖的内容被修改时完整重建"""
+    csv_path = tmp_path / "sales.csv"
+    _write_sales_csv(csv_path)
+    build_profile(str(csv_path))
+
+    text = csv_path.read_text(encoding="utf-8").replace("east", "EAST", 1)
+    csv_path.write_text(text + "2024-03-01,1.0,south\n", encoding="utf-8")
+    full = pd.read_csv(csv_path)
+
+    profile = get_profile(str(csv_path))
+    assert profile["shape"] == [33, 3]
+    assert profile["quantiles_rows"] == 33
+    assert "top_values_approximate" not in profile
+    assert profile["describe"]["sales"]["50%"] == full["sales"].median()
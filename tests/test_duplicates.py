@@ -0,0 +1,97 @@
+"""
+流式重复行检测测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.data_loader import check_data_quality, check_data_quality_chunked
+from src.tools.duplicates import DuplicateCounter, count_duplicates
+
+
+def _frame(rows: int = 6000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "order_id": rng.integers(0, rows // 2, rows),
+        "sku": rng.choice([f"SKU-{i:05d}" for i in range(50)], rows),
+        "amount": rng.choice([1.5, 2.0, np.nan, -0.0, 0.0], rows),
+        "note": rng.choice(["", None, "退货", "long " * 20], rows)
+    })
+
+
+@pytest.mark.parametrize("subset", [None, ["sku"], ["order_id", "sku"], ["amount"]])
+def test_exact_matches_duplicated(subset):
+    """精确方法与 df.duplicated(subset).sum() 一致"""
+    df = _frame()
+    assert count_duplicates(df, subset=subset)["duplicates"] == df.duplicated(subset=subset).sum()
+    assert check_data_quality(df, key_columns=subset)["duplicates"] == df.duplicated(subset=subset).sum()
+
+
+def test_streaming_chunks_match_in_memory(tmp_path):
+    """逐块统计与整体加载的结果一致（包括关键列子集）"""
+    df = _frame()
+    csv_path = tmp_path / "orders.csv"
+    df.to_csv(csv_path, index=False)
+    df = pd.read_csv(csv_path)
+
+    assert count_duplicates(str(csv_path), chunk_size=700)["duplicates"] == df.duplicated().sum()
+    assert count_duplicates(str(csv_path), subset=["order_id"], chunk_size=700)["duplicates"] == \
+        df.duplicated(subset=["order_id"]).sum()
+    assert check_data_quality_chunked(str(csv_path), chunk_size=700, key_columns=["sku"])["duplicates"] == \
+        df.duplicated(subset=["sku"]).sum()
+
+
+def test_chunks_with_different_inferred_types(tmp_path):
+    """同一取值在不同块中被推断为数值或字符串时哈希一致，跨块重复不会漏计"""
+    rows = ["id,qty"] + [f"{i % 50},{i % 7}" for i in range(300)]
+    # 最后一块中的一个非数值取值让该块的 qty 列被推断为字符串
+    rows[-1] = "999,unknown"
+    csv_path = tmp_path / "mixed.csv"
+    csv_path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    df = pd.read_csv(csv_path, dtype={"qty": str})
+    expected = df.duplicated().sum()
+    assert count_duplicates(str(csv_path), chunk_size=100)["duplicates"] == expected
+    assert count_duplicates(str(csv_path), chunk_size=100, subset=["qty"])["duplicates"] == df.duplicated(subset=["qty"]).sum()
+
+
+def test_numeric_looking_strings_are_not_numbers_in_memory(tmp_path):
+    """内存中的字符串列按字符串比较："001" 与 "1"、"1" 与 1 不是重复行"""
+    df = pd.DataFrame({"code": ["001", "1", "A", "1e3", "1000"]})
+    assert df.duplicated().sum() == 0
+    assert count_duplicates(df)["duplicates"] == 0
+    assert check_data_quality(df)["duplicates"] == 0
+
+    mixed = pd.DataFrame({"code": pd.Series(["1", 1, 1.0, "A"], dtype=object)})
+    assert count_duplicates(mixed)["duplicates"] == mixed.duplicated().sum() == 1
+    # 空字符串与空值、True 与 False 不是同一取值
+    assert count_duplicates(pd.DataFrame({"note": ["", None], "flag": [True, True]}))["duplicates"] == 0
+    assert count_duplicates(pd.DataFrame({"flag": [True, False]}))["duplicates"] == 0
+
+    # 整体加载为字符串列的文件，概要中的重复行数同样按字符串比较
+    from src.tools.dataset_profile import build_profile
+
+    csv_path = tmp_path / "codes.csv"
+    df.to_csv(csv_path, index=False)
+    assert build_profile(str(csv_path), save=False)["duplicates"] == 0
+
+
+def test_bloom_filter_never_undercounts():
+    """Bloom 过滤器只可能多计，内存不超过上限"""
+    df = _frame(20000)
+    exact = int(df.duplicated().sum())
+
+    counter = DuplicateCounter(method="bloom", max_memory_mb=0.05)
+    for start in range(0, len(df), 1000):
+        counter.update(df.iloc[start:start + 1000])
+    result = counter.result()
+
+    assert result["approximate"] is True
+    assert result["memory_mb"] <= 0.05
+    assert exact <= result["duplicates"] <= exact + 0.01 * len(df)
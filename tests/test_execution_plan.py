@@ -0,0 +1,91 @@
+"""
+分析深度执行计划测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import quick_analysis
+from src.execution_plan import STAGE_TOOLS, compile_plan, prepare_plan_dataset, select_stages, stage_steps
+
+
+def _write_sales(path: Path, rows: int) -> str:
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d"),
+        "sales": rng.normal(100, 10, rows),
+        "cost": rng.normal(80, 5, rows),
+        "region": rng.choice(["华东", "华北"], rows)
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_depths_compile_to_bounded_plans():
+    """深度越低，阶段、工具和 LLM 调用上限越少"""
+    quick, standard, deep = (compile_plan(depth) for depth in ["quick", "standard", "deep"])
+
+    assert quick["mode"] == "local" and quick["max_llm_calls"] == 1
+    assert standard["stages"] == ["data_exploration", "statistical_analysis", "report"]
+    assert "forecast_series" not in standard["tools"]["statistical_analysis"]
+    assert deep["tools"]["statistical_analysis"] == STAGE_TOOLS["statistical_analysis"]
+    assert deep["sample_rows"] is None
+    assert standard["max_llm_calls"] < deep["max_llm_calls"]
+
+    names, items = select_stages(standard, ["data_exploration", "statistical_analysis", "pandaai_analysis", "report"], [1, 2, 3, 4])
+    assert names == ["data_exploration", "statistical_analysis", "report"] and items == [1, 2, 4]
+
+    with pytest.raises(ValueError):
+        compile_plan("exhaustive")
+
+
+def test_stage_steps_only_mention_planned_tools():
+    """任务描述只列出计划中该阶段可用的工具"""
+    standard = stage_steps(compile_plan("standard"), "statistical_analysis", final_step="生成报告")
+    assert "scan_anomalies" in standard and standard.endswith("生成报告")
+    for tool in ["detect_anomalies", "calculate_basic_stats", "analyze_trend ", "forecast_series", "read_csv_dataset"]:
+        assert tool not in standard
+
+    deep = stage_steps(compile_plan("deep"), "statistical_analysis")
+    assert all(tool in deep for tool in STAGE_TOOLS["statistical_analysis"])
+    assert deep.splitlines()[0].startswith("1. ") and len(deep.splitlines()) == len(STAGE_TOOLS["statistical_analysis"])
+
+
+def test_prepare_plan_dataset_samples_large_files(tmp_path):
+    """超过计划样本行数时写入样本文件，同一版本只抽样一次"""
+    path = _write_sales(tmp_path / "sales.csv", 3000)
+    plan = {**compile_plan("standard"), "sample_rows": 1000}
+
+    sample_path, total_rows = prepare_plan_dataset(plan, path)
+    assert total_rows == 3000 and sample_path != path
+    assert len(pd.read_csv(sample_path)) == 1000
+    assert prepare_plan_dataset(plan, path)[0] == sample_path
+
+    assert prepare_plan_dataset({**plan, "sample_rows": 5000}, path) == (path, 3000)
+    assert prepare_plan_dataset(compile_plan("deep"), path) == (path, -1)
+
+
+def test_quick_analysis_uses_one_llm_call(tmp_path, monkeypatch):
+    """quick 计划在样本上运行确定性工具，只调用一次 LLM"""
+    calls = []
+    monkeypatch.setattr(quick_analysis, "summarize_findings", lambda goal, findings: calls.append(goal) or "销售平稳")
+    path = _write_sales(tmp_path / "sales.csv", 3000)
+    plan = {**compile_plan("quick"), "sample_rows": 1000}
+
+    result = quick_analysis.run_quick_analysis(plan, "销售趋势", path, str(tmp_path / "out" / "report.md"))
+    assert calls == ["销售趋势"] and result["llm_calls"] == 1
+    findings = result["findings"]
+    assert findings["dataset"]["sampled"] and findings["dataset"]["analyzed_rows"] == 1000
+    assert findings["dataset"]["date_column"] == "date"
+    assert set(findings["trends"]["trends"]) == {"sales", "cost"}
+    report = (tmp_path / "out" / "report.md").read_text(encoding="utf-8")
+    assert "销售平稳" in report and "分析随机样本 1,000 行" in report
+
+    # LLM 调用失败时不计入调用次数
+    monkeypatch.setattr(quick_analysis, "summarize_findings", lambda goal, findings: None)
+    assert quick_analysis.run_quick_analysis(plan, "销售趋势", path, str(tmp_path / "out" / "report.md"))["llm_calls"] == 0
@@ -0,0 +1,124 @@
+"""
+本地数值预测测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.forecasting import (
+    detect_date_column,
+    forecast_dataset,
+    forecast_matrix,
+    parse_forecast_question
+)
+
+
+def _series_matrix(periods: int = 120) -> np.ndarray:
+    t = np.arange(periods)
+    rng = np.random.default_rng(0)
+    return np.column_stack([
+        10 + 2 * t,
+        100 + 0.5 * t + 10 * np.sin(2 * np.pi * t / 12),
+        100 + 0.5 * t + 10 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 1, periods)
+    ])
+
+
+def test_recovers_exact_trend_and_seasonality():
+    """无噪声的直线和季节序列可以被准确外推"""
+    matrix = _series_matrix()
+    future = np.arange(120, 126)
+
+    linear = forecast_matrix(matrix[:, :1], horizon=6, method="linear")
+    np.testing.assert_allclose(linear["forecast"][:, 0], 10 + 2 * future)
+
+    seasonal = forecast_matrix(matrix, horizon=6, method="auto", season_length=12)
+    assert seasonal["method"] == "holt_winters"
+    expected = 100 + 0.5 * future + 10 * np.sin(2 * np.pi * future / 12)
+    np.testing.assert_allclose(seasonal["forecast"][:, 1], expected, atol=1e-6)
+    np.testing.assert_allclose(seasonal["forecast"][:, 2], expected, atol=2.0)
+
+    # 预测区间包含点预测，且随预测步长变宽
+    width = seasonal["upper"][:, 2] - seasonal["lower"][:, 2]
+    assert (seasonal["lower"] <= seasonal["forecast"]).all() and (np.diff(width) >= 0).all()
+
+
+def test_batched_fit_matches_single_series():
+    """多条序列一起拟合与逐条拟合结果相同；数据不足时降级"""
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(100, 10, (60, 40)) + np.arange(60)[:, None] * rng.normal(0, 1, 40)
+    matrix[rng.random(matrix.shape) < 0.05] = np.nan
+
+    batched = forecast_matrix(matrix, horizon=5, season_length=7)
+    for i in range(0, 40, 7):
+        single = forecast_matrix(matrix[:, i:i + 1], horizon=5, season_length=7)
+        np.testing.assert_allclose(single["forecast"][:, 0], batched["forecast"][:, i])
+        np.testing.assert_allclose(single["upper"][:, 0], batched["upper"][:, i])
+
+    assert forecast_matrix(matrix[:10], season_length=7)["method"] == "holt"
+    assert forecast_matrix(matrix[:2], season_length=7)["method"] == "linear"
+
+
+def test_forecast_dataset_by_group(tmp_path):
+    """按维度拆分为多条序列一起预测，频率按日期间隔推断"""
+    months = pd.date_range("2021-01-01", periods=36, freq="MS")
+    rows = []
+    for store, base in [("A", 100.0), ("B", 300.0), ("C", 5.0)]:
+        for i, month in enumerate(months):
+            rows.append({"month": month.strftime("%Y-%m-%d"), "store": store, "sales": base + 3 * i})
+    df = pd.DataFrame(rows).sample(frac=1, random_state=0)
+    path = tmp_path / "monthly.csv"
+    df.to_csv(path, index=False)
+
+    result = forecast_dataset(str(path), "sales", "month", horizon=2, freq=None, group_by="store", max_series=2)
+    assert result["freq"] == "M"
+    assert result["forecast_periods"] == ["2024-01-01", "2024-02-01"]
+    assert result["truncated_series"] == 1
+    by_store = {series["store"]: series for series in result["series"]}
+    assert set(by_store) == {"A", "B"}
+    assert by_store["B"]["forecast"] == pytest.approx([300 + 3 * 36, 300 + 3 * 37], abs=0.5)
+
+    assert detect_date_column(str(path)) == "month"
+
+
+def test_empty_periods_are_not_zero_observations():
+    """工作日数据的周末（以及分组中没有数据的周期）不按 0 参与拟合"""
+    dates = pd.bdate_range("2024-01-01", periods=80)
+    df = pd.DataFrame({
+        "date": dates,
+        "store": np.where(np.arange(80) % 2 == 0, "A", "B"),
+        "sales": 100 + 0.5 * np.arange(80)
+    })
+
+    result = forecast_dataset(df, "sales", "date", horizon=3, freq="D", method="holt")
+    series = result["series"][0]
+    assert series["last_value"] == 139.5
+    assert series["forecast"] == pytest.approx([139.5 + 0.5 * k * 5 / 7 for k in (1, 2, 3)], abs=1.0)
+    assert min(series["lower"]) > 130
+
+    grouped = forecast_dataset(df, "sales", "date", horizon=3, freq="D", method="holt", group_by="store")
+    for item in grouped["series"]:
+        assert item["forecast"] == pytest.approx([item["last_value"]] * 3, abs=2.0)
+
+
+def test_parse_forecast_question():
+    """识别简单的预测问题及预测周期"""
+    assert parse_forecast_question("预测未来 3 个月的销售额") == {"horizon": 3, "freq": "M"}
+    assert parse_forecast_question("Forecast the next 6 weeks") == {"horizon": 6, "freq": "W"}
+    assert parse_forecast_question("预测一下接下来的趋势") == {"horizon": 3, "freq": None}
+    assert parse_forecast_question("What will revenue be over the coming months? Please forecast.") == {"horizon": 3, "freq": None}
+    assert parse_forecast_question("哪个地区的销售额最高？") is None
+
+
+def test_parse_forecast_question_rejects_non_forecasts():
+    """没有未来时间范围、或问哪些因素能预测结果的问题交给 PandaAI"""
+    assert parse_forecast_question("Which features best predict churn?") is None
+    assert parse_forecast_question("哪些因素可以预测用户流失？") is None
+    assert parse_forecast_question("哪些因素可以预测未来 3 个月的用户流失？") is None
+    assert parse_forecast_question("What drivers predict sales next month?") is None
+    assert parse_forecast_question("预测模型的准确率是多少？") is None
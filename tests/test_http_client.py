@@ -0,0 +1,83 @@
+"""
+共享 HTTP 客户端测试
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from src.http_client import create_http_client, get_http_client, get_http_pool_stats
+
+
+def test_per_host_concurrency_limit():
+    """同一主机的并发请求数不超过上限，不同主机互不影响"""
+    active = {"a.example": 0, "b.example": 0}
+    peak = dict(active)
+    lock = threading.Lock()
+
+    def handler(request):
+        host = request.url.host
+        with lock:
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        return httpx.Response(200, json={"host": host})
+
+    client = create_http_client(per_host_limit=2, transport=httpx.MockTransport(handler))
+    threads = [
+        threading.Thread(target=lambda host=host: client.get(f"https://{host}/v1/chat"))
+        for host in ["a.example"] * 6 + ["b.example"] * 3
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak["a.example"] <= 2 and peak["b.example"] <= 2
+    stats = get_http_pool_stats(client)
+    assert stats["hosts"]["a.example"]["requests"] == 6
+    assert stats["hosts"]["a.example"]["active"] == 0
+
+
+def test_streamed_response_holds_slot_until_closed():
+    """流式响应在读完之前占用名额"""
+    client = create_http_client(per_host_limit=1, transport=httpx.MockTransport(lambda request: httpx.Response(200, text="ok")))
+    with client.stream("GET", "https://a.example/") as response:
+        assert get_http_pool_stats(client)["hosts"]["a.example"]["active"] == 1
+        assert response.read() == b"ok"
+    assert get_http_pool_stats(client)["hosts"]["a.example"]["active"] == 0
+    assert client.get("https://a.example/").text == "ok"
+
+
+def test_shared_client_is_reused():
+    """进程内所有调用方共用同一个客户端，关闭后重新创建"""
+    client = get_http_client()
+    assert get_http_client() is client
+    stats = get_http_pool_stats()
+    assert stats["connections"] == 0 and stats["hosts"] == {}
+
+    client.close()
+    assert get_http_client() is not client
+
+
+def test_agent_llm_uses_shared_client(monkeypatch):
+    """crewai Agent 的 LLM 经由 LiteLLM 请求，使用同一个共享客户端"""
+    pytest.importorskip("crewai")
+    pytest.importorskip("langchain_openai")
+    litellm = pytest.importorskip("litellm")
+
+    from src.crew_config import create_agent_llm
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(litellm, "client_session", None)
+    create_agent_llm(model="gpt-4")
+    assert litellm.client_session is get_http_client()
@@ -0,0 +1,84 @@
+"""
+LLM 响应缓存测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src import llm_cache
+from src.llm_cache import cached_completion, llm_cache_disabled
+from src.tools.result_cache import ResultCache
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """每个测试使用独立的响应存储"""
+    instance = ResultCache(str(tmp_path / "llm"), 1024 * 1024, filename="responses.sqlite")
+    monkeypatch.setattr(llm_cache, "_store", instance)
+    monkeypatch.delenv("LLM_CACHE_DISABLED", raising=False)
+    return instance
+
+
+def test_cached_completion_reuses_text_responses(store):
+    """相同端点、参数和消息只请求一次；参数不同或关闭缓存时重新请求"""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return f"response {len(calls)}"
+
+    messages = [{"role": "user", "content": "分析销售数据"}]
+    params = {"model": "gpt-4", "temperature": 0.7}
+    assert cached_completion("https://api.example/v1", params, messages, compute) == "response 1"
+    assert cached_completion("https://api.example/v1", dict(params), list(messages), compute) == "response 1"
+    assert len(calls) == 1
+
+    assert cached_completion("https://api.example/v1", {**params, "temperature": 0}, messages, compute) == "response 2"
+    assert cached_completion("https://other.example/v1", params, messages, compute) == "response 3"
+    with llm_cache_disabled():
+        assert cached_completion("https://api.example/v1", params, messages, compute) == "response 4"
+    assert store.stats()["hits"] == 1
+
+
+def test_store_failure_falls_back_to_request(store, monkeypatch):
+    """缓存读写失败时直接请求"""
+    def broken(*args, **kwargs):
+        raise OSError("disk I/O error")
+
+    monkeypatch.setattr(store, "get", broken)
+    assert cached_completion("", {}, "hello", lambda: "ok") == "ok"
+
+
+def test_agent_llm_repeated_completion_hits_cache(store, monkeypatch):
+    """crewai Agent 调用的 LLM.call：重复的补全直接从缓存返回"""
+    pytest.importorskip("crewai")
+    pytest.importorskip("langchain_openai")
+    pytest.importorskip("dotenv")
+    import crewai
+
+    from src.crew_config import CachedLLM, create_agent_llm
+
+    calls = []
+
+    def fake_call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        calls.append(messages)
+        return f"Thought: done\nFinal Answer: {len(calls)}"
+
+    monkeypatch.setattr(crewai.LLM, "call", fake_call)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+
+    llm = create_agent_llm(model="gpt-4")
+    assert isinstance(llm, CachedLLM)
+    messages = [{"role": "system", "content": "你是数据分析师"}, {"role": "user", "content": "总结数据"}]
+    first = llm.call(messages)
+    assert create_agent_llm(model="gpt-4").call(list(messages)) == first
+    assert len(calls) == 1
+
+    llm.call(messages + [{"role": "user", "content": "继续"}])
+    assert len(calls) == 2
+    assert not isinstance(create_agent_llm(model="gpt-4", cache=False), CachedLLM)
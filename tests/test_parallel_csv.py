@@ -0,0 +1,114 @@
+"""
+并行 CSV 解析测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.columnar_store import PYARROW_AVAILABLE
+from src.tools.parallel_csv import parallel_read_csv, split_offsets
+
+
+def _write_csv(path: Path, rows: int = 5000) -> None:
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.normal(100, 10, rows).round(2),
+        "city": rng.choice(["北京", "上海", "广州"], rows),
+    })
+    # 整数列只在靠后的分段出现缺失值
+    df["qty"] = pd.array(rng.integers(0, 50, rows), dtype="Int64")
+    df.loc[rows - 10:, "qty"] = pd.NA
+    df.to_csv(path, index=False)
+
+
+def test_split_offsets_cover_file_at_line_boundaries(tmp_path):
+    """分段首尾相接、覆盖整个文件，且每段以完整的行结束"""
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path)
+    content = csv_path.read_bytes()
+
+    pieces = split_offsets(str(csv_path), 4)
+    assert pieces[0][0] == 0 and pieces[-1][1] == len(content)
+    for (_, end), (start, _) in zip(pieces[:-1], pieces[1:]):
+        assert end == start
+        assert content[end - 1:end] == b"\n"
+
+
+def test_parallel_read_matches_read_csv(tmp_path):
+    """多进程解析结果与单进程解析一致"""
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path)
+
+    expected = pd.read_csv(csv_path)
+    pd.testing.assert_frame_equal(parallel_read_csv(str(csv_path), workers=3, engine="pandas"), expected)
+
+    subset = parallel_read_csv(str(csv_path), usecols=["qty", "city"], workers=3, engine="pandas")
+    pd.testing.assert_frame_equal(subset, pd.read_csv(csv_path, usecols=["qty", "city"]))
+
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="需要 pyarrow")
+def test_pyarrow_engine(tmp_path):
+    """pyarrow 引擎返回相同的数据"""
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path, rows=200)
+
+    df = parallel_read_csv(str(csv_path), engine="pyarrow")
+    assert df.shape == (200, 4)
+    assert df["amount"].sum() == pytest.approx(pd.read_csv(csv_path)["amount"].sum())
+
+
+def test_quoted_newlines_are_not_split(tmp_path, monkeypatch):
+    """引号内的换行符不作为切分点，分段解析结果与单进程解析一致"""
+    from src.tools import parallel_csv
+
+    rows = 3000
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "note": [f"第 {i} 行\n备注 \"{i}\"\n结束" if i % 3 == 0 else f"row {i}" for i in range(rows)],
+        "amount": np.arange(rows) * 1.5
+    })
+    csv_path = tmp_path / "quoted.csv"
+    df.to_csv(csv_path, index=False)
+    # 用小数据块覆盖跨块的引号状态
+    monkeypatch.setattr(parallel_csv, "SCAN_BLOCK_BYTES", 1024)
+
+    pieces = split_offsets(str(csv_path), 7, start=parallel_csv._header_end(str(csv_path)))
+    assert len(pieces) > 1
+    content = csv_path.read_bytes()
+    for start, end in pieces:
+        assert content[start:end].count(b'"') % 2 == 0
+
+    pd.testing.assert_frame_equal(parallel_read_csv(str(csv_path), workers=3, engine="pandas"), pd.read_csv(csv_path))
+
+
+def test_text_column_types_fixed_for_all_pieces(tmp_path, monkeypatch):
+    """第一块中的文本列在后面的分段里看起来像数字时仍按字符串解析，不退回单进程整体解析"""
+    from src.tools import parallel_csv
+
+    rows = 4000
+    df = pd.DataFrame({
+        "code": [f"C{i}" if i < 200 else f"{i:05d}" for i in range(rows)],
+        "qty": [i if i % 500 else None for i in range(1, rows + 1)],
+        "amount": np.arange(rows) * 0.5
+    })
+    csv_path = tmp_path / "codes.csv"
+    df.to_csv(csv_path, index=False)
+    expected = pd.read_csv(csv_path)
+    monkeypatch.setattr(parallel_csv, "INFER_ROWS", 100)
+
+    full_reads = []
+    original = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: (
+        full_reads.append(1) if "nrows" not in kwargs else None) or original(*args, **kwargs))
+
+    result = parallel_read_csv(str(csv_path), workers=4, engine="pandas")
+    assert not full_reads
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["code"].iloc[-1] == "03999"
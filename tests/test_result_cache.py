@@ -0,0 +1,159 @@
+"""
+统计工具结果持久化缓存测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools import result_cache
+from src.tools.result_cache import ResultCache, memoize_result
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """每个测试使用独立的缓存目录"""
+    instance = ResultCache(str(tmp_path / "cache"), 10 * 1024 * 1024)
+    monkeypatch.setattr(result_cache, "_result_cache", instance)
+    monkeypatch.delenv("RESULT_CACHE_DISABLED", raising=False)
+    return instance
+
+
+def _write_csv(path: Path, rows: int = 1000, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({"sales": rng.normal(100, 10, rows), "orders": rng.poisson(20, rows)}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_hit_on_same_dataset_and_arguments(tmp_path, cache):
+    """同一数据集、等价参数只计算一次；文件内容变化后重新计算"""
+    calls = []
+
+    @memoize_result("count_rows")
+    def count_rows(file_path, columns=None, threshold=2.0):
+        calls.append(1)
+        return {"rows": len(pd.read_csv(file_path)), "columns": columns}
+
+    path = _write_csv(tmp_path / "data.csv")
+    first = count_rows(path, ["sales", "orders"])
+    assert count_rows(path, columns=("sales", "orders"), threshold=2) == first
+    assert len(calls) == 1
+
+    # 参数不同、内容不同时未命中；内容相同的另一个文件命中
+    count_rows(path, ["sales"])
+    assert len(calls) == 2
+    copy = tmp_path / "copy.csv"
+    copy.write_bytes(Path(path).read_bytes())
+    count_rows(str(copy), ["sales"])
+    assert len(calls) == 2
+
+    _write_csv(Path(path), rows=500)
+    assert count_rows(path, ["sales", "orders"])["rows"] == 500
+    assert len(calls) == 3
+    assert cache.stats()["hits"] == 2
+
+
+def test_error_results_and_dataframes(cache):
+    """错误结果不缓存；DataFrame 输入按内容缓存"""
+    calls = []
+
+    @memoize_result()
+    def summarize(df, column):
+        calls.append(1)
+        if column not in df:
+            return {"error": "missing"}
+        return {"sum": float(df[column].sum())}
+
+    df = pd.DataFrame({"a": [1.0, 2.0, 3.0]})
+    summarize(df, "b")
+    summarize(df, "b")
+    assert len(calls) == 2
+
+    assert summarize(df, "a") == summarize(df.copy(), "a") == {"sum": 6.0}
+    assert len(calls) == 3
+    df.loc[0, "a"] = 10.0
+    assert summarize(df, "a") == {"sum": 15.0}
+    assert len(calls) == 4
+
+
+def test_statistical_analyzer_results_cached(tmp_path, cache, monkeypatch):
+    """statistical_analyzer 的函数结果跨调用复用，关闭缓存后重新计算"""
+    from src.tools import statistical_analyzer
+
+    path = _write_csv(tmp_path / "data.csv")
+    first = statistical_analyzer.calculate_all_statistics(path)
+    assert statistical_analyzer.calculate_all_statistics(path) == first
+    assert cache.stats()["hits"] == 1
+
+    monkeypatch.setenv("RESULT_CACHE_DISABLED", "1")
+    assert statistical_analyzer.calculate_all_statistics(path) == first
+    assert cache.stats()["hits"] == 1
+
+
+def test_size_bounded_eviction(tmp_path):
+    """总大小超过上限时淘汰最久未访问的结果"""
+    cache = ResultCache(str(tmp_path / "cache"), 64 * 1024)
+    payload = {"values": list(range(2000))}
+    for i in range(20):
+        cache.put(f"key{i}", "tool", payload)
+        cache.get("key0")
+
+    stats = cache.stats()
+    assert stats["size_mb"] * 1024 * 1024 <= 64 * 1024
+    assert stats["evictions"] > 0
+    assert cache.get("key0") == (True, payload)
+    assert cache.get("key1")[0] is False
+    assert cache.get("key19")[0] is True
+
+
+def test_expired_results_are_misses(tmp_path, monkeypatch):
+    """超过有效期的结果视为未命中，写入时顺带清理"""
+    cache = ResultCache(str(tmp_path / "cache"), 1024 * 1024, filename="ttl.sqlite", ttl_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+
+    cache.put("old", "tool", {"value": 1})
+    now[0] += 30
+    assert cache.get("old") == (True, {"value": 1})
+
+    now[0] += 31
+    cache.put("new", "tool", {"value": 2})
+    assert cache.stats()["entries"] == 1
+    assert cache.get("old") == (False, None)
+    assert cache.get("new") == (True, {"value": 2})
+
+
+def test_cache_failure_falls_back_to_function(tmp_path, cache, monkeypatch):
+    """缓存不可用（数据库被锁、目录只读）时照常返回工具结果"""
+    import sqlite3
+
+    calls = []
+
+    @memoize_result("count_rows")
+    def count_rows(file_path):
+        calls.append(1)
+        return {"rows": len(pd.read_csv(file_path))}
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    path = _write_csv(tmp_path / "data.csv", rows=10)
+    monkeypatch.setattr(cache, "get", locked)
+    assert count_rows(path) == {"rows": 10}
+
+    monkeypatch.setattr(result_cache, "_result_cache", None)
+    monkeypatch.setattr(result_cache, "get_result_cache", lambda: (_ for _ in ()).throw(PermissionError("read-only")))
+    assert count_rows(path) == {"rows": 10}
+    assert len(calls) == 2
+
+
+def test_relative_cache_dir_resolves_against_project_root(tmp_path, monkeypatch):
+    """相对路径的缓存目录与当前工作目录无关"""
+    monkeypatch.chdir(tmp_path)
+    assert result_cache.resolve_cache_dir(".cache/results") == str(result_cache.PROJECT_ROOT / ".cache" / "results")
+    assert result_cache.resolve_cache_dir(str(tmp_path / "abs")) == str(tmp_path / "abs")
@@ -0,0 +1,106 @@
+"""
+行偏移索引测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.tools.row_index import build_row_index, load_row_index, read_rows, sample_rows
+
+
+def _write_csv(path: Path, rows: int = 1000) -> pd.DataFrame:
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "note": [f"第 {i} 行\n含换行, \"引号\"" if i % 7 == 0 else f"row {i}" for i in range(rows)],
+        "value": np.arange(rows) * 1.5
+    })
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+
+def test_row_index_handles_quoted_newlines(tmp_path):
+    """引号内的换行不被当作行分隔符"""
+    csv_path = tmp_path / "data.csv"
+    df = _write_csv(csv_path)
+
+    offsets = build_row_index(str(csv_path))
+    assert offsets.dtype == np.uint64
+    assert len(offsets) == len(df) + 1
+    assert offsets[-1] == csv_path.stat().st_size
+
+
+def test_read_rows_page(tmp_path):
+    """任意一页与全量解析后切片一致"""
+    csv_path = tmp_path / "data.csv"
+    df = _write_csv(csv_path)
+
+    page = read_rows(str(csv_path), 693, 20)
+    pd.testing.assert_frame_equal(page, df.iloc[693:713], check_index_type=False)
+    assert len(read_rows(str(csv_path), 995, 20)) == 5
+
+
+def test_sample_rows_uniform_without_replacement(tmp_path):
+    """随机抽取的行与原始数据一致，且不重复"""
+    csv_path = tmp_path / "data.csv"
+    df = _write_csv(csv_path)
+
+    sample, total_rows = sample_rows(str(csv_path), size=100, random_state=3)
+    assert total_rows == len(df)
+    assert sample.index.is_unique and sample.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(sample, df.loc[sample.index], check_index_type=False)
+
+
+def test_pages_use_profile_dtypes(tmp_path):
+    """分页和抽样按数据集概要中的列类型解析，与整体解析一致"""
+    from src.tools.dataset_profile import build_profile
+
+    rows = 1000
+    df = pd.DataFrame({
+        "code": [f"{i:04d}" for i in range(rows - 1)] + ["X1"],
+        "qty": pd.array(list(range(rows - 1)) + [None], dtype="Int64"),
+        "day": pd.date_range("2024-01-01", periods=rows).strftime("%Y-%m-%d")
+    })
+    csv_path = tmp_path / "typed.csv"
+    df.to_csv(csv_path, index=False)
+    full = pd.read_csv(csv_path)
+
+    # 没有概要时只能按选中的行推断类型
+    assert read_rows(str(csv_path), 0, 5)["qty"].dtype == np.int64
+
+    build_profile(str(csv_path))
+    page = read_rows(str(csv_path), 10, 5)
+    pd.testing.assert_frame_equal(page, full.iloc[10:15], check_index_type=False)
+    assert page["code"].tolist() == ["0010", "0011", "0012", "0013", "0014"]
+
+    sample, _ = sample_rows(str(csv_path), size=50, random_state=1)
+    pd.testing.assert_frame_equal(sample, full.loc[sample.index], check_index_type=False)
+    assert read_rows(str(csv_path), 0, 2, dtypes={"qty": "float32"})["qty"].dtype == np.float32
+
+
+def test_row_index_jsonl_and_invalidation(tmp_path):
+    """JSONL 无表头；源文件变化后索引失效"""
+    jsonl_path = tmp_path / "data.jsonl"
+    pd.DataFrame({"a": range(10)}).to_json(jsonl_path, orient="records", lines=True)
+
+    assert read_rows(str(jsonl_path), 3, 2)["a"].tolist() == [3, 4]
+    assert load_row_index(str(jsonl_path)) is not None
+
+    pd.DataFrame({"a": range(20)}).to_json(jsonl_path, orient="records", lines=True)
+    assert load_row_index(str(jsonl_path)) is None
+    assert read_rows(str(jsonl_path), 18, 5)["a"].tolist() == [18, 19]
+
+
+def test_blank_lines_skipped_for_crlf_files(tmp_path):
+    """\r\n 空行不计为数据行；最后一行即使只有一个字符、没有换行符也计入"""
+    csv_path = tmp_path / "crlf.csv"
+    csv_path.write_bytes(b"id,value\r\n1,a\r\n\r\n2,b\r\n\n\r\n3,c\r\n\r\n4")
+
+    offsets = build_row_index(str(csv_path), save=False)
+    expected = pd.read_csv(csv_path)
+    assert len(offsets) == len(expected) + 1 == 5
+    assert read_rows(str(csv_path), 3, 1)["id"].tolist() == [4]
@@ -0,0 +1,89 @@
+"""
+分组统计分析测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools import segment_analysis
+from src.tools.segment_analysis import analyze_segments, factorize_groups, segment_statistics
+
+
+def _sales_frame(rows: int = 5000, skus: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "sku": rng.integers(0, skus, rows).astype(str),
+        "region": rng.choice(["华东", "华北", "华南"], rows),
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "sales": rng.gamma(2.0, 500.0, rows)
+    })
+    df.loc[rng.random(rows) < 0.05, "sales"] = np.nan
+    df.loc[rng.random(rows) < 0.01, "region"] = None
+    return df
+
+
+def test_segment_statistics_match_groupby():
+    """每组统计量与 pandas groupby 一致（空值分组单独统计）"""
+    df = _sales_frame()
+    codes, labels = factorize_groups(df, ["sku", "region"])
+    stats = pd.concat([labels, segment_statistics(df["sales"].to_numpy(), codes, len(labels))], axis=1)
+    stats = stats.fillna({"region": "<空>"}).set_index(["sku", "region"])
+
+    expected = df.fillna({"region": "<空>"}).groupby(["sku", "region"])["sales"].agg(["count", "sum", "mean", "std", "min", "max"])
+    joined = stats.join(expected, how="outer", rsuffix="_pd")
+    assert len(joined) == len(expected) == len(stats)
+    np.testing.assert_array_equal(joined["count"], joined["count_pd"])
+    for ours, theirs in [("total", "sum"), ("mean", "mean_pd"), ("std", "std_pd"), ("min", "min_pd"), ("max", "max_pd")]:
+        np.testing.assert_allclose(joined[ours], joined[theirs], rtol=1e-9, equal_nan=True)
+
+
+def test_anomalies_and_trend_per_segment():
+    """组内异常值个数与逐组 z 分数一致；趋势斜率与逐组线性回归一致"""
+    df = _sales_frame()
+    codes, labels = factorize_groups(df, ["region"])
+    stats = segment_statistics(df["sales"].to_numpy(), codes, len(labels), dates=df["date"].to_numpy())
+
+    for i, region in enumerate(labels["region"]):
+        group = df[df["region"].isna()] if pd.isna(region) else df[df["region"] == region]
+        group = group.dropna(subset=["sales"])
+        z = (group["sales"] - group["sales"].mean()) / group["sales"].std()
+        assert stats["anomalies"][i] == int((z.abs() > 2.0).sum())
+
+        days = (group["date"] - pd.Timestamp("1970-01-01")).dt.total_seconds() / 86400
+        assert stats["slope_per_day"][i] == pytest.approx(np.polyfit(days, group["sales"], 1)[0], rel=1e-6)
+
+
+def test_analyze_segments_reuses_cached_codes(tmp_path, monkeypatch):
+    """同一数据集的重复调用复用缓存的分组编码；文件修改后重新计算"""
+    df = _sales_frame()
+    path = tmp_path / "sales.csv"
+    df.to_csv(path, index=False)
+    segment_analysis._group_codes_cache.clear()
+
+    calls = []
+    original = segment_analysis.factorize_groups
+    monkeypatch.setattr(segment_analysis, "factorize_groups", lambda *a: calls.append(a) or original(*a))
+
+    first = analyze_segments(str(path), "sales", "sku", top_n=10)
+    second = analyze_segments(str(path), "sales", ["sku"], date_column="date", top_n=10, sort_by="mean")
+    assert len(calls) == 1
+
+    assert first["total_segments"] == df["sku"].nunique()
+    assert len(first["segments"]) == 10
+    totals = [segment["total"] for segment in first["segments"]]
+    assert totals == sorted(totals, reverse=True)
+    assert first["grand_total"] == pytest.approx(df["sales"].sum())
+    assert sum(s["count"] for s in first["segments"]) + first["others"]["count"] == df["sales"].notna().sum()
+    assert "trend" in second["segments"][0]
+    assert sum(second["trend_summary"].values()) == second["total_segments"]
+
+    df.head(100).to_csv(path, index=False)
+    third = analyze_segments(str(path), "sales", "sku")
+    assert len(calls) == 2
+    assert third["total_segments"] == df.head(100)["sku"].nunique()
@@ -0,0 +1,109 @@
+"""
+Sketch 近似统计测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.sketches import HyperLogLog, KLLSketch, MisraGries
+
+
+def test_kll_merged_quantiles_within_error_bound():
+    """分区合并后的分位数排名误差不超过误差界"""
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(size=200_000)
+
+    partitions = [KLLSketch(k=200, seed=i) for i in range(4)]
+    for i, chunk in enumerate(np.array_split(values, 40)):
+        partitions[i % 4].update(chunk)
+    merged = partitions[0]
+    for sketch in partitions[1:]:
+        merged.merge(sketch)
+
+    qs = np.array([0.05, 0.25, 0.5, 0.75, 0.95])
+    estimates = merged.quantiles(qs)
+    ranks = np.searchsorted(np.sort(values), estimates) / len(values)
+    assert merged.count == len(values)
+    assert np.all(np.abs(ranks - qs) <= merged.rank_error)
+    assert merged.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+
+
+def test_hyperloglog_merge_and_type_consistency():
+    """合并结果与整体计算相同；整数与整数值浮点数视为同一取值"""
+    rng = np.random.default_rng(1)
+    values = pd.Series(rng.integers(0, 50_000, 200_000))
+
+    whole = HyperLogLog(p=14).update(values)
+    left = HyperLogLog(p=14).update(values[:100_000])
+    right = HyperLogLog(p=14).update(values[100_000:].astype(float))
+    left.merge(right)
+
+    assert np.array_equal(whole.registers, left.registers)
+    true_distinct = values.nunique()
+    assert abs(left.estimate() - true_distinct) / true_distinct < 4 * left.relative_error
+    assert round(HyperLogLog().update(pd.Series(["a", "b", "b", None])).estimate()) == 2
+    # 字符串取值按字符串去重
+    assert round(HyperLogLog().update(pd.Series(["001", "1", "1"])).estimate()) == 2
+
+
+def test_integral_floats_match_integers_per_value():
+    """混有非整数值的块中，3.0 与全整数块中的 3 视为同一取值"""
+    integers = pd.Series([1, 2, 3])
+    mixed = pd.Series([3.0, 3.5, np.nan])
+
+    assert HyperLogLog().update(integers).merge(HyperLogLog().update(mixed)).estimate() == \
+        pytest.approx(HyperLogLog().update(pd.Series([1, 2, 3, 3.5])).estimate())
+    assert round(HyperLogLog().update(pd.concat([integers, mixed])).estimate()) == 4
+
+    heavy = MisraGries(k=10).update(integers).update(mixed)
+    assert {entry["value"]: entry["count"] for entry in heavy.top()} == {3: 2, 1: 1, 2: 1, 3.5: 1}
+
+
+def test_misra_gries_error_bound():
+    """高频取值的计数低估量不超过误差界"""
+    rng = np.random.default_rng(2)
+    values = pd.Series(rng.zipf(1.6, 100_000))
+    exact = values.value_counts()
+
+    left, right = MisraGries(k=20), MisraGries(k=20)
+    for start in range(0, 50_000, 10_000):
+        left.update(values[start:start + 10_000])
+    for start in range(50_000, 100_000, 10_000):
+        right.update(values[start:start + 10_000])
+    left.merge(right)
+
+    for entry in left.top(5):
+        assert 0 <= exact[entry["value"]] - entry["count"] <= left.max_error
+    assert [entry["value"] for entry in left.top(3)] == exact.index[:3].tolist()
+
+
+def test_approximate_statistics_from_file(tmp_path):
+    """逐块近似统计与精确结果相符，并标注误差界"""
+    from src.tools.statistical_analyzer import calculate_all_statistics
+
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 15, 20_000),
+        "region": rng.choice(["east", "west", "north"], 20_000, p=[0.5, 0.3, 0.2])
+    })
+    csv_path = tmp_path / "large.csv"
+    df.to_csv(csv_path, index=False)
+    df = pd.read_csv(csv_path)
+
+    result = calculate_all_statistics(str(csv_path), approximate=True)
+    stats = result["statistics"]["amount"]
+    assert result["approximate"] is True
+    assert abs(stats["mean"] - df["amount"].mean()) < 1e-9
+    assert abs(stats["std"] - df["amount"].std()) < 1e-9
+    rank = (df["amount"] <= stats["median"]).mean()
+    assert abs(rank - 0.5) <= result["error_bounds"]["quantile_rank_error"]
+
+    region = result["categorical"]["region"]
+    assert region["distinct"] == 3
+    assert region["top_values"][0] == {"value": "east", "count": int((df["region"] == "east").sum())}
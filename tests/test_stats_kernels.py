@@ -0,0 +1,136 @@
+"""
+统计内核测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.stats_kernels import (
+    column_moments, growth_rates, merge_moments, moments_to_stats, zscore_outliers
+)
+
+
+def test_merged_moments_match_direct_computation():
+    """分块合并的矩统计量与整体计算一致，并与 pandas 的结果一致"""
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(size=10_000)
+    values[rng.choice(len(values), 200, replace=False)] = np.nan
+
+    merged = column_moments(values[:0])
+    for chunk in np.array_split(values, 7):
+        merged = merge_moments(merged, column_moments(chunk))
+
+    stats = moments_to_stats(merged)
+    series = pd.Series(values)
+    assert merged["nulls"] == 200
+    assert stats["count"] == series.count()
+    assert np.isclose(stats["mean"], series.mean())
+    assert np.isclose(stats["std"], series.std())
+    assert np.isclose(stats["skewness"], series.skew())
+    assert np.isclose(stats["kurtosis"], series.kurtosis())
+    assert stats["min"] == series.min() and stats["max"] == series.max()
+
+
+def _reference_growth(values):
+    """原 analyst_v2.analyze_trend 的逐行循环"""
+    rates = []
+    for i in range(1, len(values)):
+        if values[i-1] != 0:
+            rates.append((values[i] - values[i-1]) / values[i-1] * 100)
+    return rates
+
+
+def _reference_anomalies(series, threshold):
+    """原 analyst_v2.detect_anomalies 的逐行循环"""
+    mean, std = series.mean(), series.std()
+    anomalies = []
+    for idx, value in series.items():
+        z_score = (value - mean) / std if std > 0 else 0
+        if abs(z_score) > threshold:
+            anomalies.append((int(idx), float(value), round(z_score, 2)))
+    return anomalies
+
+
+def test_growth_rates_match_loop():
+    """向量化增长率与原循环结果一致（含上一期为 0 的情况）"""
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 5, 2000).astype(float)
+
+    rates = growth_rates(values)
+    expected = _reference_growth(values)
+    np.testing.assert_allclose(rates, expected)
+    assert round(rates.mean(), 2) == round(np.mean(expected), 2)
+
+
+def test_zscore_outliers_match_loop():
+    """向量化异常检测与原循环结果一致，并保留原始行号"""
+    rng = np.random.default_rng(2)
+    series = pd.Series(rng.standard_t(3, 5000), index=np.arange(5000) * 3)
+
+    positions, z = zscore_outliers(series.to_numpy(), threshold=2.0)
+    result = [(int(series.index[p]), float(series.iloc[p]), round(float(z[p]), 2)) for p in positions]
+    assert result == _reference_anomalies(series, 2.0)
+    assert len(zscore_outliers(np.ones(10))[0]) == 0
+
+
+def test_statistical_analyzer_matches_pandas_reference():
+    """statistical_analyzer 改用内核后与原 pandas 实现一致"""
+    from scipy import stats as scipy_stats
+    from src.tools.statistical_analyzer import analyze_trend, detect_anomalies
+
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=400).astype(str),
+        "sales": rng.normal(100, 20, 400).round(1)
+    })
+
+    result = analyze_trend(df.copy(), "sales", "date", periods=7)
+    ordered = df.assign(date=pd.to_datetime(df["date"])).sort_values("date")
+    growth = ((ordered["sales"] - ordered["sales"].shift(1)) / ordered["sales"].shift(1) * 100).round(2)
+    change = growth.diff()
+    assert result["average_growth_rate"] == growth.mean()
+    assert result["moving_average"] == pytest.approx(ordered["sales"].rolling(7).mean().iloc[-1])
+    assert result["inflection_points"] == ordered["date"][change.abs() > change.std()].tolist()
+
+    zscore = detect_anomalies(df, "sales", method="zscore", threshold=2.0)
+    z = np.abs(scipy_stats.zscore(df["sales"]))
+    assert [a["index"] for a in zscore["anomalies"]] == np.flatnonzero(z > 2.0).tolist()
+
+    iqr = detect_anomalies(df, "sales", method="iqr")
+    q1, q3 = df["sales"].quantile(0.25), df["sales"].quantile(0.75)
+    outside = df["sales"][(df["sales"] < q1 - 1.5 * (q3 - q1)) | (df["sales"] > q3 + 1.5 * (q3 - q1))]
+    assert [a["index"] for a in iqr["anomalies"]] == outside.index.tolist()
+
+
+def test_all_statistics_match_per_column(tmp_path):
+    """多列一次计算与逐列 calculate_basic_statistics 结果一致"""
+    from src.tools.statistical_analyzer import calculate_all_statistics, calculate_basic_statistics
+
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame(rng.lognormal(size=(500, 4)), columns=["a", "b", "c", "d"])
+    df.loc[::9, "b"] = np.nan
+    df["qty"] = np.arange(500)
+    df["region"] = "east"
+    df["empty"] = np.nan
+    csv_path = tmp_path / "wide.csv"
+    df.to_csv(csv_path, index=False)
+
+    result = calculate_all_statistics(str(csv_path))
+    assert result["skipped"] == ["region"]
+    for col, stats in result["statistics"].items():
+        expected = calculate_basic_statistics(df, col)
+        for key, value in expected.items():
+            if isinstance(value, float):
+                assert value == pytest.approx(stats[key], nan_ok=True), (col, key)
+            else:
+                assert stats[key] == value, (col, key)
+
+    subset = calculate_all_statistics(str(csv_path), columns=["d", "a"])
+    assert list(subset["statistics"]) == ["d", "a"]
+    assert "error" in calculate_all_statistics(str(csv_path), columns=["missing"])
@@ -0,0 +1,112 @@
+"""
+重采样趋势引擎测试
+"""
+import sys
+from pathlib import Path
+
+# 添加 src 到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools import trend_engine
+from src.tools.trend_engine import analyze_trends, date_order, resample_sorted
+
+
+def _daily_frame(days: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2023-01-01", periods=days).repeat(3)
+    df = pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "sales": rng.normal(100, 10, len(dates)) + np.arange(len(dates)) * 0.1,
+        "orders": rng.poisson(20, len(dates)).astype(float)
+    })
+    # 打乱行顺序、去掉一段日期、加入缺失值和无法解析的日期
+    df = df.sample(frac=1, random_state=1).reset_index(drop=True)
+    df = df[~df["date"].between("2023-03-01", "2023-03-20")].reset_index(drop=True)
+    df.loc[5, "sales"] = np.nan
+    df.loc[7, "date"] = "not a date"
+    return df
+
+
+@pytest.mark.parametrize("freq,rule", [("D", "D"), ("W", "W-SUN"), ("M", "MS")])
+@pytest.mark.parametrize("agg", ["sum", "mean"])
+def test_resample_matches_pandas(freq, rule, agg):
+    """重采样结果与 pandas resample 一致（没有数据的周期为 NaN）"""
+    df = _daily_frame()
+    order, dates = date_order(df["date"])
+    periods, values = resample_sorted(dates, df[["sales", "orders"]].to_numpy()[order], freq=freq, agg=agg)
+
+    indexed = df.assign(date=pd.to_datetime(df["date"], errors="coerce")).dropna(subset=["date"]).set_index("date")
+    resampler = indexed[["sales", "orders"]].resample(rule)
+    expected = resampler.sum(min_count=1) if agg == "sum" else resampler.mean()
+    if freq == "W":
+        # pandas 的周以结束日为标签，这里以周一为标签
+        expected.index = expected.index - pd.Timedelta(days=6)
+    np.testing.assert_array_equal(periods, expected.index.to_numpy(dtype="datetime64[D]"))
+    np.testing.assert_allclose(values, expected.to_numpy(), rtol=1e-10)
+
+
+def test_analyze_trends_does_not_mutate_input():
+    """多列一次分析，不修改调用方的 DataFrame"""
+    df = _daily_frame()
+    snapshot = df.copy()
+
+    result = analyze_trends(df, ["sales", "orders"], "date", freq="M", agg="sum", window=3)
+    pd.testing.assert_frame_equal(df, snapshot)
+
+    monthly = df.assign(date=pd.to_datetime(df["date"], errors="coerce")).set_index("date").resample("MS")["sales"].sum()
+    growth = monthly.pct_change() * 100
+    sales = result["trends"]["sales"]
+    assert result["periods"] == len(monthly)
+    assert sales["average_growth_rate"] == pytest.approx(growth.mean(), abs=0.01)
+    assert sales["moving_average"] == pytest.approx(monthly.tail(3).mean(), abs=1e-4)
+    assert sales["year_over_year_growth"] == pytest.approx((monthly.iloc[-1] / monthly.iloc[-13] - 1) * 100, abs=0.01)
+    assert set(result["trends"]) == {"sales", "orders"}
+
+    from src.tools.statistical_analyzer import analyze_trend
+    trend = analyze_trend(df, "sales", "date")
+    pd.testing.assert_frame_equal(df, snapshot)
+    # 无法解析的日期不参与分析，并在结果中注明
+    assert trend["dropped_rows"] == int(pd.to_datetime(df["date"], errors="coerce").isna().sum())
+
+
+@pytest.mark.parametrize("agg", ["sum", "mean"])
+def test_weekend_gaps_are_not_zero_sales(agg):
+    """工作日数据：周末没有数据的周期不按 0 计入环比、移动平均和周期对比"""
+    dates = pd.bdate_range("2024-01-01", periods=60)
+    df = pd.DataFrame({"date": dates, "sales": np.linspace(100, 130, len(dates))})
+
+    periods, values = resample_sorted(dates.to_numpy(), df[["sales"]].to_numpy(), freq="D", agg=agg)
+    weekend = pd.DatetimeIndex(periods).dayofweek >= 5
+    assert np.isnan(values[weekend]).all() and not np.isnan(values[~weekend]).any()
+
+    sales = analyze_trends(df, "sales", "date", agg=agg)["trends"]["sales"]
+    assert sales["total_growth"] == pytest.approx(30.0)
+    assert sales["average_growth_rate"] > 0 and sales["trend"] == "稳定"
+    assert 125 < sales["moving_average"] <= 130
+    comparison = sales["period_comparison"]
+    assert comparison["change_pct"] > 0 and comparison["recent_avg"] > comparison["previous_avg"] > 120
+
+
+def test_date_order_cached_per_dataset(tmp_path, monkeypatch):
+    """同一数据集只解析、排序一次日期列；文件修改后重新计算"""
+    df = _daily_frame()
+    path = tmp_path / "daily.csv"
+    df.to_csv(path, index=False)
+    trend_engine._date_order_cache.clear()
+
+    calls = []
+    original = trend_engine.date_order
+    monkeypatch.setattr(trend_engine, "date_order", lambda dates: calls.append(1) or original(dates))
+
+    first = analyze_trends(str(path), "sales", "date", freq="W")
+    analyze_trends(str(path), ["orders"], "date", freq="M")
+    assert len(calls) == 1
+    assert first["trends"]["sales"]["trend"] in ("上升", "下降", "稳定")
+
+    df.head(300).to_csv(path, index=False)
+    analyze_trends(str(path), "sales", "date")
+    assert len(calls) == 2
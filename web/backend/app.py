@@ -4,6 +4,7 @@ DataInsight Pro - Web API Backend
 FastAPI 后端服务
 """
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
@@ -21,7 +22,6 @@ import pandas as pd
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.crew_v2 import create_crew
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -89,16 +89,46 @@ async def run_analysis_task(task_id: str, goal: str, dataset_path: str, depth: s
     try:
         update_task_status(task_id, "running", 10, "初始化分析...")
 
-        # 导入已配置好的 Agents（它们已经有正确的 tools）
-        from src.agents.data_explorer_v2 import data_explorer
-        from src.agents.analyst_v2 import analyst
-        from src.agents.pandaai_real import pandaai_agent
-        from src.agents.reporter_v2 import reporter
+        # 分析深度决定执行哪些阶段、数据是否抽样和 LLM 调用上限
+        from src.execution_plan import budget_agent, compile_plan, prepare_plan_dataset, select_stages, stage_steps
+        plan = compile_plan(depth)
+
+        if plan["mode"] == "local":
+            # quick：确定性工具 + 一次 LLM 摘要，不启动 Crew
+            from src.quick_analysis import run_quick_analysis
+            update_task_status(task_id, "running", 30, "快速分析中...")
+            task_output_dir = OUTPUT_DIR / task_id
+            task_output_dir.mkdir(exist_ok=True)
+            output_path = task_output_dir / ("final_report.json" if output_format == 'json' else "final_report.md")
+            quick = run_quick_analysis(plan, goal, dataset_path, str(output_path), output_format)
+            update_task_status(task_id, "completed", 100, "分析完成！", {
+                'report_path': str(output_path),
+                'report_content': json.loads(quick['report']) if output_format == 'json' else quick['report'],
+                'output_format': output_format,
+                'stage_timings': quick['timings']
+            })
+            return
+
+        # 超过计划样本行数的数据集先抽样，Agent 读取样本文件
+        dataset_path, _ = prepare_plan_dataset(plan, dataset_path)
+
+        # 获取已配置好的 Agents（它们已经有正确的 tools；第一次使用时创建，之后复用），按计划限制工具和迭代次数
+        from src.agents.registry import get_agent
+        data_explorer, analyst, pandaai_agent, reporter = (
+            budget_agent(get_agent(name), plan, stage) if stage in plan["stages"] else None
+            for name, stage in [
+                ("data_explorer", "data_exploration"),
+                ("analyst", "statistical_analysis"),
+                ("pandaai_agent", "pandaai_analysis"),
+                ("reporter", "report")
+            ]
+        )
 
         update_task_status(task_id, "running", 20, "加载数据探索 Agent...")
 
         # 创建 Crew
-        from crewai import Crew, Process, Task
+        from crewai import Task
+        from src.crew_v2 import STAGE_NAMES, assemble_crew
 
         # 定义任务（直接使用文件路径）
         task_data_exploration = Task(
@@ -124,15 +154,9 @@ async def run_analysis_task(task_id: str, goal: str, dataset_path: str, depth: s
         task_statistical_analysis = Task(
             description=f"""对数据集 {dataset_path} 进行深入的统计分析：
 
-1. 使用 read_csv_dataset 读取数据集 {dataset_path}
-2. 使用 calculate_basic_stats 计算基本统计量（均值、中位数、标准差等）
-3. 使用 analyze_trend 分析时间序列趋势
-4. 使用 calculate_correlation 分析变量相关性
-5. 使用 detect_anomalies 检测异常值
-6. 使用 generate_chart_config 生成图表配置
-7. 生成完整的统计分析报告
+{stage_steps(plan, "statistical_analysis", final_step="生成完整的统计分析报告")}
 
-重要：直接读取原始数据文件 {dataset_path}，执行真正的数值计算。
+重要：所有工具都直接读取原始数据文件（file_path="{dataset_path}"），执行真正的数值计算。
 """,
             expected_output="统计分析报告，包含：关键指标、趋势分析、相关性矩阵、异常值列表、图表配置",
             agent=analyst
@@ -187,18 +211,20 @@ async def run_analysis_task(task_id: str, goal: str, dataset_path: str, depth: s
             agent=reporter
         )
 
-        # 创建 Crew
-        crew = Crew(
-            agents=[data_explorer, analyst, pandaai_agent, reporter],
-            tasks=[task_data_exploration, task_statistical_analysis, task_pandaai_analysis, task_report],
-            process=Process.sequential,
-            verbose=True
+        # 创建 Crew（前三个任务互相独立，并发执行；报告任务等待它们全部完成）
+        stage_names, stage_tasks = select_stages(
+            plan,
+            STAGE_NAMES,
+            [task_data_exploration, task_statistical_analysis, task_pandaai_analysis, task_report]
         )
+        crew, timer = assemble_crew(stage_tasks, stage_names)
 
         update_task_status(task_id, "running", 30, "开始分析...")
 
         # 执行分析（不依赖占位符替换）
+        timer.start()
         result = crew.kickoff()
+        stage_timings = timer.timings()
 
         update_task_status(task_id, "running", 70, "保存中间结果...")
 
@@ -207,34 +233,19 @@ async def run_analysis_task(task_id: str, goal: str, dataset_path: str, depth: s
         try:
             # 访问每个任务的输出
             if hasattr(result, 'tasks_output'):
-                task_outputs = result.tasks_output
-
-                # 保存数据探索结果
-                if len(task_outputs) > 0:
-                    data_exploration_output = str(task_outputs[0].raw if hasattr(task_outputs[0], 'raw') else task_outputs[0])
-                    with open(task_output_dir / "data_exploration.md", 'w', encoding='utf-8') as f:
-                        f.write("# 数据探索分析结果\n\n")
-                        f.write(data_exploration_output)
-
-                # 保存统计分析结果
-                if len(task_outputs) > 1:
-                    statistical_analysis_output = str(task_outputs[1].raw if hasattr(task_outputs[1], 'raw') else task_outputs[1])
-                    with open(task_output_dir / "statistical_analysis.md", 'w', encoding='utf-8') as f:
-                        f.write("# 统计分析结果\n\n")
-                        f.write(statistical_analysis_output)
-
-                # 保存 PandaAI 分析结果
-                if len(task_outputs) > 2:
-                    pandaai_analysis_output = str(task_outputs[2].raw if hasattr(task_outputs[2], 'raw') else task_outputs[2])
-                    with open(task_output_dir / "pandaai_analysis.md", 'w', encoding='utf-8') as f:
-                        f.write("# PandaAI 分析结果\n\n")
-                        f.write(pandaai_analysis_output)
-
-                # 保存最终报告
-                if len(task_outputs) > 3:
-                    final_report_output = str(task_outputs[3].raw if hasattr(task_outputs[3], 'raw') else task_outputs[3])
-                    with open(task_output_dir / "final_report.md", 'w', encoding='utf-8') as f:
-                        f.write(final_report_output)
+                # 按阶段保存（计划中没有的阶段不生成文件）
+                stage_files = {
+                    "data_exploration": ("data_exploration.md", "# 数据探索分析结果\n\n"),
+                    "statistical_analysis": ("statistical_analysis.md", "# 统计分析结果\n\n"),
+                    "pandaai_analysis": ("pandaai_analysis.md", "# PandaAI 分析结果\n\n"),
+                    "report": ("final_report.md", "")
+                }
+                for stage, task_output in zip(stage_names, result.tasks_output):
+                    filename, header = stage_files[stage]
+                    content = str(task_output.raw if hasattr(task_output, 'raw') else task_output)
+                    with open(task_output_dir / filename, 'w', encoding='utf-8') as f:
+                        f.write(header)
+                        f.write(content)
         except Exception as e:
             print(f"保存中间结果时出错: {e}")
             # 如果无法提取单独的任务输出，保存完整结果
@@ -267,8 +278,9 @@ async def run_analysis_task(task_id: str, goal: str, dataset_path: str, depth: s
                 f.write(f"分析任务 ID: {task_id}\n")
                 f.write(f"数据集: {dataset_path}\n")
                 f.write(f"分析目标: {goal}\n")
-                f.write(f"分析深度: {depth}\n")
+                f.write(f"分析深度: {depth}（阶段: {', '.join(stage_names)}，LLM 调用上限: {plan['max_llm_calls']}）\n")
                 f.write(f"输出格式: {output_format}\n")
+                f.write(f"阶段耗时: {json.dumps(stage_timings, ensure_ascii=False)}\n")
                 f.write(f"\n=== CrewAI 执行结果 ===\n\n")
                 f.write(str(result))  # 保存完整的执行结果
         except Exception as e:
@@ -277,7 +289,8 @@ async def run_analysis_task(task_id: str, goal: str, dataset_path: str, depth: s
         update_task_status(task_id, "completed", 100, "分析完成！", {
             'report_path': str(output_path),
             'report_content': report_content,
-            'output_format': output_format
+            'output_format': output_format,
+            'stage_timings': stage_timings
         })
 
     except Exception as e:
@@ -304,8 +317,28 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
+def prepare_dataset_artifacts(file_path: str):
+    """后台生成数据集的派生文件（列式旁路文件、数据集概要），后续分析直接复用"""
+    from src.tools.data_loader import convert_to_columnar
+    from src.tools.dataset_profile import build_profile
+
+    try:
+        convert_to_columnar(file_path)
+        build_profile(file_path)
+    except Exception as e:
+        print(f"生成数据集派生文件失败 {file_path}: {e}")
+
+
+def index_and_preview(file_path: str, rows: int = 10):
+    """建立行索引并读取前几行（遍历整个文件，在线程池中执行）"""
+    from src.tools.row_index import build_row_index, read_rows
+
+    total_rows = len(build_row_index(file_path)) - 1
+    return total_rows, read_rows(file_path, 0, rows)
+
+
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """上传数据文件"""
     try:
         # 生成唯一文件名
@@ -320,9 +353,10 @@ async def upload_file(file: UploadFile = File(...)):
 
         # 尝试读取文件以验证格式
         try:
-            if file_ext == '.csv':
-                df = pd.read_csv(file_path, nrows=100)
-                preview = df.head(10).to_dict(orient='records')
+            if file_ext.lower() in ['.csv', '.jsonl']:
+                # 一次遍历建立行索引，预览和后续分页/采样直接定位到行（大文件扫描不阻塞事件循环）
+                total_rows, df = await run_in_threadpool(index_and_preview, str(file_path))
+                preview = json.loads(df.to_json(orient='records', force_ascii=False))
             elif file_ext in ['.xlsx', '.xls']:
                 df = pd.read_excel(file_path, nrows=100)
                 preview = df.head(10).to_dict(orient='records')
@@ -335,7 +369,7 @@ async def upload_file(file: UploadFile = File(...)):
                 preview = None
 
             file_info = {
-                'rows': len(df) if 'df' in locals() else 0,
+                'rows': total_rows if 'total_rows' in locals() else (len(df) if 'df' in locals() else 0),
                 'columns': len(df.columns) if 'df' in locals() else 0,
                 'column_names': list(df.columns) if 'df' in locals() else [],
                 'preview': preview
@@ -343,6 +377,10 @@ async def upload_file(file: UploadFile = File(...)):
         except Exception as e:
             file_info = {'error': f'无法预览文件: {str(e)}'}
 
+        # 后台转换为列式旁路文件，不阻塞上传响应
+        if file_ext.lower() in ['.csv', '.xlsx', '.xls', '.json']:
+            background_tasks.add_task(prepare_dataset_artifacts, str(file_path))
+
         return {
             "filename": file.filename,
             "file_path": str(file_path),
@@ -354,6 +392,47 @@ async def upload_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"文件上传失败: {str(e)}")
 
 
+@app.get("/uploads/{filename}/rows")
+async def get_upload_rows(filename: str, start: int = 0, limit: int = 50):
+    """分页读取已上传的 CSV/JSONL 文件（通过行索引直接定位，不从头解析）"""
+    from src.tools.row_index import get_row_index, read_rows
+
+    file_path = UPLOAD_DIR / Path(filename).name
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="文件不存在")
+
+    offsets = get_row_index(str(file_path))
+    if offsets is None:
+        raise HTTPException(status_code=400, detail="该文件格式不支持分页读取")
+
+    limit = max(1, min(limit, 1000))
+    df = read_rows(str(file_path), start, limit)
+    return {
+        "filename": file_path.name,
+        "total_rows": len(offsets) - 1,
+        "start": start,
+        "rows": json.loads(df.to_json(orient='records', force_ascii=False))
+    }
+
+
+@app.get("/uploads/{filename}/stats")
+async def get_upload_stats(filename: str, columns: Optional[str] = None):
+    """计算已上传文件所有数值列的基本统计量（columns 为逗号分隔的列名，可选）"""
+    from src.tools.dataset_profile import to_jsonable
+    from src.tools.statistical_analyzer import calculate_all_statistics
+
+    file_path = UPLOAD_DIR / Path(filename).name
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="文件不存在")
+
+    selected = [col.strip() for col in columns.split(",") if col.strip()] if columns else None
+    # 完整读取和统计计算放到线程池中执行，不阻塞事件循环上的其他请求
+    result = await run_in_threadpool(calculate_all_statistics, str(file_path), selected)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return to_jsonable(result)
+
+
 @app.post("/analyze", response_model=TaskStatus)
 async def analyze(
     background_tasks: BackgroundTasks,